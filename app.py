@@ -1,34 +1,57 @@
 from flask import Flask, jsonify
 from flask_smorest import Api
+from config import app_config
 from extension import db
-from route.auth_route import auth_blp, BLOCKLIST
+from json_provider import FastJSONProvider
+from route.auth_route import auth_blp
 from route.expense_route import expense_blp
-from dotenv import load_dotenv
-import os
+from route.budget_route import budget_blp
+from route.analytics_route import analytics_blp
+from route.category_route import category_blp
+from route.job_route import job_blp
+from route.metrics_route import metrics_blp
 from flask_jwt_extended import JWTManager
-
-load_dotenv()
+from service.revocation_service import token_blocklist
+from service.user_cache import user_id_cache
+from service.password_hasher import password_hasher
+from service.query_metrics import query_metrics
+from service.response_cache import response_cache
+from service.ingestion_queue import ingestion_queue
+from service.replica_router import replica_router
+from service.budget_notifier import budget_notifier
+from service.search_service import ExpenseSearchService
+from service.import_service import ExpenseImportService, import_workers
+from service.analytics_snapshot import expense_snapshot
+from service.category_catalog import category_catalog
+from service.category_service import CategoryService
+from service.account_deletion import AccountDeletion
+from service.version_service import ExpenseVersionService
+from service.job_runner import job_runner
+from cli import register_commands
 
 def create_app():
     app = Flask(__name__)
-    app.config["PROPAGATE_EXCEPTIONS"] = True
-    app.config["API_TITLE"] = "Expense REST API"
-    app.config["API_VERSION"] = "v1"
-    app.config["OPENAPI_VERSION"] = "3.0.3"
-    app.config["OPENAPI_URL_PREFIX"] = "/"
-    app.config["OPENAPI_SWAGGER_UI_PATH"] = "/swagger-ui"
-    app.config["OPENAPI_SWAGGER_UI_URL"] = "https://cdn.jsdelivr.net/npm/swagger-ui-dist/"
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config['JWT_SECRET_KEY'] = os.getenv("JWT_SECRET")
+    app.json = FastJSONProvider(app)
+    app.config.from_mapping(app_config())
 
     db.init_app(app)
+    replica_router.init_app(app)
+    token_blocklist.init_app(app)
+    user_id_cache.init_app(app)
+    category_catalog.init_app(app)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    budget_notifier.init_app(app)
+    import_workers.init_app(app)
+    expense_snapshot.init_app(app)
+    if app.config["QUERY_METRICS"]:
+        query_metrics.init_app(app)
     api = Api(app)
     jwt = JWTManager(app)
 
     @jwt.additional_claims_loader
     def add_claims_loader(identity):
-        if identity == os.getenv("ADMIN_EMAIL"):
+        if identity == app.config["ADMIN_EMAIL"]:
             return {"is_admin" : True}
     
     @jwt.expired_token_loader
@@ -82,13 +105,30 @@ def create_app():
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        return jwt_payload["jti"] in BLOCKLIST
+        return token_blocklist.is_revoked(jwt_payload)
 
-    with app.app_context():
-        db.create_all()
+    # Tables are created by `flask init-db`; AUTO_CREATE_TABLES is for local runs and benchmarks.
+    if app.config["AUTO_CREATE_TABLES"]:
+        with app.app_context():
+            db.create_all()
+            CategoryService().install()
+            AccountDeletion().install()
+            ExpenseImportService().install()
+            ExpenseVersionService().install()
+            expense_snapshot.install()
+            ExpenseSearchService().install()
+    ingestion_queue.init_app(app)
+    job_runner.init_app(app)
 
     api.register_blueprint(auth_blp)
     api.register_blueprint(expense_blp)
+    api.register_blueprint(budget_blp)
+    api.register_blueprint(analytics_blp)
+    api.register_blueprint(category_blp)
+    api.register_blueprint(job_blp)
+    api.register_blueprint(metrics_blp)
+
+    register_commands(app)
 
     return app
 
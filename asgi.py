@@ -0,0 +1,86 @@
+"""ASGI entry point: the same API served by Starlette on an async engine.
+
+    uvicorn asgi:app --workers 4
+
+Configuration and the process-wide caches come from the Flask app factory,
+so both serving modes read the same environment and issue tokens the other
+accepts. Tables are created by `flask init-db`.
+"""
+from starlette.applications import Starlette
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from app import create_app
+from config import engine_options
+from route.async_auth_route import auth_routes
+from route.async_expense_route import expense_routes
+from route.async_budget_route import budget_routes
+from route.async_analytics_route import analytics_routes
+from route.async_category_route import category_routes
+from route.async_job_route import job_routes
+from service.async_service import AsyncExpenseService, AsyncAuthManager, AsyncTokenBlocklist
+from service.token_service import TokenService
+from service.revocation_service import token_lifetime
+import os
+
+
+def async_database_url(database_url: str) -> str:
+    if database_url.startswith("postgres://"):
+        database_url = "postgresql://" + database_url[len("postgres://"):]
+    for sync_prefix, async_prefix in [
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ]:
+        if database_url.startswith(sync_prefix):
+            return async_prefix + database_url[len(sync_prefix):]
+    return database_url
+
+
+def async_engine_options(database_url: str) -> dict:
+    options = engine_options(database_url)
+    if os.getenv("DB_STATEMENT_TIMEOUT_MS") and database_url.startswith("postgres"):
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(int(os.getenv("DB_STATEMENT_TIMEOUT_MS")))}
+        }
+    return options
+
+
+def create_asgi_app() -> Starlette:
+    flask_app = create_app()
+    database_url = flask_app.config["SQLALCHEMY_DATABASE_URI"]
+    engine = create_async_engine(async_database_url(database_url), **async_engine_options(database_url))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    app = Starlette(
+        routes=auth_routes + expense_routes + budget_routes + analytics_routes + category_routes + job_routes,
+        lifespan=lifespan
+    )
+    app.state.engine = engine
+    # Statement imports run on the sync engine, off the event loop.
+    app.state.flask_app = flask_app
+    app.state.expense_service = AsyncExpenseService(sessionmaker)
+    app.state.auth_service = AsyncAuthManager(sessionmaker)
+    app.state.token_blocklist = AsyncTokenBlocklist(
+        sessionmaker,
+        backend=flask_app.config["REVOCATION_STORE"],
+        max_entries=int(flask_app.config["REVOCATION_MAX_ENTRIES"]),
+        cache_ttl=float(flask_app.config["REVOCATION_CACHE_TTL"]),
+        cache_size=int(flask_app.config["REVOCATION_CACHE_SIZE"]),
+        token_lifetime=token_lifetime(flask_app.config)
+    )
+    app.state.token_service = TokenService(
+        secret=flask_app.config["JWT_SECRET_KEY"],
+        access_expires=flask_app.config.get("JWT_ACCESS_TOKEN_EXPIRES", timedelta(minutes=15)),
+        refresh_expires=flask_app.config.get("JWT_REFRESH_TOKEN_EXPIRES", timedelta(days=30)),
+        admin_email=flask_app.config["ADMIN_EMAIL"]
+    )
+    return app
+
+
+app = create_asgi_app()
@@ -0,0 +1,184 @@
+"""Admin analytics: snapshot build, incremental refresh and report latency.
+
+By default seeds --rows expenses for --users users over --months months,
+times a full snapshot build on --workers processes, makes --changes writes
+(a third deletes) and times the incremental refresh. Then it times every
+report cold (first call after a refresh) and cached.
+
+With --synthetic-rows the database is skipped: segments of that many random
+expenses are written straight to a snapshot directory, to time the reports
+at sizes a test database cannot hold, e.g. --synthetic-rows 50000000.
+
+Usage:
+    python benchmark/analytics_benchmark.py [--rows 1000000] [--workers 4] [--database-url ...]
+    python benchmark/analytics_benchmark.py --synthetic-rows 50000000 --users 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import setup_environment
+
+CATEGORIES = ["groceries", "leisure", "electronics", "utilities", "clothing", "health", "others"]
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:42} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def seed(app, args):
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from models.user_model import UserModel
+    from money import amount_columns
+    from service.category_catalog import category_catalog
+    from service.rollup_service import RollupService
+    from service.version_service import ExpenseVersionService
+
+    rng = random.Random(23)
+    now = datetime.utcnow()
+    start = now - timedelta(days=30 * args.months)
+    span = int((now - start).total_seconds())
+    with app.app_context():
+        users = [UserModel(username=f"u{index}", email=f"u{index}@bench.local", password="-", createdAt=now,
+                           updatedAt=now) for index in range(args.users)]
+        db.session.add_all(users)
+        db.session.flush()
+        user_ids = [user.id for user in users]
+        for offset in range(0, args.rows, 20_000):
+            rows = []
+            for _ in range(min(20_000, args.rows - offset)):
+                created = start + timedelta(seconds=rng.randint(0, span))
+                amount = round(rng.lognormvariate(3, 1), 2)
+                rows.append({
+                    "title": "seed", "amount": amount, "category_id": category_catalog.resolve(rng.choice(CATEGORIES)), "description": "seed",
+                    "user_id": rng.choice(user_ids), "createdAt": created, "updatedAt": created,
+                    **amount_columns(amount, new=True),
+                })
+            db.session.execute(db.insert(ExpenseModel), rows)
+        versions = ExpenseVersionService()
+        for user_id in user_ids:
+            versions.bump(user_id)
+        db.session.commit()
+        RollupService().rebuild()
+        db.session.commit()
+    return [f"u{index}@bench.local" for index in range(args.users)]
+
+
+def change(app, emails: list, count: int):
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from service.expense_service import ExpenseService
+
+    rng = random.Random(24)
+    service = ExpenseService()
+    with app.app_context():
+        for index in range(count):
+            email = rng.choice(emails)
+            if index % 3 == 0:
+                expense_id = db.session.execute(
+                    db.select(ExpenseModel.id).where(ExpenseModel.user_id == service.resolve_user_id(email)).limit(1)
+                ).scalar()
+                if expense_id:
+                    service.remove_expense(expense_id=expense_id, user_email=email)
+                    continue
+            service.create_expense(title="change", amount=round(rng.uniform(1, 80), 2),
+                                   category=rng.choice(CATEGORIES), description="change", user_email=email)
+
+
+def synthesize(directory: str, rows: int, users: int, months: int):
+    """Write a snapshot of random expenses without a database."""
+    import numpy
+    from service.category_catalog import category_catalog
+
+    rng = numpy.random.default_rng(23)
+    per_month = rows // months
+    first = numpy.datetime64(datetime.utcnow().strftime("%Y-%m")) - months + 1
+    segments = {}
+    os.makedirs(os.path.join(directory, "g1"), exist_ok=True)
+    for index in range(months):
+        key = str(first + index)
+        path = os.path.join(directory, "g1", key)
+        os.makedirs(path, exist_ok=True)
+        start = numpy.datetime64(key).astype("datetime64[s]")
+        numpy.save(os.path.join(path, "id.npy"), numpy.frombuffer(rng.bytes(per_month * 16), dtype="S16"))
+        numpy.save(os.path.join(path, "user.npy"), rng.integers(0, users, per_month, dtype=numpy.int32))
+        numpy.save(os.path.join(path, "category.npy"), rng.integers(0, len(CATEGORIES), per_month, dtype=numpy.int16))
+        numpy.save(os.path.join(path, "cents.npy"), rng.lognormal(8, 1, per_month).astype(numpy.int64))
+        numpy.save(os.path.join(path, "created.npy"), start + rng.integers(0, 28 * 86400, per_month))
+        segments[key] = {"path": f"g1/{key}", "rows": per_month}
+    with open(os.path.join(directory, "g1", "users.json"), "w") as file:
+        json.dump({"ids": [f"user-{index}" for index in range(users)],
+                   "emails": [f"u{index}@bench.local" for index in range(users)]}, file)
+    with open(os.path.join(directory, "g1", "categories.json"), "w") as file:
+        json.dump([category_catalog.resolve(name) for name in CATEGORIES], file)
+    numpy.save(os.path.join(directory, "g1", "versions.npy"), numpy.zeros(users, dtype=numpy.int64))
+    with open(os.path.join(directory, "manifest.json"), "w") as file:
+        json.dump({
+            "generation": 1, "built_at": datetime.utcnow().isoformat(), "watermark": datetime.utcnow().isoformat(),
+            "rows": per_month * months, "segments": segments, "user_count": users,
+            "category_count": len(CATEGORIES), "users": "g1/users.json", "categories": "g1/categories.json",
+            "versions": "g1/versions.npy",
+        }, file)
+
+
+def reports(service):
+    last = service.open().months()[-1]
+    calls = {
+        "category distribution": lambda: service.category_distribution(),
+        "top spenders": lambda: service.top_spenders(limit=20),
+        "top spenders, one category": lambda: service.top_spenders(category="groceries", limit=20),
+        "monthly growth": lambda: service.monthly_growth(),
+        "growth, one category, last month": lambda: service.monthly_growth(from_month=last, category="leisure"),
+    }
+    for name, call in calls.items():
+        timed(f"{name} (cold)", call)
+    for name, call in calls.items():
+        timed(f"{name} (cached)", call)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--changes", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--synthetic-rows", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    os.environ["ANALYTICS_SNAPSHOT_DIR"] = directory = tempfile.mkdtemp()
+    os.environ["ANALYTICS_WORKERS"] = str(args.workers)
+    from app import create_app
+    from service.analytics_service import AnalyticsService
+    from service.analytics_snapshot import expense_snapshot
+
+    app = create_app()
+    service = AnalyticsService()
+    if args.synthetic_rows:
+        timed(f"write {args.synthetic_rows} synthetic rows", lambda: synthesize(
+            directory, args.synthetic_rows, args.users, args.months
+        ))
+        reports(service)
+        return
+
+    emails = timed(f"seed {args.rows} expenses", lambda: seed(app, args))
+    with app.app_context():
+        print(timed(f"full build, {args.workers} workers", lambda: expense_snapshot.refresh(full=True)))
+    change(app, emails, args.changes)
+    with app.app_context():
+        print(timed(f"refresh after {args.changes} writes", expense_snapshot.refresh))
+    reports(service)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cost of budget tracking on the create_expense write path.
+
+Seeds --rows expenses in the current month for one user, then times
+--writes create_expense calls three ways: without a budget, with a budget
+on the category (month-to-date total moved by the write's delta), and
+without a budget followed by the month-to-date SUM over expenses that
+alert checks needed before.
+
+Usage:
+    python benchmark/budget_benchmark.py [--rows 100000] [--writes 300] [--database-url ...]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import setup_environment, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--writes", type=int, default=300)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    from app import create_app
+    from extension import db
+    from models.expense_model import ExpenseModel, STORED_AMOUNT
+    from models.user_model import UserModel
+    from money import amount_columns
+    from service.category_catalog import category_catalog
+    from service.expense_service import ExpenseService
+    from service.rollup_service import RollupService
+
+    app = create_app()
+    rng = random.Random(21)
+    now = datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    elapsed = max(int((now - month_start).total_seconds()), 1)
+
+    with app.app_context():
+        user = UserModel(username="budget", email="budget@bench.local", password="-", createdAt=now, updatedAt=now)
+        db.session.add(user)
+        db.session.flush()
+        for offset in range(0, args.rows, 10_000):
+            rows = []
+            for _ in range(min(10_000, args.rows - offset)):
+                created_at = month_start + timedelta(seconds=rng.randint(0, elapsed))
+                amount = round(rng.uniform(1, 50), 2)
+                rows.append({
+                    "title": "seed", "amount": amount, "category_id": category_catalog.resolve("groceries"), "description": "seed",
+                    "user_id": user.id, "createdAt": created_at, "updatedAt": created_at,
+                    **amount_columns(amount, new=True),
+                })
+            db.session.execute(db.insert(ExpenseModel), rows)
+        db.session.commit()
+        RollupService().rebuild()
+
+        service = ExpenseService()
+
+        def write():
+            service.create_expense(
+                title="bench", amount=round(rng.uniform(1, 50), 2), category="Groceries",
+                description="bench", user_email=user.email
+            )
+
+        def month_to_date_sum():
+            db.session.execute(db.select(db.func.sum(STORED_AMOUNT)).where(
+                ExpenseModel.user_id == user.id,
+                ExpenseModel.category_id == category_catalog.resolve("groceries"),
+                ExpenseModel.createdAt >= month_start
+            )).scalar()
+
+        def timed(step) -> list:
+            samples = []
+            for _ in range(args.writes):
+                start = time.perf_counter()
+                step()
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        results = {"no budget": timed(write)}
+        results["range SUM after write"] = timed(lambda: (write(), month_to_date_sum()))
+        service.budgets.set_budget(user_email=user.email, category="Groceries", amount=10_000_000)
+        results["budget tracked"] = timed(write)
+
+        print(f"rows: {args.rows}, writes per mode: {args.writes}, database: {db.engine.dialect.name}")
+        for name, samples in results.items():
+            print(f"{name:24} p50 {percentile(samples, 0.5) * 1000:7.2f}ms  p95 {percentile(samples, 0.95) * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare /create-expense one row at a time against /create-expenses.
+
+Usage: python benchmark/bulk_expense_benchmark.py [--rows 2000] [--batch 500]
+"""
+import argparse
+import time
+
+from common import setup_environment, make_expense, login
+
+setup_environment()
+
+from app import create_app
+
+
+def run_single(client, headers, rows):
+    start = time.perf_counter()
+    for index in range(rows):
+        client.post("/api/v1/create-expense", json=make_expense(index), headers=headers)
+    return time.perf_counter() - start
+
+
+def run_bulk(client, headers, rows, batch):
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        expenses = [make_expense(index) for index in range(offset, min(offset + batch, rows))]
+        client.post("/api/v1/create-expenses", json={"expenses": expenses}, headers=headers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+
+    single = run_single(client, login(client, "single@bench.local"), args.rows)
+    bulk = run_bulk(client, login(client, "bulk@bench.local"), args.rows, args.batch)
+
+    print(f"rows: {args.rows}, batch size: {args.batch}")
+    print(f"single-item: {single:.2f}s ({args.rows / single:,.0f} rows/s)")
+    print(f"bulk:        {bulk:.2f}s ({args.rows / bulk:,.0f} rows/s)")
+    print(f"speedup:     {single / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Category names vs category ids: resolving a name, migrating, and table size.
+
+Times the former chain of .lower() comparisons against the catalog's
+alias lookup on --lookups names, then seeds --rows expenses into a table
+with the old free-text category column, runs `flask migrate-categories`'
+migration on it and compares the SQLite file size before and after (both
+vacuumed).
+
+Usage: python benchmark/category_benchmark.py [--rows 500000] [--lookups 1000000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from common import setup_environment
+
+NAMES = ["Groceries", "groceries", "Leisure", "Electronics", "utilities", "Clothing", "HEALTH", "others", "food"]
+LEGACY_NAMES = ["groceries", "leisure", "electronics", "utilities", "Clothing", "health", "others"]
+LEGACY_SCHEMA = """
+CREATE TABLE expenses (
+    id VARCHAR(255) NOT NULL PRIMARY KEY, title VARCHAR(255) NOT NULL, amount FLOAT NOT NULL,
+    category VARCHAR(255) NOT NULL, description VARCHAR(255), content_hash VARCHAR(32),
+    user_id VARCHAR(255) NOT NULL REFERENCES users (id), "createdAt" DATETIME NOT NULL, "updatedAt" DATETIME NOT NULL
+)
+"""
+
+
+def legacy_check_assign_category(category: str) -> str:
+    # ExpenseService.check_assign_category before the categories table.
+    if category.lower() == "Clothing".lower():
+        return "Clothing"
+    elif category.lower() == "Groceries".lower():
+        return "groceries"
+    elif category.lower() == "Leisure".lower():
+        return "leisure"
+    elif category.lower() == "Electronics".lower():
+        return "electronics"
+    elif category.lower() == "Utilities".lower():
+        return "utilities"
+    elif category.lower() == "Health".lower():
+        return "health"
+    else:
+        return "others"
+
+
+def timed(label: str, function, count: int = None):
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    rate = f" ({elapsed / count * 1e9:6.0f} ns each)" if count else ""
+    print(f"{label:38} {elapsed:8.3f}s{rate}")
+    return result
+
+
+def vacuumed_size(path: str) -> int:
+    connection = sqlite3.connect(path)
+    connection.execute("VACUUM")
+    connection.close()
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup_environment()
+    path = os.environ["DATABASE_URL"][len("sqlite:///"):]
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id VARCHAR(255) PRIMARY KEY, username VARCHAR(255) NOT NULL, "
+                       'email VARCHAR(255) NOT NULL UNIQUE, password VARCHAR(255) NOT NULL, "createdAt" DATETIME '
+                       'NOT NULL, "updatedAt" DATETIME NOT NULL)')
+    connection.execute(LEGACY_SCHEMA)
+    connection.close()
+
+    from app import create_app
+    from extension import db
+    from models.user_model import UserModel
+    from service.category_catalog import category_catalog
+    from service.category_migration import CategoryMigration
+
+    app = create_app()
+    rng = random.Random(24)
+    names = [rng.choice(NAMES) for _ in range(args.lookups)]
+    timed(f"{args.lookups} lookups, .lower() chain", lambda: [legacy_check_assign_category(name) for name in names],
+          args.lookups)
+    timed(f"{args.lookups} lookups, category_catalog", lambda: [category_catalog.resolve(name) for name in names],
+          args.lookups)
+
+    with app.app_context():
+        now = datetime.utcnow()
+        user = UserModel(username="category", email="category@bench.local", password="-", createdAt=now, updatedAt=now)
+        db.session.add(user)
+        db.session.commit()
+        legacy = db.table("expenses", *(db.column(name) for name in (
+            "id", "title", "amount", "category", "description", "user_id", "createdAt", "updatedAt"
+        )))
+
+        def seed():
+            for offset in range(0, args.rows, 20_000):
+                db.session.execute(db.insert(legacy), [
+                    {
+                        "id": str(uuid.uuid4()), "title": "category", "amount": round(rng.uniform(1, 100), 2),
+                        "category": rng.choice(LEGACY_NAMES), "description": "category", "user_id": user.id,
+                        "createdAt": now - timedelta(minutes=index), "updatedAt": now,
+                    }
+                    for index in range(offset, min(offset + 20_000, args.rows))
+                ])
+            db.session.commit()
+
+        timed(f"seed {args.rows} expenses with names", seed)
+        db.session.remove()
+        before = vacuumed_size(path)
+        result = timed(f"migrate {args.rows} expenses", CategoryMigration().run)
+        print(result)
+        db.session.remove()
+    after = vacuumed_size(path)
+    print(f"database size: {before / 1e6:.1f} MB with names, {after / 1e6:.1f} MB with ids "
+          f"({(before - after) / args.rows:.1f} bytes less per expense)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_environment(database_url: str = None):
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    # Benchmarks start from empty databases instead of running `flask init-db`.
+    os.environ.setdefault("AUTO_CREATE_TABLES", "true")
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret-key-benchmark-secret-key")
+
+
+def make_expense(index: int) -> dict:
+    return {
+        "title": f"expense {index}",
+        "amount": (index % 500) + 0.99,
+        "category": ["Groceries", "Leisure", "Health", "Clothing"][index % 4],
+        "description": f"benchmark row {index}",
+    }
+
+
+def login(client, email: str, password: str = "benchmark") -> dict:
+    client.post("/api/v1/signup", json={"username": email, "email": email, "password": password})
+    response = client.post("/api/v1/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -0,0 +1,71 @@
+"""Statement import throughput, deduplication and memory.
+
+Writes a --lines CSV statement (about 5% credits, which are rejected), then
+imports it twice through ExpenseImportService: the first run inserts every
+expense, the second finds them all as duplicates. Prints rows/s of both runs
+and the peak RSS of the process, which should not grow with --lines.
+
+Usage:
+    python benchmark/import_benchmark.py [--lines 200000] [--workers 4] [--database-url ...]
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+from datetime import date, timedelta
+
+from common import setup_environment
+
+MERCHANTS = ["WHOLE FOODS #123", "Netflix.com", "CVS Pharmacy 889", "Shell Oil 5521", "Comcast Cable",
+             "ZARA Store", "Best Buy 12", "Joe's Diner", "Starbucks Coffee"]
+
+
+def write_statement(path: str, lines: int):
+    rng = random.Random(22)
+    start = date(2026, 1, 1)
+    with open(path, "w") as statement:
+        statement.write("Date,Description,Amount,Memo\n")
+        for _ in range(lines):
+            day = start + timedelta(days=rng.randint(0, 280))
+            amount = -round(rng.uniform(1, 300), 2) if rng.random() < 0.95 else round(rng.uniform(100, 3000), 2)
+            statement.write(f'{day.isoformat()},"{rng.choice(MERCHANTS)} {rng.randint(1, 999999)}",{amount},card\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    os.environ["IMPORT_WORKERS"] = str(args.workers)
+    from app import create_app
+    from extension import db
+    from models.user_model import UserModel
+    from service.import_service import ExpenseImportService
+    from datetime import datetime
+
+    path = os.path.join(tempfile.mkdtemp(), "statement.csv")
+    write_statement(path, args.lines)
+
+    app = create_app()
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.add(UserModel(username="import", email="import@bench.local", password="-",
+                                 createdAt=now, updatedAt=now))
+        db.session.commit()
+
+        service = ExpenseImportService()
+        print(f"lines: {args.lines}, workers: {args.workers}, database: {db.engine.dialect.name}")
+        for run in ("first upload", "re-upload"):
+            with open(path, "rb") as statement:
+                report = service.import_file(user_email="import@bench.local", stream=statement, filename="statement.csv")
+            print(f"{run:13} {report['seconds']:7.2f}s  {report['rows'] / report['seconds']:9.0f} rows/s  "
+                  f"inserted {report['inserted']}, duplicates {report['duplicates']}, rejected {report['rejected']}")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
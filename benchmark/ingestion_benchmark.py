@@ -0,0 +1,68 @@
+"""Burst of /create-expense calls with synchronous commits vs the ingestion queue.
+
+Usage: python benchmark/ingestion_benchmark.py [--threads 8] [--requests 500]
+       [--queue-size 10000] [--wal /tmp/ingest.wal]
+"""
+import argparse
+import os
+import threading
+import time
+
+from common import setup_environment, make_expense, login, percentile
+
+setup_environment()
+
+from app import create_app
+from service.ingestion_queue import ingestion_queue
+
+
+def burst(app, headers, threads, requests):
+    latencies, statuses, lock = [], {}, threading.Lock()
+
+    def post(offset):
+        client = app.test_client()
+        for index in range(offset, requests, threads):
+            start = time.perf_counter()
+            response = client.post("/api/v1/create-expense", json=make_expense(index), headers=headers)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    workers = [threading.Thread(target=post, args=(offset,)) for offset in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    parser.add_argument("--wal", default=None, help="write-ahead file for the queued run")
+    args = parser.parse_args()
+
+    for name, queue_size in [("synchronous", 0), ("queued", args.queue_size)]:
+        os.environ["INGEST_QUEUE_SIZE"] = str(queue_size)
+        if queue_size and args.wal:
+            os.environ["INGEST_WAL_PATH"] = args.wal
+        app = create_app()
+        headers = login(app.test_client(), f"{name}@bench.local")
+
+        elapsed, latencies, statuses = burst(app, headers, args.threads, args.requests)
+        drain_start = time.perf_counter()
+        ingestion_queue.shutdown()
+        drained = time.perf_counter() - drain_start
+
+        print(
+            f"{name:12} {args.requests / elapsed:8,.0f} req/s accepted  p50 {percentile(latencies, 0.5) * 1000:6.2f}ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:6.2f}ms  statuses {statuses}  "
+            f"stored {args.requests / (elapsed + drained):,.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
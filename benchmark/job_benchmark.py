@@ -0,0 +1,150 @@
+"""Deleting an account and archiving old expenses while live traffic runs.
+
+Seeds two users with --rows expenses each spread over --months months,
+and a third whose expenses the retention job archives. A thread keeps
+calling /filter-expense and /create-expense for a live user throughout.
+The first account is deleted the way the ORM cascade did it, in one
+transaction with a DELETE per expense. The second goes through the
+chunked account deletion job, and the third user's expenses older than
+half of --months through the retention job. For each one it prints the
+time and throughput, and the live requests' p50/p99/max latency and
+errors while it ran.
+
+Usage:
+    python benchmark/job_benchmark.py [--rows 200000] [--months 24] [--batch-size 1000] [--database-url ...]
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from common import setup_environment, login, make_expense, percentile
+
+
+class LiveTraffic(threading.Thread):
+    def __init__(self, client, headers):
+        super().__init__(daemon=True)
+        self.client = client
+        self.headers = headers
+        self.stopping = threading.Event()
+        self.samples = []
+        self.errors = 0
+
+    def run(self):
+        index = 0
+        while not self.stopping.is_set():
+            index += 1
+            start = time.perf_counter()
+            if index % 4:
+                response = self.client.get("/api/v1/filter-expense?filter=past_week", headers=self.headers)
+            else:
+                response = self.client.post("/api/v1/create-expense", json=make_expense(index), headers=self.headers)
+            self.samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                self.errors += 1
+
+    def measure(self, label: str, rows: int, function):
+        self.samples, self.errors = [], 0
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:34} {elapsed:8.2f}s {rows / elapsed:9.0f} rows/s | live p50 {percentile(self.samples, 0.5) * 1e3:6.1f}ms"
+            f" p99 {percentile(self.samples, 0.99) * 1e3:7.1f}ms max {max(self.samples or [0]) * 1e3:7.1f}ms"
+            f" errors {self.errors}/{len(self.samples)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+    os.environ["JOB_BATCH_SIZE"] = str(args.batch_size)
+    from app import create_app
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from models.expense_archive_model import ExpenseArchiveModel
+    from models.user_model import UserModel
+    from money import amount_columns
+    from service.category_catalog import category_catalog
+    from service.job_runner import job_runner
+    from service.job_service import JobService
+    from service.rollup_service import RollupService
+
+    app = create_app()
+    rng = random.Random(25)
+    now = datetime.utcnow()
+    span = args.months * 30 * 86400
+
+    with app.app_context():
+        users = []
+        for name in ("cascade", "chunked", "retention"):
+            user = UserModel(username=name, email=f"{name}@bench.local", password="-", createdAt=now, updatedAt=now)
+            db.session.add(user)
+            db.session.flush()
+            users.append(user.id)
+            for offset in range(0, args.rows, 10_000):
+                rows = []
+                for _ in range(min(10_000, args.rows - offset)):
+                    created_at = now - timedelta(seconds=rng.randint(0, span))
+                    amount = round(rng.uniform(1, 50), 2)
+                    rows.append({
+                        "title": "seed", "amount": amount, "description": "seed", "user_id": user.id,
+                        "category_id": category_catalog.resolve(rng.choice(["groceries", "leisure", "health"])),
+                        "createdAt": created_at, "updatedAt": created_at, **amount_columns(amount, new=True),
+                    })
+                db.session.execute(db.insert(ExpenseModel), rows)
+        db.session.commit()
+        RollupService().rebuild()
+        print(f"seeded {len(users)} users x {args.rows} expenses over {args.months} months")
+
+    live = LiveTraffic(app.test_client(), login(app.test_client(), "live@bench.local"))
+    live.start()
+    time.sleep(1)
+
+    def cascade_delete():
+        # What deleting the user through the ORM did before passive_deletes.
+        with app.app_context():
+            user = db.session.get(UserModel, users[0])
+            for expense in user.expenses:
+                db.session.delete(expense)
+            db.session.delete(user)
+            db.session.commit()
+
+    def chunked_delete():
+        with app.app_context():
+            JobService().request_account_deletion("chunked@bench.local")
+            job_runner.run_pending()
+
+    def retention():
+        with app.app_context():
+            JobService().request_retention(months=args.months // 2)
+            job_runner.run_pending()
+
+    live.measure("one transaction, DELETE per row", args.rows, cascade_delete)
+    live.measure(f"account deletion job ({args.batch_size}/chunk)", args.rows, chunked_delete)
+    with app.app_context():
+        due = db.session.execute(db.select(db.func.count()).select_from(ExpenseModel).where(
+            ExpenseModel.user_id == users[2], ExpenseModel.createdAt < now - timedelta(days=args.months // 2 * 30)
+        )).scalar()
+    live.measure(f"retention job ({args.batch_size}/chunk)", due, retention)
+    live.stopping.set()
+
+    with app.app_context():
+        archives = db.session.execute(db.select(
+            db.func.count(), db.func.sum(ExpenseArchiveModel.count), db.func.sum(db.func.length(ExpenseArchiveModel.payload))
+        )).one()
+        print(f"{archives[1] or 0} expenses in {archives[0]} archive rows, "
+              f"{(archives[2] or 0) / max(archives[1] or 1, 1):.1f} compressed bytes per expense")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Concurrent load test for the auth and expense endpoints.
+
+Seeds N users x M expenses with a deterministic generator straight into
+DATABASE_URL, then drives /login, /create-expense, /filter-expense (every
+preset plus custom) and /delete-expense from several threads, either
+in-process through the Flask test client or against a running server.
+
+Usage:
+    python benchmark/load_test.py --users 20 --expenses 2000 --concurrency 8 --duration 15
+    python benchmark/load_test.py --database-url postgresql://... --target http://127.0.0.1:5000
+    python benchmark/load_test.py --output results/$(git rev-parse --short HEAD).json
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from common import setup_environment, percentile
+
+PASSWORD = "benchmark"
+MERCHANTS = [
+    "Amazon", "Walmart", "Target", "Netflix", "Spotify", "Uber", "Shell",
+    "Starbucks", "Whole Foods", "Apple Store", "Pharmacy", "Electric Co",
+]
+CATEGORIES = ["Groceries", "Leisure", "Electronics", "Utilities", "Clothing", "Health", "Others"]
+PRESETS = ["past_week", "past_month", "last_three_month", "custom"]
+MIX = [("login", 1), ("create-expense", 2), ("filter-expense", 6), ("delete-expense", 1)]
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+def seed(app, users, expenses_per_user, days, seed_value):
+    from extension import db
+    from money import amount_columns
+    from service.category_catalog import category_catalog
+    from models.user_model import UserModel
+    from models.expense_model import ExpenseModel
+    from service.password_hasher import password_hasher
+    from service.rollup_service import RollupService
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    emails = [f"user{index}@bench.local" for index in range(users)]
+
+    with app.app_context():
+        password_hash = password_hasher.hash(PASSWORD)
+        existing = set(db.session.execute(
+            db.select(UserModel.email).where(UserModel.email.in_(emails))
+        ).scalars())
+        for email in emails:
+            if email in existing:
+                continue
+            user = UserModel(username=email, email=email, password=password_hash, createdAt=now, updatedAt=now)
+            db.session.add(user)
+            db.session.flush()
+            rows = []
+            for index in range(expenses_per_user):
+                created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+                merchant = rng.choice(MERCHANTS)
+                amount = round(rng.uniform(1, 500), 2)
+                rows.append({
+                    "title": f"{merchant} #{index}",
+                    "amount": amount,
+                    "category_id": category_catalog.resolve(rng.choice(CATEGORIES)),
+                    "description": f"{merchant} purchase",
+                    "user_id": user.id,
+                    "createdAt": created_at,
+                    "updatedAt": created_at,
+                    **amount_columns(amount, new=True),
+                })
+                if len(rows) == 1000:
+                    db.session.execute(db.insert(ExpenseModel), rows)
+                    rows = []
+            if rows:
+                db.session.execute(db.insert(ExpenseModel), rows)
+        db.session.commit()
+        RollupService().rebuild()
+    return emails
+
+
+def worker(make_client, api, email, deadline, seed_value, samples, errors, lock):
+    rng = random.Random(seed_value)
+    client = make_client()
+    local_samples, local_errors = {}, {}
+    created = []
+
+    def call(route, method, path, body=None, headers=None):
+        start = time.perf_counter()
+        try:
+            status, data = client.request(method, path, body, headers)
+        except Exception:
+            status, data = 0, None
+        local_samples.setdefault(route, []).append(time.perf_counter() - start)
+        if status >= 400 or status == 0:
+            local_errors[route] = local_errors.get(route, 0) + 1
+        return status, data
+
+    status, data = call("login", "POST", f"{api}/login", {"email": email, "password": PASSWORD})
+    if status != 200:
+        return
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+    routes, weights = zip(*MIX)
+    counter = 0
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        if route == "login":
+            call("login", "POST", f"{api}/login", {"email": email, "password": PASSWORD})
+        elif route == "create-expense":
+            status, data = call("create-expense", "POST", f"{api}/create-expense", {
+                "title": f"{rng.choice(MERCHANTS)} load",
+                "amount": round(rng.uniform(1, 500), 2),
+                "category": rng.choice(CATEGORIES),
+                "description": "load test",
+            }, headers)
+            if status == 200 and data:
+                created.append(data["id"])
+        elif route == "filter-expense":
+            preset = PRESETS[counter % len(PRESETS)]
+            counter += 1
+            path = f"{api}/filter-expense?filter_category={preset}"
+            if preset == "custom":
+                end = datetime.utcnow() - timedelta(days=rng.randint(0, 60))
+                path += f"&from_date={(end - timedelta(days=14)).date().isoformat()}&to_date={end.date().isoformat()}"
+            call(f"filter-expense:{preset}", "GET", path, headers=headers)
+        elif created:
+            call("delete-expense", "DELETE", f"{api}/delete-expense", {"expense_id": created.pop()}, headers)
+
+    with lock:
+        for route, latencies in local_samples.items():
+            samples.setdefault(route, []).extend(latencies)
+        for route, count in local_errors.items():
+            errors[route] = errors.get(route, 0) + count
+
+
+def summarize(samples, errors, elapsed):
+    routes = {}
+    for route, latencies in sorted(samples.items()):
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": errors.get(route, 0),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+    every = [latency for latencies in samples.values() for latency in latencies]
+    total = {
+        "requests": len(every),
+        "errors": sum(errors.values()),
+        "rps": round(len(every) / elapsed, 2),
+        "p50_ms": round(percentile(every, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(every, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(every, 0.99) * 1000, 2),
+    }
+    return routes, total
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--target", default=None, help="base URL of a running server, defaults to in-process")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=1000, help="expenses seeded per user")
+    parser.add_argument("--days", type=int, default=120, help="seeded expenses are spread over this many days")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    from app import create_app
+
+    app = create_app()
+    api = "/api/v1"
+
+    seed_start = time.perf_counter()
+    emails = seed(app, args.users, args.expenses, args.days, args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+
+    if args.target:
+        make_client = lambda: HttpClient(args.target)
+    else:
+        make_client = lambda: InProcessClient(app)
+
+    samples, errors, lock = {}, {}, threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(make_client, api, emails[index % len(emails)], deadline, args.seed + index, samples, errors, lock)
+        )
+        for index in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    routes, total = summarize(samples, errors, elapsed)
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "target": args.target or "in-process",
+        "database": "sqlite" if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite") else "postgresql",
+        "config": {
+            "users": args.users,
+            "expenses_per_user": args.expenses,
+            "days": args.days,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "routes": routes,
+        "total": total,
+    }
+
+    print(f"{'route':32} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, stats in list(routes.items()) + [("total", total)]:
+        print(
+            f"{route:32} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>9.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
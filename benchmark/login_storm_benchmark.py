@@ -0,0 +1,77 @@
+"""Login p99 and expense p99 while a burst of logins hits the app.
+
+Usage: python benchmark/login_storm_benchmark.py [--workers 4] [--login-threads 16]
+       [--expense-threads 4] [--duration 10]
+
+--workers 0 hashes inline on the request thread, for comparison.
+"""
+import argparse
+import os
+import threading
+import time
+
+from common import setup_environment, make_expense, login, percentile
+
+setup_environment()
+
+
+def storm(app, duration, latencies, statuses, request):
+    client = app.test_client()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = request(client)
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=0)
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--expense-threads", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.max_pending)
+    from app import create_app
+
+    app = create_app()
+    seed = app.test_client()
+    seed_headers = login(seed, "seed@bench.local")
+    for index in range(200):
+        seed.post("/api/v1/create-expense", json=make_expense(index), headers=seed_headers)
+
+    def do_login(client):
+        return client.post("/api/v1/login", json={"email": "seed@bench.local", "password": "benchmark"})
+
+    def do_filter(client):
+        return client.get("/api/v1/filter-expense?filter_category=past_month", headers=seed_headers)
+
+    results = {"login": ([], {}), "filter-expense": ([], {})}
+    threads = [
+        threading.Thread(target=storm, args=(app, args.duration, *results["login"], do_login))
+        for _ in range(args.login_threads)
+    ] + [
+        threading.Thread(target=storm, args=(app, args.duration, *results["filter-expense"], do_filter))
+        for _ in range(args.expense_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"hash workers: {args.workers}, login threads: {args.login_threads}, expense threads: {args.expense_threads}")
+    for route, (latencies, statuses) in results.items():
+        print(
+            f"{route:15} requests: {len(latencies):6}  "
+            f"p50: {percentile(latencies, 0.50) * 1000:8.1f}ms  "
+            f"p99: {percentile(latencies, 0.99) * 1000:8.1f}ms  "
+            f"statuses: {dict(sorted(statuses.items()))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Float vs integer-cents totals: drift and aggregation time.
+
+Seeds --rows expenses in cents mode (both columns are written), then
+compares SUM over the Float column with SUM over amount_cents, and folds
+the fetched cents in Python and with NumPy int64 arrays.
+
+Usage: python benchmark/money_benchmark.py [--rows 200000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+from decimal import Decimal
+
+os.environ["MONEY_MODE"] = "cents"
+
+from common import setup_environment
+
+setup_environment()
+
+from app import create_app
+from extension import db
+from models.expense_model import ExpenseModel
+from models.user_model import UserModel
+from money import amount_columns, numpy
+from service.category_catalog import OTHERS
+
+
+def best(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    rng = random.Random(7)
+    amounts = [round(rng.uniform(0.01, 999.99), 2) for _ in range(args.rows)]
+    exact = sum(Decimal(str(amount)) for amount in amounts)
+
+    with app.app_context():
+        now = datetime.utcnow()
+        user = UserModel(username="money", email="money@bench.local", password="-", createdAt=now, updatedAt=now)
+        db.session.add(user)
+        db.session.flush()
+        for offset in range(0, args.rows, 5000):
+            db.session.execute(db.insert(ExpenseModel), [
+                {
+                    "title": "money", "amount": amount, "category_id": OTHERS, "description": "money",
+                    "user_id": user.id, "createdAt": now, "updatedAt": now, **amount_columns(amount, new=True),
+                }
+                for amount in amounts[offset:offset + 5000]
+            ])
+        db.session.commit()
+
+        float_sum, float_time = best(
+            lambda: db.session.execute(db.select(db.func.sum(ExpenseModel.amount))).scalar(), args.repeat
+        )
+        cents_sum, cents_time = best(
+            lambda: db.session.execute(db.select(db.func.sum(ExpenseModel.amount_cents))).scalar(), args.repeat
+        )
+        cents = db.session.execute(db.select(ExpenseModel.amount_cents)).scalars().all()
+        _, python_time = best(lambda: sum(cents), args.repeat)
+
+    print(f"rows: {args.rows}, exact total: {exact}")
+    print(f"SUM(amount)        {float_time * 1000:8.2f}ms  total {float_sum!r}  drift {Decimal(str(float_sum)) - exact}")
+    print(f"SUM(amount_cents)  {cents_time * 1000:8.2f}ms  total {Decimal(int(cents_sum)) / 100}  drift 0")
+    print(f"python sum(cents)  {python_time * 1000:8.2f}ms")
+    if numpy is not None:
+        array = numpy.asarray(cents, dtype=numpy.int64)
+        _, numpy_time = best(lambda: int(array.sum()), args.repeat)
+        print(f"numpy int64 sum    {numpy_time * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
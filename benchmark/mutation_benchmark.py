@@ -0,0 +1,60 @@
+"""Latency and SQL statements per request of /update-expense and /delete-expense.
+
+Usage: python benchmark/mutation_benchmark.py [--rows 1000]
+"""
+import argparse
+import re
+import time
+
+from common import setup_environment, make_expense, login, percentile
+
+setup_environment()
+
+from app import create_app
+
+
+def run(client, method, path, bodies, headers):
+    latencies, queries = [], 0
+    for body in bodies:
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        match = re.search(r'desc="(\d+) queries"', response.headers.get("Server-Timing", ""))
+        queries += int(match.group(1)) if match else 0
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return latencies, queries / max(len(bodies), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    headers = login(client, "mutate@bench.local")
+
+    ids = []
+    for offset in range(0, args.rows, 500):
+        expenses = [make_expense(index) for index in range(offset, min(offset + 500, args.rows))]
+        response = client.post("/api/v1/create-expenses", json={"expenses": expenses}, headers=headers)
+        ids.extend(result["data"]["id"] for result in response.get_json()["data"])
+
+    updates = [{"expense_id": expense_id, "amount": 12.5, "title": "updated"} for expense_id in ids]
+    deletes = [{"expense_id": expense_id} for expense_id in ids]
+    results = [
+        ("update-expense", run(client, "PUT", "/api/v1/update-expense", updates, headers)),
+        ("delete-expense", run(client, "DELETE", "/api/v1/delete-expense", deletes, headers)),
+    ]
+
+    print(f"rows: {args.rows}")
+    for name, (latencies, queries) in results:
+        print(
+            f"{name:16} mean {sum(latencies) / len(latencies) * 1000:6.2f}ms  "
+            f"p50 {percentile(latencies, 0.50) * 1000:6.2f}ms  p99 {percentile(latencies, 0.99) * 1000:6.2f}ms  "
+            f"{queries:.1f} statements/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
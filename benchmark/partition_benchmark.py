@@ -0,0 +1,89 @@
+"""Partition pruning and latency of the filter presets on PostgreSQL.
+
+Seeds --rows expenses spread over --months months into a fresh database,
+prints the partitions EXPLAIN keeps for past_week and past_month, and times
+each preset page. Run it once with and once without EXPENSE_PARTITIONING=monthly
+against an empty database to compare.
+
+Usage:
+    EXPENSE_PARTITIONING=monthly python benchmark/partition_benchmark.py \\
+        --database-url postgresql://localhost/expenses_bench --rows 1000000 --months 24
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import setup_environment, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="an empty PostgreSQL database")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    from app import create_app
+    from extension import db
+    from models.expense_model import ExpenseModel, PARTITIONED
+    from models.user_model import UserModel
+    from money import amount_columns
+    from service.category_catalog import OTHERS
+    from service.expense_service import ExpenseService, ExpenseFilter
+    from service.partition_service import ExpensePartitionService
+    from service.rollup_service import RollupService
+
+    app = create_app()
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    span = args.months * 30 * 86400
+
+    with app.app_context():
+        users = []
+        for index in range(args.users):
+            user = UserModel(username=f"part{index}", email=f"part{index}@bench.local", password="-",
+                             createdAt=now, updatedAt=now)
+            db.session.add(user)
+            users.append(user)
+        db.session.flush()
+        for offset in range(0, args.rows, 10_000):
+            rows = []
+            for _ in range(min(10_000, args.rows - offset)):
+                created_at = now - timedelta(seconds=rng.randint(0, span))
+                amount = round(rng.uniform(1, 500), 2)
+                rows.append({
+                    "title": "partition", "amount": amount, "category_id": OTHERS, "description": "partition",
+                    "user_id": rng.choice(users).id, "createdAt": created_at, "updatedAt": created_at,
+                    **amount_columns(amount, new=True),
+                })
+            db.session.execute(db.insert(ExpenseModel), rows)
+        db.session.commit()
+        if PARTITIONED:
+            ExpensePartitionService().ensure(since=now - timedelta(seconds=span))
+        RollupService().rebuild()
+        db.session.execute(db.text("ANALYZE expenses"))
+        db.session.commit()
+
+        print(f"rows: {args.rows} over {args.months} months, partitioned: {PARTITIONED}")
+        service = ExpenseService()
+        email = users[0].email
+        if PARTITIONED:
+            for preset, names in ExpensePartitionService().check_pruning(user_email=email).items():
+                print(f"{preset:12} scans {', '.join(names)}")
+
+        for preset in (ExpenseFilter.PAST_WEEK.value, ExpenseFilter.PAST_MONTH.value):
+            latencies = []
+            for index in range(args.requests):
+                start = time.perf_counter()
+                service.filter_expense(user_email=users[index % len(users)].email, expense_filter_category=preset)
+                latencies.append(time.perf_counter() - start)
+            print(f"{preset:12} p50 {percentile(latencies, 0.5) * 1000:7.2f}ms  "
+                  f"p95 {percentile(latencies, 0.95) * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Read-replica routing with two local SQLite files.
+
+The primary file is copied into the replica file with the SQLite backup API
+to stand in for replication. The script then shows where /filter-expense
+and /expense-summary reads run:
+- on the replica in steady state,
+- on the primary right after the user writes, within REPLICA_STICKY_SECONDS,
+- back on the replica, which is stale until the next copy, once the window
+  has passed.
+It finishes by timing a 20:1 read/write mix of two users.
+
+Usage: python benchmark/replica_benchmark.py [--expenses 800] [--sticky 1.0] [--requests 400]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from common import setup_environment, make_expense, login, percentile
+
+
+def replicate(primary: str, replica: str):
+    source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expenses", type=int, default=800, help="below the 1000 row page limit")
+    parser.add_argument("--sticky", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=400)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    primary, replica = os.path.join(directory, "primary.db"), os.path.join(directory, "replica.db")
+    setup_environment(f"sqlite:///{primary}")
+    os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{replica}"
+    os.environ["REPLICA_STICKY_SECONDS"] = str(args.sticky)
+
+    from app import create_app
+    from service.replica_router import replica_router
+
+    app = create_app()
+    client = app.test_client()
+    headers = login(client, "replica@bench.local")
+    for offset in range(0, args.expenses, 500):
+        expenses = [make_expense(index) for index in range(offset, min(offset + 500, args.expenses))]
+        client.post("/api/v1/create-expenses", json={"expenses": expenses}, headers=headers)
+    replicate(primary, replica)
+    time.sleep(args.sticky)
+
+    def count():
+        response = client.get("/api/v1/filter-expense?filter_category=past_week&limit=1000", headers=headers)
+        return response.get_json()["count"]
+
+    def reads():
+        return dict(replica_router.reads)
+
+    before = reads()
+    steady = count()
+    print(f"steady state     {steady} expenses, reads {reads()} (was {before})")
+
+    client.post("/api/v1/create-expense", json=make_expense(args.expenses), headers=headers)
+    before = reads()
+    fresh = count()
+    print(f"after a write    {fresh} expenses, reads {reads()} (was {before})  <- sticky to the primary")
+
+    time.sleep(args.sticky)
+    before = reads()
+    stale = count()
+    print(f"window passed    {stale} expenses, reads {reads()} (was {before})  <- replica, not yet replicated")
+    assert fresh == steady + 1 and stale == steady, "routing did not behave as expected"
+
+    # A second user writes, so the reader's requests are not kept on the primary.
+    writer = login(client, "writer@bench.local")
+    replicate(primary, replica)
+    latencies = {"read": [], "write": []}
+    for index in range(args.requests):
+        start = time.perf_counter()
+        if index % 21 == 20:
+            client.post("/api/v1/create-expense", json=make_expense(index), headers=writer)
+            latencies["write"].append(time.perf_counter() - start)
+        else:
+            client.get("/api/v1/filter-expense?filter_category=past_month&limit=100", headers=headers)
+            latencies["read"].append(time.perf_counter() - start)
+    for kind, samples in latencies.items():
+        print(f"{kind:6} {len(samples):5} requests  p50 {percentile(samples, 0.5) * 1000:7.2f}ms  "
+              f"p95 {percentile(samples, 0.95) * 1000:7.2f}ms")
+    print(f"reads by target: {reads()}")
+
+
+if __name__ == "__main__":
+    main()
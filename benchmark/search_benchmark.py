@@ -0,0 +1,99 @@
+"""/search-expenses latency against a LIKE scan over the same rows.
+
+Seeds --rows expenses for --users users (merchant titles and descriptions)
+through the normal insert path, so the search index is maintained as in
+production. It then times ranked index searches and, for comparison, the
+LIKE '%word%' query a client-side grep amounts to.
+
+Usage:
+    python benchmark/search_benchmark.py [--rows 200000] [--users 20] [--repeat 50]
+    python benchmark/search_benchmark.py --database-url postgresql://localhost/expenses_bench --rows 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import setup_environment, percentile
+
+MERCHANTS = [
+    "Amazon", "Walmart", "Target", "Netflix", "Spotify", "Uber", "Shell", "Starbucks",
+    "Whole Foods", "Apple Store", "Pharmacy", "Electric Co", "Lyft", "Costco", "IKEA",
+]
+WORDS = ["order", "refund", "subscription", "groceries", "ride", "fuel", "coffee", "charger", "rent", "gift"]
+QUERIES = ["amazon", "amaz", "uber ride", "coffee", "electric", "spotfy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    from app import create_app
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from models.user_model import UserModel
+    from money import amount_columns
+    from service.category_catalog import OTHERS
+    from service.search_service import ExpenseSearchService
+
+    app = create_app()
+    rng = random.Random(5)
+    now = datetime.utcnow()
+
+    with app.app_context():
+        ExpenseSearchService().install()
+        users = []
+        for index in range(args.users):
+            user = UserModel(username=f"search{index}", email=f"search{index}@bench.local", password="-",
+                             createdAt=now, updatedAt=now)
+            db.session.add(user)
+            users.append(user)
+        db.session.flush()
+        for offset in range(0, args.rows, 10_000):
+            rows = []
+            for _ in range(min(10_000, args.rows - offset)):
+                created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+                amount = round(rng.uniform(1, 500), 2)
+                rows.append({
+                    "title": f"{rng.choice(MERCHANTS)} {rng.choice(WORDS)}",
+                    "amount": amount, "category_id": OTHERS,
+                    "description": f"{rng.choice(WORDS)} {rng.choice(WORDS)} #{rng.randint(1, 99999)}",
+                    "user_id": rng.choice(users).id, "createdAt": created_at, "updatedAt": created_at,
+                    **amount_columns(amount, new=True),
+                })
+            db.session.execute(db.insert(ExpenseModel), rows)
+        db.session.commit()
+        if db.engine.dialect.name == "postgresql":
+            db.session.execute(db.text("ANALYZE expenses"))
+            db.session.commit()
+
+        service = ExpenseSearchService()
+        print(f"rows: {args.rows}, users: {args.users}, database: {db.engine.dialect.name}")
+        for query in QUERIES:
+            indexed, scanned, matches = [], [], 0
+            for index in range(args.repeat):
+                email = users[index % len(users)].email
+                start = time.perf_counter()
+                results, _ = service.search(user_email=email, query=query, limit=50)
+                indexed.append(time.perf_counter() - start)
+                matches += len(results)
+
+                start = time.perf_counter()
+                db.session.execute(db.select(ExpenseModel.id).where(
+                    ExpenseModel.user_id == users[index % len(users)].id,
+                    db.or_(ExpenseModel.title.ilike(f"%{query}%"), ExpenseModel.description.ilike(f"%{query}%"))
+                ).limit(50)).all()
+                scanned.append(time.perf_counter() - start)
+            print(f"{query!r:14} search p50 {percentile(indexed, 0.5) * 1000:7.2f}ms  "
+                  f"p95 {percentile(indexed, 0.95) * 1000:7.2f}ms  "
+                  f"LIKE scan p50 {percentile(scanned, 0.5) * 1000:7.2f}ms  "
+                  f"{matches / args.repeat:5.1f} results/search")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-row cost of building and serializing a filter-expense result.
+
+Compares loading ORM instances, calling to_dict() and serializing with the
+stdlib json module against the column projection in filter_expense
+serialized by json_provider.dumps (orjson when installed).
+
+Usage: python benchmark/serialization_benchmark.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+
+from common import setup_environment, make_expense, login
+
+setup_environment()
+
+from app import create_app
+from extension import db
+from json_provider import dumps, orjson
+from models.expense_model import ExpenseModel
+from service.expense_service import ExpenseService, MAX_PAGE_SIZE
+
+
+def orm_page(service, user_email, after):
+    user_id = service.resolve_user_id(user_email)
+    query = db.session.query(ExpenseModel).filter(ExpenseModel.user_id == user_id)
+    if after:
+        query = query.filter(db.tuple_(ExpenseModel.createdAt, ExpenseModel.id) < service.decode_cursor(after))
+    expenses = query.order_by(ExpenseModel.createdAt.desc(), ExpenseModel.id.desc()).limit(MAX_PAGE_SIZE).all()
+    body = json.dumps({"status": True, "data": [expense.to_dict() for expense in expenses]})
+    return len(expenses), body, service.encode_cursor(expenses[-1]) if expenses else None
+
+
+def projected_page(service, user_email, after, fields):
+    expenses, next_cursor = service.filter_expense(
+        user_email=user_email, expense_filter_category="last_three_month",
+        limit=MAX_PAGE_SIZE, after=after, fields=fields
+    )
+    body = dumps({"status": True, "data": expenses})
+    return len(expenses), body, next_cursor
+
+
+def run(app, page, repeat):
+    best = None
+    for _ in range(repeat):
+        with app.app_context():
+            db.session.expunge_all()
+            rows, after = 0, None
+            start = time.perf_counter()
+            while True:
+                count, _, after = page(after)
+                rows += count
+                if not after or count < MAX_PAGE_SIZE:
+                    break
+            elapsed = time.perf_counter() - start
+            db.session.remove()
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    email = "serialize@bench.local"
+    headers = login(client, email)
+    for offset in range(0, args.rows, 1000):
+        expenses = [make_expense(index) for index in range(offset, min(offset + 1000, args.rows))]
+        client.post("/api/v1/create-expenses", json={"expenses": expenses}, headers=headers)
+
+    service = ExpenseService()
+    results = [
+        ("orm + to_dict + json", run(app, lambda after: orm_page(service, email, after), args.repeat)),
+        ("projection + dumps", run(app, lambda after: projected_page(service, email, after, None), args.repeat)),
+        ("projection fields=id,amount", run(
+            app, lambda after: projected_page(service, email, after, "id,amount"), args.repeat
+        )),
+    ]
+
+    print(f"rows: {args.rows}, json backend: {'orjson' if orjson else 'stdlib'}")
+    baseline = results[0][1][1]
+    for name, (rows, elapsed) in results:
+        print(f"{name:30} {elapsed * 1e6 / max(rows, 1):7.2f} us/row  {baseline / elapsed:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Same load test against the threaded WSGI server and the ASGI server.
+
+Starts `flask run --with-threads` and then `uvicorn asgi:app` on one
+database, runs load_test.py against each and prints the totals side by
+side. Needs the packages in requirements-async.txt.
+
+Usage: python benchmark/serving_mode_benchmark.py [--concurrency 32] [--duration 15]
+       [--database-url postgresql://...] [--uvicorn-workers 1]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import setup_environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def run_mode(name, command, port, args, output_dir):
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        output = os.path.join(output_dir, f"{name}.json")
+        subprocess.run([
+            sys.executable, os.path.join(ROOT, "benchmark", "load_test.py"),
+            "--database-url", os.environ["DATABASE_URL"],
+            "--target", f"http://127.0.0.1:{port}",
+            "--users", str(args.users),
+            "--expenses", str(args.expenses),
+            "--concurrency", str(args.concurrency),
+            "--duration", str(args.duration),
+            "--output", output,
+        ], check=True, stdout=subprocess.DEVNULL)
+        with open(output) as report:
+            return json.load(report)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    output_dir = tempfile.mkdtemp()
+    modes = [
+        ("wsgi", [
+            sys.executable, "-m", "flask", "--app", "app:create_app()", "run",
+            "--port", str(args.port), "--with-threads", "--no-reload",
+        ]),
+        ("asgi", [
+            sys.executable, "-m", "uvicorn", "asgi:app",
+            "--port", str(args.port + 1), "--workers", str(args.uvicorn_workers), "--no-access-log",
+        ]),
+    ]
+
+    reports = {}
+    for offset, (name, command) in enumerate(modes):
+        reports[name] = run_mode(name, command, args.port + offset, args, output_dir)
+
+    print(f"{'mode':6} {'route':32} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, report in reports.items():
+        for route, stats in list(report["routes"].items()) + [("total", report["total"])]:
+            print(
+                f"{name:6} {route:32} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>9.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
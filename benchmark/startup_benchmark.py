@@ -0,0 +1,89 @@
+"""Cold start: import-to-first-request time of fresh processes.
+
+Each run starts a new interpreter that imports app, calls create_app and
+serves one /login request through the test client. It reports the
+medians of the import time, the create_app time, the first request time,
+the total time seen by the parent process, and the SQL statements issued
+before the first request. The database is initialized once up front, as
+`flask init-db` would do at deploy time.
+
+Usage:
+    python benchmark/startup_benchmark.py [--runs 15] [--database-url ...]
+    python benchmark/startup_benchmark.py --auto-create        # create_all on every start
+    python benchmark/startup_benchmark.py --repo /path/to/other/checkout
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import setup_environment
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+startup_statements = len(statements)
+response = flask_app.test_client().post(
+    "/api/v1/login", json={"email": "nobody@startup.local", "password": "startup"}
+)
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "startup_statements": startup_statements,
+    "status": response.status_code,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--auto-create", action="store_true", help="set AUTO_CREATE_TABLES=true in the children")
+    parser.add_argument("--repo", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="checkout whose app is started")
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    environment = dict(os.environ)
+    environment["PASSWORD_HASH_WORKERS"] = "0"
+    subprocess.run(
+        [sys.executable, "-c", "import sys; sys.path.insert(0, sys.argv[1]); import app; app.create_app()", args.repo],
+        env={**environment, "AUTO_CREATE_TABLES": "true"}, check=True
+    )
+    environment["AUTO_CREATE_TABLES"] = "true" if args.auto_create else "false"
+
+    runs = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, args.repo], env=environment, cwd=args.repo,
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["process_ms"] = (time.perf_counter() - start) * 1000
+        runs.append(result)
+
+    print(f"runs: {args.runs}, AUTO_CREATE_TABLES={environment['AUTO_CREATE_TABLES']}, repo: {args.repo}")
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "process_ms", "startup_statements"):
+        print(f"{key:20} median {statistics.median(run[key] for run in runs):9.2f}")
+    statuses = sorted({run["status"] for run in runs})
+    print(f"first request status: {', '.join(map(str, statuses))}")
+
+
+if __name__ == "__main__":
+    main()
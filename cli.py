@@ -0,0 +1,293 @@
+"""Flask CLI commands.
+
+Services are imported inside the commands, so serving processes never
+load the migration and partitioning code.
+"""
+from extension import db
+from models.expense_model import PARTITIONED
+import click
+import os
+
+
+def months_ahead_option(function):
+    return click.option(
+        "--months-ahead", default=None, type=int, help="Months after the current one to create partitions for."
+    )(function)
+
+
+def register_commands(app):
+    def resolve_months_ahead(months_ahead):
+        if months_ahead is None:
+            return int(app.config["EXPENSE_PARTITION_MONTHS_AHEAD"])
+        return months_ahead
+
+    @app.cli.command("init-db")
+    @months_ahead_option
+    def init_db(months_ahead):
+        """Create missing tables, and the coming partitions in partitioned mode. Safe to re-run."""
+        from service.account_deletion import AccountDeletion
+        from service.analytics_snapshot import expense_snapshot
+        from service.category_service import CategoryService
+        from service.import_service import ExpenseImportService
+        from service.search_service import ExpenseSearchService
+        from service.version_service import ExpenseVersionService
+
+        db.create_all()
+        click.echo("created missing tables")
+        CategoryService().install()
+        click.echo("seeded the built-in categories")
+        cascaded = AccountDeletion().install()
+        if cascaded:
+            click.echo(f"made user foreign keys ON DELETE CASCADE: {', '.join(cascaded)}")
+        ExpenseImportService().install()
+        click.echo("created the import deduplication index")
+        ExpenseVersionService().install()
+        click.echo("added the last write time to expense versions")
+        expense_snapshot.install()
+        click.echo("created the analytics refresh index")
+        try:
+            ExpenseSearchService().install()
+        except ExpenseSearchService.SearchException as e:
+            raise click.ClickException(str(e))
+        click.echo("created search indexes")
+        if PARTITIONED:
+            from service.partition_service import ExpensePartitionService
+
+            partitions = ExpensePartitionService()
+            try:
+                partitions.check_dialect()
+                if not partitions.is_partitioned():
+                    click.echo("expenses is not partitioned yet, run `flask partition-expenses` to convert it")
+                    return
+                created = partitions.ensure(months_ahead=resolve_months_ahead(months_ahead))
+            except ExpensePartitionService.PartitionException as e:
+                raise click.ClickException(str(e))
+            click.echo(f"created partitions: {', '.join(created) or 'none'}")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index():
+        """Re-index every expense for /search-expenses."""
+        from service.search_service import ExpenseSearchService
+
+        try:
+            ExpenseSearchService().rebuild()
+        except ExpenseSearchService.SearchException as e:
+            raise click.ClickException(str(e))
+        click.echo("rebuilt the search index")
+
+    @app.cli.command("import-expenses")
+    @click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+    @click.option("--email", required=True, help="User the expenses are imported for.")
+    @click.option("--format", "file_format", type=click.Choice(["csv", "ofx"]), default=None,
+                  help="Statement format; detected from the file when omitted.")
+    @click.option("--sign", type=click.Choice(["negative", "positive", "any"]), default="negative",
+                  help="Which amounts are expenses: negative ones (default), positive ones, or any.")
+    @click.option("--date-format", default=None, help="strptime format of the date column, e.g. %d/%m/%Y.")
+    def import_expenses(paths, email, file_format, sign, date_format):
+        """Import CSV or OFX bank statements, skipping lines imported before."""
+        from service.import_service import ExpenseImportService
+        from service.expense_service import ExpenseService
+
+        service = ExpenseImportService()
+        for path in paths:
+            try:
+                with open(path, "rb") as statement:
+                    report = service.import_file(
+                        user_email=email, stream=statement, filename=os.path.basename(path),
+                        file_format=file_format, sign=sign, date_format=date_format
+                    )
+            except (ExpenseImportService.ImportException, ExpenseService.ExpenseException) as e:
+                raise click.ClickException(f"{path}: {e}")
+            click.echo(
+                f"{path}: {report['rows']} rows, {report['inserted']} inserted, {report['duplicates']} duplicates, "
+                f"{report['rejected']} rejected in {report['seconds']}s"
+            )
+            for error in report["errors"]:
+                click.echo(f"  row {error['row']}: {error['error']}")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--email", default=None, help="Only rebuild the rollups of this user.")
+    def rebuild_rollups(email):
+        """Regenerate the daily rollups, and the budget totals derived from them, from expenses."""
+        from models.user_model import UserModel
+        from service.budget_service import BudgetService
+        from service.rollup_service import RollupService
+
+        user_id = None
+        if email:
+            user = UserModel.query.filter_by(email=email).first()
+            if not user:
+                raise click.ClickException("user not found")
+            user_id = user.id
+        rows = RollupService().rebuild(user_id=user_id)
+        totals = BudgetService().rebuild(user_id=user_id)
+        db.session.commit()
+        click.echo(f"rebuilt {rows} rollup rows and {totals} budget totals")
+
+    @app.cli.command("refresh-analytics-snapshot")
+    @click.option("--full", is_flag=True, help="Rebuild every month instead of applying the changes since the last refresh.")
+    def refresh_analytics_snapshot(full):
+        """Bring the columnar snapshot behind the admin reports up to date."""
+        from service.analytics_snapshot import expense_snapshot
+
+        try:
+            stats = expense_snapshot.refresh(full=full)
+        except expense_snapshot.SnapshotException as e:
+            raise click.ClickException(str(e))
+        click.echo(", ".join(f"{name} {value}" for name, value in stats.items()))
+
+    @app.cli.command("migrate-money")
+    @click.option("--batch-size", default=10_000, help="Expenses converted per transaction.")
+    def migrate_money(batch_size):
+        from service.money_migration import MoneyMigration
+
+        try:
+            result = MoneyMigration().run(batch_size=batch_size)
+        except MoneyMigration.MoneyMigrationException as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"added columns: {', '.join(result['added_columns']) or 'none'}, "
+            f"converted {result['migrated_rows']} expenses, rebuilt {result['rollup_rows']} rollup rows"
+        )
+
+    @app.cli.command("migrate-categories")
+    @click.option("--batch-size", default=10_000, help="Expenses converted per transaction.")
+    def migrate_categories(batch_size):
+        """Move expenses, rollups and budgets from category names to category ids."""
+        from service.category_migration import CategoryMigration
+
+        try:
+            result = CategoryMigration().run(batch_size=batch_size)
+        except CategoryMigration.CategoryMigrationException as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"{result['categories']} categories, converted {result['migrated_rows']} expenses"
+            f"{' and dropped the category text column' if result['dropped_column'] else ''}, "
+            f"carried over {result['budgets']} budgets, rebuilt {result['rollup_rows']} rollup rows"
+        )
+
+    @app.cli.command("create-category")
+    @click.argument("name")
+    @click.option("--alias", "aliases", multiple=True, help="Another name the category is recognised by; repeatable.")
+    def create_category(name, aliases):
+        """Add a custom expense category."""
+        from service.category_service import CategoryService
+
+        try:
+            category = CategoryService().create_category(name=name, aliases=list(aliases))
+        except CategoryService.CategoryException as e:
+            raise click.ClickException(str(e))
+        click.echo(f"created category {category['id']} {category['name']} ({', '.join(category['aliases'])})")
+
+    @app.cli.command("delete-user")
+    @click.option("--email", required=True, help="User whose account and expenses are deleted.")
+    def delete_user(email):
+        """Queue the chunked deletion of a user and all their data, and revoke their tokens."""
+        from service.job_service import JobService
+        from service.revocation_service import DatabaseRevocationStore, MemoryRevocationStore, token_blocklist
+
+        try:
+            token_blocklist.revoke_subject(email)
+            job = JobService().request_account_deletion(user_email=email)
+        except (JobService.JobException, DatabaseRevocationStore.RevocationException,
+                MemoryRevocationStore.RevocationStoreFull) as e:
+            raise click.ClickException(str(e))
+        click.echo(f"queued job {job['id']}; it runs on `flask run-jobs` or with JOB_POLL_INTERVAL set")
+
+    @app.cli.command("archive-expenses")
+    @click.option("--months", default=None, type=int, help="Archive expenses from before the month this many months back.")
+    @click.option("--before", default=None, help="Archive expenses created before this date (YYYY-MM-DD).")
+    def archive_expenses(months, before):
+        """Queue moving old expenses into the compressed expense_archives table."""
+        from service.job_service import JobService
+
+        if months is None and before is None:
+            months = int(app.config["RETENTION_MONTHS"])
+            if not months:
+                raise click.ClickException("pass --months or --before, or set RETENTION_MONTHS")
+        try:
+            job = JobService().request_retention(months=months, before=before)
+        except JobService.JobException as e:
+            raise click.ClickException(str(e))
+        click.echo(f"queued job {job['id']} archiving expenses created before {job['params']['before']}")
+
+    @app.cli.command("run-jobs")
+    @click.option("--wait", is_flag=True, help="Keep polling for new jobs instead of exiting when none is left.")
+    @click.option("--limit", default=None, type=int, help="Stop after this many jobs.")
+    def run_jobs(wait, limit):
+        """Run queued account deletion and retention jobs in this process."""
+        import time
+        from service.job_runner import job_runner
+
+        interval = float(app.config["JOB_POLL_INTERVAL"]) or 5.0
+        while True:
+            for job in job_runner.run_pending(limit=limit):
+                click.echo(
+                    f"{job['id']} {job['kind']} {job['state']}: {job['processed']} rows in {job['elapsed']}s"
+                    f" ({job['rows_per_second'] or 0} rows/s){' ' + job['error'] if job['error'] else ''}"
+                )
+            if not wait:
+                return
+            time.sleep(interval)
+
+    @app.cli.command("jobs")
+    @click.option("--state", default=None, type=click.Choice(["pending", "running", "done", "failed"]))
+    @click.option("--limit", default=20, help="Most recent jobs shown.")
+    def list_jobs(state, limit):
+        """Show background jobs with their progress and throughput."""
+        from service.job_service import JobService
+
+        for job in JobService().jobs(state=state, limit=limit):
+            progress = f"{job['processed']}/{job['total'] if job['total'] is not None else '?'}"
+            if job["percent"] is not None:
+                progress += f" ({job['percent']}%)"
+            click.echo(
+                f"{job['id']} {job['kind']:14} {job['state']:8} {progress}, {job['rows_per_second'] or 0} rows/s,"
+                f" created {job['createdAt']}"
+            )
+
+    @app.cli.command("partition-expenses")
+    @months_ahead_option
+    def partition_expenses(months_ahead):
+        from service.partition_service import ExpensePartitionService
+        from service.search_service import ExpenseSearchService
+
+        months_ahead = resolve_months_ahead(months_ahead)
+        partitions = ExpensePartitionService()
+        try:
+            moved = partitions.convert(months_ahead=months_ahead)
+            created = partitions.ensure(months_ahead=months_ahead)
+            # Converting replaces the table, and its search indexes with it.
+            ExpenseSearchService().install()
+        except (ExpensePartitionService.PartitionException, ExpenseSearchService.SearchException) as e:
+            raise click.ClickException(str(e))
+        if moved:
+            click.echo(f"moved {moved} expenses into the partitioned table")
+        click.echo(f"created partitions: {', '.join(created) or 'none'}")
+
+    @app.cli.command("detach-expense-partitions")
+    @click.option("--before", required=True, type=click.DateTime(formats=["%Y-%m", "%Y-%m-%d"]),
+                  help="Detach every month before this one.")
+    @click.option("--drop", is_flag=True, help="Drop the detached partitions instead of keeping archive tables.")
+    def detach_expense_partitions(before, drop):
+        from service.partition_service import ExpensePartitionService
+
+        try:
+            detached = ExpensePartitionService().detach(before=before.date(), drop=drop)
+        except ExpensePartitionService.PartitionException as e:
+            raise click.ClickException(str(e))
+        click.echo(f"{'dropped' if drop else 'archived'} partitions: {', '.join(detached) or 'none'}")
+
+    @app.cli.command("check-partition-pruning")
+    @click.option("--email", required=True, help="User whose filter queries are explained.")
+    @click.option("--max-partitions", default=2, help="Most partitions a preset may scan.")
+    def check_partition_pruning(email, max_partitions):
+        from service.expense_service import ExpenseService
+        from service.partition_service import ExpensePartitionService
+
+        try:
+            report = ExpensePartitionService().check_pruning(user_email=email, max_partitions=max_partitions)
+        except (ExpensePartitionService.PartitionException, ExpenseService.ExpenseException) as e:
+            raise click.ClickException(str(e))
+        for preset, names in report.items():
+            click.echo(f"{preset}: {', '.join(names)}")
@@ -0,0 +1,99 @@
+"""Environment configuration, loaded once per process.
+
+.env is read on the first import of this module. Settings the models and
+route prefixes need at import time are module constants; everything else
+is copied into app.config by create_app through app_config().
+"""
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+API_VERSION = os.getenv("CURRENT_API_VERSION", "/api/v1")
+MONEY_MODE = os.getenv("MONEY_MODE", "float").lower()
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "USD").upper()
+EXPENSE_PARTITIONING = os.getenv("EXPENSE_PARTITIONING", "none").lower()
+
+
+def enabled(value) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def engine_options(database_url: str) -> dict:
+    options = {}
+    if os.getenv("DB_POOL_SIZE"):
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE"))
+    if os.getenv("DB_MAX_OVERFLOW"):
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW"))
+    if os.getenv("DB_POOL_TIMEOUT"):
+        options["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT"))
+    if os.getenv("DB_POOL_RECYCLE"):
+        options["pool_recycle"] = int(os.getenv("DB_POOL_RECYCLE"))
+    if os.getenv("DB_POOL_PRE_PING"):
+        options["pool_pre_ping"] = enabled(os.getenv("DB_POOL_PRE_PING"))
+    if os.getenv("DB_STATEMENT_TIMEOUT_MS") and (database_url or "").startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS'))}"}
+    return options
+
+
+def replica_binds(replica_urls: str) -> dict:
+    urls = [url.strip() for url in (replica_urls or "").split(",") if url.strip()]
+    return {f"replica_{index}": url for index, url in enumerate(urls)}
+
+
+def app_config() -> dict:
+    database_url = os.getenv("DATABASE_URL")
+    return {
+        "PROPAGATE_EXCEPTIONS": True,
+        "API_TITLE": "Expense REST API",
+        "API_VERSION": "v1",
+        "OPENAPI_VERSION": "3.0.3",
+        "OPENAPI_URL_PREFIX": "/",
+        "OPENAPI_SWAGGER_UI_PATH": "/swagger-ui",
+        "OPENAPI_SWAGGER_UI_URL": "https://cdn.jsdelivr.net/npm/swagger-ui-dist/",
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options(database_url),
+        "SQLALCHEMY_BINDS": replica_binds(os.getenv("DATABASE_REPLICA_URLS")),
+        "AUTO_CREATE_TABLES": enabled(os.getenv("AUTO_CREATE_TABLES", "false")),
+        "QUERY_METRICS": enabled(os.getenv("QUERY_METRICS", "true")),
+        "METRICS_TOKEN": os.getenv("METRICS_TOKEN"),
+        "ADMIN_EMAIL": os.getenv("ADMIN_EMAIL"),
+        "REPLICA_STICKY_SECONDS": os.getenv("REPLICA_STICKY_SECONDS", 5),
+        "JWT_SECRET_KEY": os.getenv("JWT_SECRET"),
+        "REVOCATION_STORE": os.getenv("REVOCATION_STORE", "memory"),
+        "REVOCATION_CACHE_TTL": os.getenv("REVOCATION_CACHE_TTL", 5),
+        "REVOCATION_CACHE_SIZE": os.getenv("REVOCATION_CACHE_SIZE", 10_000),
+        "REVOCATION_MAX_ENTRIES": os.getenv("REVOCATION_MAX_ENTRIES", 100_000),
+        "USER_CACHE_TTL": os.getenv("USER_CACHE_TTL", 300),
+        "USER_CACHE_SIZE": os.getenv("USER_CACHE_SIZE", 10_000),
+        "CATEGORY_RELOAD_INTERVAL": os.getenv("CATEGORY_RELOAD_INTERVAL", 10),
+        "RESPONSE_CACHE_SIZE": os.getenv("RESPONSE_CACHE_SIZE", 0),
+        "RESPONSE_CACHE_TTL": os.getenv("RESPONSE_CACHE_TTL", 30),
+        "INGEST_QUEUE_SIZE": os.getenv("INGEST_QUEUE_SIZE", 0),
+        "INGEST_BATCH_SIZE": os.getenv("INGEST_BATCH_SIZE", 500),
+        "INGEST_FLUSH_INTERVAL": os.getenv("INGEST_FLUSH_INTERVAL", 0.5),
+        "INGEST_WAL_PATH": os.getenv("INGEST_WAL_PATH"),
+        "BUDGET_ALERT_THRESHOLDS": os.getenv("BUDGET_ALERT_THRESHOLDS", "80,100"),
+        "BUDGET_ALERT_QUEUE_SIZE": os.getenv("BUDGET_ALERT_QUEUE_SIZE", 1000),
+        "BUDGET_WEBHOOK_URL": os.getenv("BUDGET_WEBHOOK_URL"),
+        "BUDGET_WEBHOOK_TIMEOUT": os.getenv("BUDGET_WEBHOOK_TIMEOUT", 2),
+        "IMPORT_WORKERS": os.getenv("IMPORT_WORKERS", os.cpu_count() or 1),
+        "IMPORT_CHUNK_SIZE": os.getenv("IMPORT_CHUNK_SIZE", 2000),
+        "IMPORT_BATCH_SIZE": os.getenv("IMPORT_BATCH_SIZE", 5000),
+        "ANALYTICS_SNAPSHOT_DIR": os.getenv("ANALYTICS_SNAPSHOT_DIR", "analytics_snapshot"),
+        "ANALYTICS_WORKERS": os.getenv("ANALYTICS_WORKERS", os.cpu_count() or 1),
+        "ANALYTICS_REFRESH_INTERVAL": os.getenv("ANALYTICS_REFRESH_INTERVAL", 0),
+        "ANALYTICS_REFRESH_OVERLAP": os.getenv("ANALYTICS_REFRESH_OVERLAP", 300),
+        "JOB_POLL_INTERVAL": os.getenv("JOB_POLL_INTERVAL", 0),
+        "JOB_BATCH_SIZE": os.getenv("JOB_BATCH_SIZE", 1000),
+        "JOB_BATCH_PAUSE": os.getenv("JOB_BATCH_PAUSE", 0.1),
+        "JOB_LEASE_SECONDS": os.getenv("JOB_LEASE_SECONDS", 60),
+        "JOB_LOCK_TIMEOUT_MS": os.getenv("JOB_LOCK_TIMEOUT_MS", 1000),
+        "RETENTION_MONTHS": os.getenv("RETENTION_MONTHS", 0),
+        "EXPENSE_PARTITION_MONTHS_AHEAD": os.getenv("EXPENSE_PARTITION_MONTHS_AHEAD", 3),
+        "PASSWORD_HASH_METHOD": os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+        "PASSWORD_HASH_WORKERS": os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1),
+        "PASSWORD_HASH_MAX_PENDING": os.getenv("PASSWORD_HASH_MAX_PENDING", 0),
+        "PASSWORD_HASH_TIMEOUT": os.getenv("PASSWORD_HASH_TIMEOUT", 10),
+    }
@@ -0,0 +1,23 @@
+from extension import db
+from models.expense_rollup_model import AMOUNT_TYPE
+from datetime import datetime
+
+
+class BudgetModel(db.Model):
+    __tablename__ = "budgets"
+
+    user_id = db.Column(db.String(255), db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey("categories.id"), primary_key=True, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class BudgetMonthTotalModel(db.Model):
+    """Month-to-date spend of a budgeted category, moved by every expense write."""
+    __tablename__ = "budget_month_totals"
+
+    user_id = db.Column(db.String(255), db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    month = db.Column(db.Date, primary_key=True, nullable=False)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey("categories.id"), primary_key=True, nullable=False)
+    total = db.Column(AMOUNT_TYPE, nullable=False, default=0)
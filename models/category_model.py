@@ -0,0 +1,23 @@
+from extension import db
+from datetime import datetime
+
+
+class CategoryModel(db.Model):
+    """One expense category; expenses, rollups and budgets refer to it by its SMALLINT id.
+
+    Ids are assigned by CategoryCatalog, the built-in ones are fixed.
+    """
+    __tablename__ = "categories"
+
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(64), nullable=False, unique=True)
+    builtin = db.Column(db.Boolean, nullable=False, default=False)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class CategoryAliasModel(db.Model):
+    """Normalized spellings a category is recognised by; every category has its own name as one."""
+    __tablename__ = "category_aliases"
+
+    alias = db.Column(db.String(64), primary_key=True, nullable=False)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey("categories.id"), nullable=False)
@@ -0,0 +1,39 @@
+from extension import db
+from json_provider import loads
+from datetime import datetime
+import zlib
+
+
+class ExpenseArchiveModel(db.Model):
+    """A batch of one user's expenses moved out of expenses by the retention job.
+
+    payload is the zlib-compressed JSON array of the rows as they were
+    stored, category ids and cents included.
+    """
+    __tablename__ = "expense_archives"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.String(255), db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    first_created = db.Column(db.DateTime, nullable=False)
+    last_created = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_expense_archives_user_id_first_created", user_id, first_created),
+    )
+
+    def expenses(self) -> list:
+        return loads(zlib.decompress(self.payload))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "first_created": self.first_created.isoformat(),
+            "last_created": self.last_created.isoformat(),
+            "count": self.count,
+            "compressed_bytes": len(self.payload),
+            "createdAt": self.createdAt.isoformat(),
+        }
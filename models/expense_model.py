@@ -1,15 +1,29 @@
 from extension import db
+from money import MINOR_UNITS, DEFAULT_CURRENCY, from_minor
+from config import EXPENSE_PARTITIONING
+from service.category_catalog import category_catalog
 import uuid
 from datetime import datetime
 
+# EXPENSE_PARTITIONING=monthly range-partitions expenses by month of createdAt
+# on PostgreSQL; partitions are managed by ExpensePartitionService.
+if EXPENSE_PARTITIONING not in ("none", "monthly"):
+    raise ValueError(f"unknown EXPENSE_PARTITIONING {EXPENSE_PARTITIONING!r}, use none or monthly")
+PARTITIONED = EXPENSE_PARTITIONING == "monthly"
+
 class ExpenseModel(db.Model):
     __tablename__ = "expenses"
-    id = db.Column(db.String(255), nullable = False, primary_key = True, default = lambda: str(uuid.uuid4()))
+    id = db.Column(db.String(255), nullable = False, primary_key = not PARTITIONED, default = lambda: str(uuid.uuid4()))
     title = db.Column(db.String(255), nullable = False)
     amount = db.Column(db.Float, nullable = False)
-    category = db.Column(db.String(255), nullable = False)
+    if MINOR_UNITS:
+        amount_cents = db.Column(db.BigInteger)
+        currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey("categories.id"), nullable = False)
     description = db.Column(db.String(255))
-    user_id = db.Column(db.String(255), db.ForeignKey("users.id"), nullable=False)
+    # Set by statement imports only; see ExpenseImportService.
+    content_hash = db.Column(db.String(32))
+    user_id = db.Column(db.String(255), db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     user = db.relationship("UserModel", back_populates="expenses")
     createdAt = db.Column(
         db.DateTime,
@@ -23,14 +37,43 @@ class ExpenseModel(db.Model):
         nullable=False
     )
 
+    __table_args__ = (
+        db.Index("ix_expenses_user_id_createdAt_id", user_id, createdAt.desc(), id),
+        # Rows changed since the last analytics snapshot refresh.
+        db.Index("ix_expenses_updatedAt", updatedAt),
+        # Postgres only accepts unique indexes on a partitioned table that
+        # include the partition key; imported rows are stamped with their
+        # statement date, which is part of the hash anyway.
+        db.Index(
+            "ux_expenses_content_hash", *((content_hash, createdAt) if PARTITIONED else (content_hash,)), unique=True
+        ),
+    )
+    if PARTITIONED:
+        # Postgres only accepts unique constraints that include the partition
+        # key; the mapper still identifies expenses by id alone.
+        __table_args__ += (
+            db.PrimaryKeyConstraint(id, createdAt),
+            {"postgresql_partition_by": 'RANGE ("createdAt")'},
+        )
+        __mapper_args__ = {"primary_key": [id]}
+
     def to_dict(self):
-        return {
+        expense = {
             "id": self.id,
             "title": self.title,
             "amount": self.amount,
-            "category": self.category,
+            "category": category_catalog.name(self.category_id),
             "description": self.description,
             "user_id": self.user_id,
             "createdAt": self.createdAt.isoformat(),
             "updatedAt": self.updatedAt.isoformat(),
         }
+        if MINOR_UNITS:
+            if self.amount_cents is not None:
+                expense["amount"] = from_minor(self.amount_cents)
+            expense["currency"] = self.currency
+        return expense
+
+
+# The column sums, minimums and maximums are computed on.
+STORED_AMOUNT = ExpenseModel.amount_cents if MINOR_UNITS else ExpenseModel.amount
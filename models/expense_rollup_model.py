@@ -0,0 +1,28 @@
+from extension import db
+from money import MINOR_UNITS
+
+# Whole cents in cents mode, the Float amount otherwise.
+AMOUNT_TYPE = db.BigInteger if MINOR_UNITS else db.Float
+
+
+class ExpenseDailyRollupModel(db.Model):
+    __tablename__ = "expense_daily_rollups"
+
+    user_id = db.Column(db.String(255), db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    day = db.Column(db.Date, primary_key=True, nullable=False)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey("categories.id"), primary_key=True, nullable=False)
+    total_amount = db.Column(AMOUNT_TYPE, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    min_amount = db.Column(AMOUNT_TYPE, nullable=False)
+    max_amount = db.Column(AMOUNT_TYPE, nullable=False)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "day": self.day.isoformat(),
+            "category_id": self.category_id,
+            "total_amount": self.total_amount,
+            "count": self.count,
+            "min_amount": self.min_amount,
+            "max_amount": self.max_amount,
+        }
@@ -0,0 +1,10 @@
+from extension import db
+
+
+class ExpenseVersionModel(db.Model):
+    __tablename__ = "expense_versions"
+
+    user_id = db.Column(db.String(255), db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Last write of any process, read by replica_router to keep the user's reads on the primary.
+    writtenAt = db.Column(db.DateTime)
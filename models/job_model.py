@@ -0,0 +1,49 @@
+from extension import db
+from datetime import datetime
+import uuid
+
+
+class JobModel(db.Model):
+    """A background job and how far it got; see JobRunner.
+
+    cursor is where the next chunk starts, written in the same transaction
+    as the chunk itself, so a job resumes exactly where it stopped.
+    """
+    __tablename__ = "jobs"
+
+    id = db.Column(db.String(36), primary_key=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(32), nullable=False)
+    # pending, running, done or failed
+    state = db.Column(db.String(16), nullable=False, default="pending")
+    params = db.Column(db.JSON, nullable=False)
+    cursor = db.Column(db.JSON)
+    processed = db.Column(db.BigInteger, nullable=False, default=0)
+    total = db.Column(db.BigInteger)
+    # Seconds the job has been worked on, pauses between chunks included.
+    elapsed = db.Column(db.Float, nullable=False, default=0)
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(255))
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_jobs_state_createdAt", state, createdAt),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "params": self.params,
+            "processed": self.processed,
+            "total": self.total,
+            "percent": round(min(self.processed / self.total, 1) * 100, 1) if self.total else None,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.processed / self.elapsed, 1) if self.elapsed else None,
+            "error": self.error,
+            "createdAt": self.createdAt.isoformat() if self.createdAt else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,29 @@
+from extension import db
+from datetime import datetime
+
+
+class RevokedTokenModel(db.Model):
+    __tablename__ = "revoked_tokens"
+
+    jti = db.Column(db.String(36), primary_key=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    createdAt = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+
+class RevokedSubjectModel(db.Model):
+    """Every token of a subject (the email a token is issued to) issued before issued_before is revoked."""
+    __tablename__ = "revoked_subjects"
+
+    subject = db.Column(db.String(255), primary_key=True, nullable=False)
+    issued_before = db.Column(db.DateTime, nullable=False)
+    # Once every token issued before issued_before has expired.
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    createdAt = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
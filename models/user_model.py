@@ -15,7 +15,10 @@ class UserModel(db.Model):
     username = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(255), nullable=False, unique=True)
     password = db.Column(db.String(255), nullable=False)
-    expenses = db.relationship("ExpenseModel", back_populates="user", cascade="all, delete-orphan")
+    # Expenses and every other per-user row go with the user through ON DELETE
+    # CASCADE, so deleting a user never loads their expenses into the session.
+    # Large accounts are deleted in chunks by the account deletion job.
+    expenses = db.relationship("ExpenseModel", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
     createdAt = db.Column(
         db.DateTime,
@@ -0,0 +1,100 @@
+"""How expense amounts are stored.
+
+MONEY_MODE=float (default) keeps amounts in the Float column only.
+MONEY_MODE=cents adds an integer minor-unit column and a currency column,
+and every sum, minimum and maximum is computed on the integers. Existing
+databases are converted with `flask migrate-money`.
+"""
+from config import MONEY_MODE, DEFAULT_CURRENCY
+from decimal import Decimal, ROUND_HALF_UP
+
+if MONEY_MODE not in ("float", "cents"):
+    raise ValueError(f"unknown MONEY_MODE {MONEY_MODE!r}, use float or cents")
+
+MINOR_UNITS = MONEY_MODE == "cents"
+
+# NumPy only folds cents; float mode does not pay for importing it.
+numpy = None
+if MINOR_UNITS:
+    try:
+        import numpy
+    except ImportError:
+        pass
+CENT = Decimal("0.01")
+
+
+def to_minor(amount) -> int:
+    """Amount in whole cents, rounding half up from its decimal representation."""
+    return int(Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_minor(cents) -> float:
+    return int(cents) / 100
+
+
+def to_stored(amount):
+    return to_minor(amount) if MINOR_UNITS else float(amount)
+
+
+def from_stored(value):
+    if value is None:
+        return None
+    return from_minor(value) if MINOR_UNITS else value
+
+
+def amount_columns(amount, new: bool = False) -> dict:
+    """Extra column values to write alongside amount in cents mode."""
+    if not MINOR_UNITS:
+        return {}
+    columns = {"amount_cents": to_minor(amount)}
+    if new:
+        columns["currency"] = DEFAULT_CURRENCY
+    return columns
+
+
+def present(row: dict) -> dict:
+    """Row as the API returns it: amount from the cents column, when there is one."""
+    if row is None or "amount_cents" not in row:
+        return row
+    row = dict(row)
+    cents = row.pop("amount_cents")
+    if cents is not None:
+        row["amount"] = from_minor(cents)
+    return row
+
+
+def fold(keys: list, totals: list, counts: list, minimums: list, maximums: list) -> dict:
+    """Group rows by key into (total, count, minimum, maximum).
+
+    In cents mode the rows are folded as NumPy int64 arrays when NumPy is
+    installed, and as Python ints otherwise; both are exact.
+    """
+    if MINOR_UNITS:
+        totals, minimums, maximums = ([int(value) for value in column] for column in (totals, minimums, maximums))
+
+    if MINOR_UNITS and numpy is not None and keys:
+        index = {}
+        codes = numpy.fromiter(
+            (index.setdefault(key, len(index)) for key in keys), dtype=numpy.int64, count=len(keys)
+        )
+        total = numpy.zeros(len(index), dtype=numpy.int64)
+        count = numpy.zeros(len(index), dtype=numpy.int64)
+        minimum = numpy.full(len(index), numpy.iinfo(numpy.int64).max, dtype=numpy.int64)
+        maximum = numpy.full(len(index), numpy.iinfo(numpy.int64).min, dtype=numpy.int64)
+        numpy.add.at(total, codes, numpy.asarray(totals, dtype=numpy.int64))
+        numpy.add.at(count, codes, numpy.asarray(counts, dtype=numpy.int64))
+        numpy.minimum.at(minimum, codes, numpy.asarray(minimums, dtype=numpy.int64))
+        numpy.maximum.at(maximum, codes, numpy.asarray(maximums, dtype=numpy.int64))
+        return {
+            key: (int(total[code]), int(count[code]), int(minimum[code]), int(maximum[code]))
+            for key, code in index.items()
+        }
+
+    folded = {}
+    for key, total, count, minimum, maximum in zip(keys, totals, counts, minimums, maximums):
+        cell = folded.get(key)
+        if cell is None:
+            folded[key] = (total, count, minimum, maximum)
+        else:
+            folded[key] = (cell[0] + total, cell[1] + count, min(cell[2], minimum), max(cell[3], maximum))
+    return folded
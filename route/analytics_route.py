@@ -0,0 +1,83 @@
+from flask_smorest import Blueprint
+from flask_jwt_extended import jwt_required, get_jwt
+from flask import request, jsonify
+from service.analytics_service import AnalyticsService
+from config import API_VERSION
+import functools
+
+analytics_service = AnalyticsService()
+
+api_version = API_VERSION
+
+analytics_blp = Blueprint("Analytics", __name__, description="Admin Analytics")
+
+
+def admin_required(handler):
+    """A fresh token carrying the is_admin claim, which only ADMIN_EMAIL's tokens have."""
+    @functools.wraps(handler)
+    @jwt_required(fresh=True)
+    def wrapper(*args, **kwargs):
+        if not get_jwt().get("is_admin"):
+            return jsonify({
+                "status" : False,
+                "error" : "admin privileges required"
+            }), 403
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+def report_status(error: Exception) -> int:
+    if isinstance(error, AnalyticsService.SnapshotMissing):
+        return 503
+    if isinstance(error, AnalyticsService.AnalyticsException):
+        return 400
+    return 500
+
+
+def run_report(report, **arguments):
+    try:
+        return jsonify({"status": True, "data": report(**arguments)}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), report_status(e)
+
+
+@analytics_blp.route(f"{api_version}/admin/category-distribution", methods = ["GET"])
+@admin_required
+def category_distribution():
+    return run_report(
+        analytics_service.category_distribution,
+        from_month=request.args.get("from_month"),
+        to_month=request.args.get("to_month")
+    )
+
+
+@analytics_blp.route(f"{api_version}/admin/top-spenders", methods = ["GET"])
+@admin_required
+def top_spenders():
+    return run_report(
+        analytics_service.top_spenders,
+        from_month=request.args.get("from_month"),
+        to_month=request.args.get("to_month"),
+        category=request.args.get("category"),
+        limit=request.args.get("limit", 10, type=int)
+    )
+
+
+@analytics_blp.route(f"{api_version}/admin/monthly-growth", methods = ["GET"])
+@admin_required
+def monthly_growth():
+    return run_report(
+        analytics_service.monthly_growth,
+        from_month=request.args.get("from_month"),
+        to_month=request.args.get("to_month"),
+        category=request.args.get("category")
+    )
+
+
+@analytics_blp.route(f"{api_version}/admin/analytics-snapshot", methods = ["GET"])
+@admin_required
+def analytics_snapshot():
+    return run_report(analytics_service.status)
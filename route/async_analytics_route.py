@@ -0,0 +1,70 @@
+from starlette.routing import Route
+from route.async_auth_route import JSONResponse, jwt_required
+from route.async_expense_route import error_response, query_int
+from route.analytics_route import analytics_service, report_status
+from config import API_VERSION
+import asyncio
+import functools
+
+api_version = API_VERSION
+
+
+def admin_required(handler):
+    @functools.wraps(handler)
+    @jwt_required(fresh=True)
+    async def wrapper(request):
+        if not request.state.jwt.get("is_admin"):
+            return error_response("admin privileges required", 403)
+        return await handler(request)
+    return wrapper
+
+
+async def run_report(report, **arguments):
+    # Reports are NumPy work on the snapshot, kept off the event loop.
+    try:
+        return JSONResponse({"status": True, "data": await asyncio.to_thread(report, **arguments)}, status_code=200)
+    except Exception as e:
+        return error_response(e, report_status(e))
+
+
+@admin_required
+async def category_distribution(request):
+    return await run_report(
+        analytics_service.category_distribution,
+        from_month=request.query_params.get("from_month"),
+        to_month=request.query_params.get("to_month")
+    )
+
+
+@admin_required
+async def top_spenders(request):
+    return await run_report(
+        analytics_service.top_spenders,
+        from_month=request.query_params.get("from_month"),
+        to_month=request.query_params.get("to_month"),
+        category=request.query_params.get("category"),
+        limit=query_int(request, "limit")
+    )
+
+
+@admin_required
+async def monthly_growth(request):
+    return await run_report(
+        analytics_service.monthly_growth,
+        from_month=request.query_params.get("from_month"),
+        to_month=request.query_params.get("to_month"),
+        category=request.query_params.get("category")
+    )
+
+
+@admin_required
+async def analytics_snapshot(request):
+    return await run_report(analytics_service.status)
+
+
+analytics_routes = [
+    Route(f"{api_version}/admin/category-distribution", category_distribution, methods=["GET"]),
+    Route(f"{api_version}/admin/top-spenders", top_spenders, methods=["GET"]),
+    Route(f"{api_version}/admin/monthly-growth", monthly_growth, methods=["GET"]),
+    Route(f"{api_version}/admin/analytics-snapshot", analytics_snapshot, methods=["GET"]),
+]
@@ -0,0 +1,131 @@
+from starlette.routing import Route
+from starlette.responses import JSONResponse as StarletteJSONResponse
+from service.password_hasher import password_hasher
+from service.job_service import JobService
+from service.revocation_service import MemoryRevocationStore
+from json_provider import dumps
+from config import API_VERSION
+import functools
+
+api_version = API_VERSION
+
+JWT_ERROR_MESSAGE_KEYS = {
+    "token_expired": "message",
+    "invalid_token": "message",
+    "fresh_token_required": "description",
+    "authorization_required": "description",
+}
+
+
+class JSONResponse(StarletteJSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+async def read_json(request) -> dict:
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+def jwt_required(fresh: bool = False, refresh: bool = False):
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            tokens = request.app.state.token_service
+            try:
+                payload = tokens.decode_header(request.headers.get("Authorization"), refresh=refresh, fresh=fresh)
+            except tokens.TokenException as e:
+                return JSONResponse({JWT_ERROR_MESSAGE_KEYS[e.error]: str(e), "error": e.error}, status_code=401)
+
+            if await request.app.state.token_blocklist.is_revoked(payload):
+                return JSONResponse(
+                    {"description": "The token has been revoked.", "error": "token_revoked"},
+                    status_code=401
+                )
+            request.state.jwt = payload
+            return await handler(request)
+        return wrapper
+    return decorator
+
+
+@jwt_required(refresh=True)
+async def refresh_token(request):
+    current_user = request.state.jwt["sub"]
+    try:
+        await request.app.state.token_blocklist.revoke(request.state.jwt)
+    except MemoryRevocationStore.RevocationStoreFull as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=503)
+    new_token = request.app.state.token_service.create_access_token(identity=current_user, fresh=False)
+    return JSONResponse({"access_token": new_token}, status_code=200)
+
+
+async def login(request):
+    user_data = await read_json(request)
+    password = user_data.get("password")
+    email = user_data.get("email")
+
+    if not email:
+        return JSONResponse({"status": False, "error": "email not found"}, status_code=400)
+    if not password:
+        return JSONResponse({"status": False, "error": "password not found"}, status_code=400)
+
+    tokens = request.app.state.token_service
+    try:
+        result = await request.app.state.auth_service.login_user(password=password, email=email)
+        return JSONResponse({
+            "status": True,
+            "data": result.to_dict(),
+            "access_token": tokens.create_access_token(identity=str(result.email), fresh=True),
+            "refresh_token": tokens.create_refresh_token(result.email)
+        }, status_code=200)
+    except password_hasher.PasswordHasherBusy as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=400)
+
+
+async def signup(request):
+    user_data = await read_json(request)
+
+    username = user_data.get("username")
+    password = user_data.get("password")
+    email = user_data.get("email")
+
+    if not username:
+        return JSONResponse({"status": False, "error": "username not found"}, status_code=400)
+    if not password:
+        return JSONResponse({"status": False, "error": "password not found"}, status_code=400)
+    if not email:
+        return JSONResponse({"status": False, "error": "email not found"}, status_code=400)
+
+    try:
+        result = await request.app.state.auth_service.create_user(username=username, email=email, password=password)
+        return JSONResponse({"status": True, "data": result.to_dict()}, status_code=201)
+    except password_hasher.PasswordHasherBusy as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=400)
+
+
+@jwt_required(fresh=True)
+async def delete_account(request):
+    try:
+        await request.app.state.token_blocklist.revoke_subject(request.state.jwt["sub"])
+        job = await request.app.state.expense_service.request_account_deletion(user_email=request.state.jwt["sub"])
+        return JSONResponse({"status": True, "data": job}, status_code=202)
+    except MemoryRevocationStore.RevocationStoreFull as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=503)
+    except JobService.JobException as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"status": False, "error": str(e)}, status_code=500)
+
+
+auth_routes = [
+    Route(f"{api_version}/refresh-token", refresh_token, methods=["POST"]),
+    Route(f"{api_version}/login", login, methods=["POST"]),
+    Route(f"{api_version}/signup", signup, methods=["POST"]),
+    Route(f"{api_version}/account", delete_account, methods=["DELETE"]),
+]
@@ -0,0 +1,67 @@
+from starlette.routing import Route
+from route.async_auth_route import JSONResponse, jwt_required, read_json
+from route.async_expense_route import error_response
+from config import API_VERSION
+
+api_version = API_VERSION
+
+
+@jwt_required(fresh=True)
+async def set_budget(request):
+    budget_data = await read_json(request)
+    if not budget_data.get("category"):
+        return error_response("Category is missing", 400)
+    if budget_data.get("amount") is None:
+        return error_response("amount is missing", 400)
+    try:
+        budget = await request.app.state.expense_service.set_budget(
+            user_email=request.state.jwt["sub"],
+            category=budget_data.get("category"),
+            amount=budget_data.get("amount")
+        )
+        return JSONResponse({"status": True, "data": budget}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def delete_budget(request):
+    category = (await read_json(request)).get("category")
+    if not category:
+        return error_response("Category is missing", 400)
+    try:
+        if not await request.app.state.expense_service.delete_budget(
+            user_email=request.state.jwt["sub"], category=category
+        ):
+            return error_response("no budget is set for this category", 404)
+        return JSONResponse({"status": True}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def budgets(request):
+    try:
+        data = await request.app.state.expense_service.budgets(
+            user_email=request.state.jwt["sub"], month=request.query_params.get("month")
+        )
+        return JSONResponse({"status": True, "data": data, "count": len(data)}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def budget_alerts(request):
+    try:
+        data = await request.app.state.expense_service.budget_alerts(user_email=request.state.jwt["sub"])
+        return JSONResponse({"status": True, "data": data, "count": len(data)}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+budget_routes = [
+    Route(f"{api_version}/set-budget", set_budget, methods=["PUT"]),
+    Route(f"{api_version}/delete-budget", delete_budget, methods=["DELETE"]),
+    Route(f"{api_version}/budgets", budgets, methods=["GET"]),
+    Route(f"{api_version}/budget-alerts", budget_alerts, methods=["GET"]),
+]
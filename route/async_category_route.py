@@ -0,0 +1,39 @@
+from starlette.routing import Route
+from route.async_auth_route import JSONResponse, jwt_required, read_json
+from route.async_expense_route import error_response
+from route.async_analytics_route import admin_required
+from service.category_service import CategoryService
+from config import API_VERSION
+
+api_version = API_VERSION
+
+
+@jwt_required(fresh=True)
+async def categories(request):
+    try:
+        data = await request.app.state.expense_service.categories()
+        return JSONResponse({"status": True, "data": data, "count": len(data)}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@admin_required
+async def create_category(request):
+    category_data = await read_json(request)
+    if not category_data.get("name"):
+        return error_response("name is missing", 400)
+    try:
+        category = await request.app.state.expense_service.create_category(
+            name=category_data.get("name"), aliases=category_data.get("aliases")
+        )
+        return JSONResponse({"status": True, "data": category}, status_code=201)
+    except CategoryService.CategoryException as e:
+        return error_response(e, 400)
+    except Exception as e:
+        return error_response(e)
+
+
+category_routes = [
+    Route(f"{api_version}/categories", categories, methods=["GET"]),
+    Route(f"{api_version}/categories", create_category, methods=["POST"]),
+]
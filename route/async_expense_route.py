@@ -0,0 +1,340 @@
+from starlette.routing import Route
+from starlette.responses import Response, StreamingResponse
+from route.async_auth_route import JSONResponse, jwt_required, read_json
+from route.expense_route import EXPORT_FIELDS, import_reports
+from json_provider import dumps
+from service.expense_service import ExpenseService
+from service.search_service import ExpenseSearchService
+from service.response_cache import response_cache
+from service.ingestion_queue import ingestion_queue
+from config import API_VERSION
+import asyncio
+import csv
+import io
+import tempfile
+
+api_version = API_VERSION
+
+
+def error_response(error, status_code: int = 500):
+    return JSONResponse({"status": False, "error": str(error)}, status_code=status_code)
+
+
+def query_int(request, name: str):
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+@jwt_required(fresh=True)
+async def filter_expense(request):
+    service = request.app.state.expense_service
+    arguments = dict(
+        user_email=request.state.jwt["sub"],
+        expense_filter_category=request.query_params.get("filter_category"),
+        from_date=request.query_params.get("from_date"),
+        to_date=request.query_params.get("to_date"),
+        limit=query_int(request, "limit"),
+        after=request.query_params.get("after"),
+        fields=request.query_params.get("fields")
+    )
+    try:
+        etag = await service.filter_etag(**arguments)
+        headers = {"ETag": f'"{etag}"'}
+        if_none_match = [tag.strip().removeprefix("W/") for tag in request.headers.get("If-None-Match", "").split(",")]
+        if "*" in if_none_match or f'"{etag}"' in if_none_match:
+            return Response(status_code=304, headers=headers)
+
+        body = response_cache.get(etag)
+        if body is None:
+            expenses, next_cursor = await service.filter_expense(**arguments)
+            body = dumps({
+                "status": True,
+                "data": expenses,
+                "count": len(expenses),
+                "next_cursor": next_cursor
+            })
+            response_cache.set(etag, body)
+        return Response(body, status_code=200, media_type="application/json", headers=headers)
+    except ExpenseService.InvalidQuery as e:
+        return error_response(e, 400)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def search_expenses(request):
+    query = request.query_params.get("q")
+    if not query or not query.strip():
+        return error_response("q is missing, please send the words to search for", 400)
+    try:
+        expenses, next_cursor = await request.app.state.expense_service.search_expenses(
+            user_email=request.state.jwt["sub"],
+            query=query,
+            category=request.query_params.get("category"),
+            expense_filter_category=request.query_params.get("filter_category"),
+            from_date=request.query_params.get("from_date"),
+            to_date=request.query_params.get("to_date"),
+            limit=query_int(request, "limit"),
+            after=request.query_params.get("after"),
+            fields=request.query_params.get("fields")
+        )
+        return Response(dumps({
+            "status": True,
+            "data": expenses,
+            "count": len(expenses),
+            "next_cursor": next_cursor
+        }), status_code=200, media_type="application/json")
+    except (ExpenseSearchService.InvalidQuery, ExpenseService.InvalidQuery) as e:
+        return error_response(e, 400)
+    except Exception as e:
+        return error_response(e)
+
+
+async def generate_ndjson(expenses):
+    async for expense in expenses:
+        yield dumps(expense.to_dict()) + b"\n"
+
+
+async def generate_csv(expenses):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    async for expense in expenses:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow(expense.to_dict())
+        yield buffer.getvalue()
+
+
+@jwt_required(fresh=True)
+async def export_expense(request):
+    export_format = (request.query_params.get("format") or "ndjson").lower()
+    if export_format not in ("ndjson", "csv"):
+        return error_response("format must be either ndjson or csv", 400)
+
+    try:
+        expenses = await request.app.state.expense_service.export_expense(
+            user_email=request.state.jwt["sub"],
+            expense_filter_category=request.query_params.get("filter_category"),
+            from_date=request.query_params.get("from_date"),
+            to_date=request.query_params.get("to_date")
+        )
+    except Exception as e:
+        return error_response(e)
+
+    if export_format == "csv":
+        body, media_type = generate_csv(expenses), "text/csv"
+    else:
+        body, media_type = generate_ndjson(expenses), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=expenses.{export_format}"}
+    )
+
+
+@jwt_required(fresh=True)
+async def expense_summary(request):
+    try:
+        summary = await request.app.state.expense_service.summarize(
+            user_email=request.state.jwt["sub"],
+            expense_filter_category=request.query_params.get("filter_category"),
+            from_date=request.query_params.get("from_date"),
+            to_date=request.query_params.get("to_date"),
+            bucket=request.query_params.get("bucket")
+        )
+        return JSONResponse({"status": True, "data": summary}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def delete_expense(request):
+    expense_data = await read_json(request)
+    expense_id = expense_data.get("expense_id")
+    if not expense_id:
+        return error_response("expense id not found, please send the valid one", 400)
+    try:
+        expense = await request.app.state.expense_service.remove_expense(
+            expense_id=expense_id, user_email=request.state.jwt["sub"]
+        )
+        if not expense:
+            return error_response("expense is not found associated with this id", 404)
+        return JSONResponse(expense, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def update_expense(request):
+    expense_data = await read_json(request)
+    expense_id = expense_data.get("expense_id")
+    if not expense_id:
+        return error_response("expense id is missing", 400)
+    try:
+        expense = await request.app.state.expense_service.update_expense(
+            expense_id=expense_id,
+            user_email=request.state.jwt["sub"],
+            title=expense_data.get("title"),
+            amount=expense_data.get("amount"),
+            description=expense_data.get("description"),
+            category=expense_data.get("category")
+        )
+        if not expense:
+            return error_response("expense not found man... please check", 404)
+        return JSONResponse(expense, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def create_expense(request):
+    expense_data = await read_json(request)
+    if not expense_data.get("title"):
+        return error_response("title is missing", 400)
+    if not expense_data.get("amount"):
+        return error_response("amount is missing", 400)
+    if not expense_data.get("category"):
+        return error_response("Category is missing", 400)
+    arguments = dict(
+        user_email=request.state.jwt["sub"],
+        title=expense_data.get("title"),
+        category=expense_data.get("category"),
+        description=expense_data.get("description"),
+        amount=expense_data.get("amount")
+    )
+
+    if ingestion_queue.enabled:
+        try:
+            row = await request.app.state.expense_service.prepare_expense(**arguments)
+            ingestion_queue.submit(row)
+            return JSONResponse({"status": True, "id": row["id"], "state": "pending"}, status_code=202)
+        except ingestion_queue.IngestionQueueFull as e:
+            return error_response(e, 429)
+        except Exception as e:
+            return error_response(e)
+
+    try:
+        expense = await request.app.state.expense_service.create_expense(**arguments)
+        if not expense:
+            return error_response("error in making expense...", 404)
+        return JSONResponse(expense.to_dict(), status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def expense_status(request):
+    expense_id = request.query_params.get("expense_id")
+    if not expense_id:
+        return error_response("expense id is missing", 400)
+    service = request.app.state.expense_service
+    user_email = request.state.jwt["sub"]
+    try:
+        state = ingestion_queue.status(expense_id, await service.resolve_user_id(user_email=user_email))
+        if state is not None:
+            state, error = state
+            return JSONResponse({"status": True, "id": expense_id, "state": state, "error": error}, status_code=200)
+
+        expense = await service.find_expense(expense_id=expense_id, user_email=user_email)
+        if not expense:
+            return error_response("expense is not found associated with this id", 404)
+        return JSONResponse({"status": True, "id": expense_id, "state": "stored", "data": expense}, status_code=200)
+    except Exception as e:
+        return error_response(e)
+
+
+def batch_response(results):
+    succeeded = sum(1 for result in results if result["status"])
+    return JSONResponse({
+        "status": True,
+        "data": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }, status_code=200)
+
+
+@jwt_required(fresh=True)
+async def create_expenses(request):
+    expenses = (await read_json(request)).get("expenses")
+    if not expenses:
+        return error_response("expenses are missing", 400)
+    try:
+        return batch_response(await request.app.state.expense_service.create_expenses(
+            expenses=expenses, user_email=request.state.jwt["sub"]
+        ))
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def update_expenses(request):
+    expenses = (await read_json(request)).get("expenses")
+    if not expenses:
+        return error_response("expenses are missing", 400)
+    try:
+        return batch_response(await request.app.state.expense_service.update_expenses(
+            expenses=expenses, user_email=request.state.jwt["sub"]
+        ))
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def delete_expenses(request):
+    expense_ids = (await read_json(request)).get("expense_ids")
+    if not expense_ids:
+        return error_response("expense ids are missing", 400)
+    try:
+        return batch_response(await request.app.state.expense_service.remove_expenses(
+            expense_ids=expense_ids, user_email=request.state.jwt["sub"]
+        ))
+    except Exception as e:
+        return error_response(e)
+
+
+@jwt_required(fresh=True)
+async def import_expenses(request):
+    """Spools the raw request body to disk, then imports it on a thread with the sync engine."""
+    upload = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    async for chunk in request.stream():
+        upload.write(chunk)
+    if not upload.tell():
+        return error_response("statement is missing, please send it as the request body", 400)
+    upload.seek(0)
+
+    def run():
+        with request.app.state.flask_app.app_context():
+            return import_reports(
+                user_email=request.state.jwt["sub"],
+                uploads=[(request.query_params.get("filename"), upload)],
+                file_format=request.query_params.get("format"),
+                sign=request.query_params.get("sign"),
+                date_format=request.query_params.get("date_format")
+            )
+
+    try:
+        reports = await asyncio.to_thread(run)
+    finally:
+        upload.close()
+    return JSONResponse({"status": any(report["status"] for report in reports), "data": reports}, status_code=200)
+
+
+expense_routes = [
+    Route(f"{api_version}/filter-expense", filter_expense, methods=["GET"]),
+    Route(f"{api_version}/search-expenses", search_expenses, methods=["GET"]),
+    Route(f"{api_version}/export-expense", export_expense, methods=["GET"]),
+    Route(f"{api_version}/expense-summary", expense_summary, methods=["GET"]),
+    Route(f"{api_version}/delete-expense", delete_expense, methods=["DELETE"]),
+    Route(f"{api_version}/update-expense", update_expense, methods=["PUT"]),
+    Route(f"{api_version}/create-expense", create_expense, methods=["POST"]),
+    Route(f"{api_version}/expense-status", expense_status, methods=["GET"]),
+    Route(f"{api_version}/create-expenses", create_expenses, methods=["POST"]),
+    Route(f"{api_version}/update-expenses", update_expenses, methods=["PUT"]),
+    Route(f"{api_version}/delete-expenses", delete_expenses, methods=["DELETE"]),
+    Route(f"{api_version}/import-expenses", import_expenses, methods=["POST"]),
+]
@@ -0,0 +1,55 @@
+from starlette.routing import Route
+from route.async_auth_route import JSONResponse, read_json
+from route.async_expense_route import error_response, query_int
+from route.async_analytics_route import admin_required
+from service.job_service import JobService
+from config import API_VERSION
+
+api_version = API_VERSION
+
+
+@admin_required
+async def jobs(request):
+    try:
+        data = await request.app.state.expense_service.jobs(
+            state=request.query_params.get("state"),
+            kind=request.query_params.get("kind"),
+            limit=query_int(request, "limit") or 50
+        )
+        return JSONResponse({"status": True, "data": data, "count": len(data)}, status_code=200)
+    except JobService.JobException as e:
+        return error_response(e, 400)
+    except Exception as e:
+        return error_response(e)
+
+
+@admin_required
+async def job(request):
+    try:
+        data = await request.app.state.expense_service.job(job_id=request.path_params["job_id"])
+        return JSONResponse({"status": True, "data": data}, status_code=200)
+    except JobService.JobException as e:
+        return error_response(e, 404)
+    except Exception as e:
+        return error_response(e)
+
+
+@admin_required
+async def retention(request):
+    retention_data = await read_json(request)
+    try:
+        data = await request.app.state.expense_service.request_retention(
+            months=retention_data.get("months"), before=retention_data.get("before")
+        )
+        return JSONResponse({"status": True, "data": data}, status_code=202)
+    except JobService.JobException as e:
+        return error_response(e, 400)
+    except Exception as e:
+        return error_response(e)
+
+
+job_routes = [
+    Route(f"{api_version}/admin/jobs", jobs, methods=["GET"]),
+    Route(f"{api_version}/admin/jobs/{{job_id}}", job, methods=["GET"]),
+    Route(f"{api_version}/admin/retention", retention, methods=["POST"]),
+]
@@ -2,30 +2,32 @@ from flask_smorest import Blueprint
 from flask.views import MethodView
 from flask import request, jsonify
 from service.auth_service import AuthManager
-from dotenv import load_dotenv
+from service.job_service import JobService
+from service.revocation_service import token_blocklist, MemoryRevocationStore
+from service.password_hasher import password_hasher
+from config import API_VERSION
 from flask_jwt_extended import (
     create_access_token, 
     create_refresh_token, 
     get_jwt, get_jwt_identity, 
     jwt_required
 )
-import os
-
-load_dotenv()
 
 auth_blp = Blueprint("Auth", __name__, description="Auth Routes")
 auth_service = AuthManager()
+job_service = JobService()
 
-api_version = os.getenv("CURRENT_API_VERSION", "/api/v1")
-BLOCKLIST = set()
+api_version = API_VERSION
 
 @auth_blp.route(f"{api_version}/refresh-token", methods = ["POST"])
 @jwt_required(refresh=True)
 def refresh_token():
     current_user = get_jwt_identity()
+    try:
+        token_blocklist.revoke(get_jwt())
+    except MemoryRevocationStore.RevocationStoreFull as e:
+        return jsonify({"status": False, "error": str(e)}), 503
     new_token = create_access_token(identity=current_user, fresh=False)
-    jti = get_jwt()["jti"]
-    BLOCKLIST.add(jti)
     return {"access_token": new_token}, 200
 
 
@@ -51,6 +53,8 @@ class UserLoginRoute(MethodView):
                 "access_token": access_token, 
                 "refresh_token": refresh_token
             }), 200
+        except password_hasher.PasswordHasherBusy as e:
+            return jsonify({"status": False, "error": str(e)}), 503
         except Exception as e:
             return jsonify({"status": False, "error": str(e)}), 400
 
@@ -74,5 +78,23 @@ class UserSignupRoute(MethodView):
         try:
             result = auth_service.create_user(username=username, email=email, password=password)
             return jsonify({"status": True, "data": result.to_dict()}), 201
+        except password_hasher.PasswordHasherBusy as e:
+            return jsonify({"status": False, "error": str(e)}), 503
         except Exception as e:
             return jsonify({"status": False, "error": str(e)}), 400
+
+
+@auth_blp.route(f"{api_version}/account", methods = ["DELETE"])
+@jwt_required(fresh=True)
+def delete_account():
+    """Queue the deletion of the account and all its data; the login and every token stop working right away."""
+    try:
+        token_blocklist.revoke_subject(get_jwt_identity())
+        job = job_service.request_account_deletion(user_email=get_jwt_identity())
+        return jsonify({"status": True, "data": job}), 202
+    except MemoryRevocationStore.RevocationStoreFull as e:
+        return jsonify({"status": False, "error": str(e)}), 503
+    except JobService.JobException as e:
+        return jsonify({"status": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": False, "error": str(e)}), 500
@@ -0,0 +1,89 @@
+from flask_smorest import Blueprint
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, jsonify
+from route.expense_route import expense_service
+from config import API_VERSION
+
+budget_service = expense_service.budgets
+
+api_version = API_VERSION
+
+budget_blp = Blueprint("Budget", __name__, description="Budget Service")
+
+
+@budget_blp.route(f"{api_version}/set-budget", methods = ["PUT"])
+@jwt_required(fresh=True)
+def set_budget():
+    budget_data = request.get_json()
+    category = budget_data.get("category")
+    amount = budget_data.get("amount")
+
+    if not category:
+        return jsonify({
+            "status" : False,
+            "error" : "Category is missing"
+        }), 400
+
+    if amount is None:
+        return jsonify({
+            "status" : False,
+            "error" : "amount is missing"
+        }), 400
+
+    try:
+        budget = budget_service.set_budget(user_email=get_jwt_identity(), category=category, amount=amount)
+        return jsonify({"status": True, "data": budget}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@budget_blp.route(f"{api_version}/delete-budget", methods = ["DELETE"])
+@jwt_required(fresh=True)
+def delete_budget():
+    category = request.get_json().get("category")
+    if not category:
+        return jsonify({
+            "status" : False,
+            "error" : "Category is missing"
+        }), 400
+    try:
+        if not budget_service.delete_budget(user_email=get_jwt_identity(), category=category):
+            return jsonify({
+                "status" : False,
+                "error" : "no budget is set for this category"
+            }), 404
+        return jsonify({"status": True}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@budget_blp.route(f"{api_version}/budgets", methods = ["GET"])
+@jwt_required(fresh=True)
+def budgets():
+    try:
+        data = budget_service.budgets(user_email=get_jwt_identity(), month=request.args.get("month"))
+        return jsonify({"status": True, "data": data, "count": len(data)}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@budget_blp.route(f"{api_version}/budget-alerts", methods = ["GET"])
+@jwt_required(fresh=True)
+def budget_alerts():
+    try:
+        data = budget_service.alerts(user_email=get_jwt_identity())
+        return jsonify({"status": True, "data": data, "count": len(data)}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
@@ -0,0 +1,52 @@
+from flask_smorest import Blueprint
+from flask_jwt_extended import jwt_required
+from flask import request, jsonify
+from route.analytics_route import admin_required
+from service.category_service import CategoryService
+from config import API_VERSION
+
+category_service = CategoryService()
+
+api_version = API_VERSION
+
+category_blp = Blueprint("Category", __name__, description="Expense Categories")
+
+
+@category_blp.route(f"{api_version}/categories", methods = ["GET"])
+@jwt_required(fresh=True)
+def categories():
+    try:
+        data = category_service.categories()
+        return jsonify({"status": True, "data": data, "count": len(data)}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@category_blp.route(f"{api_version}/categories", methods = ["POST"])
+@admin_required
+def create_category():
+    category_data = request.get_json()
+    if not category_data.get("name"):
+        return jsonify({
+            "status" : False,
+            "error" : "name is missing"
+        }), 400
+
+    try:
+        category = category_service.create_category(
+            name=category_data.get("name"), aliases=category_data.get("aliases")
+        )
+        return jsonify({"status": True, "data": category}), 201
+    except CategoryService.CategoryException as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
@@ -1,15 +1,21 @@
 from flask_smorest import Blueprint
-from service.expense_service import ExpenseService
+from service.expense_service import ExpenseService, EXPENSE_FIELDS
+from service.search_service import ExpenseSearchService
+from service.import_service import ExpenseImportService
+from service.response_cache import response_cache
+from service.ingestion_queue import ingestion_queue
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask import request, jsonify
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
+from flask import request, jsonify, Response, stream_with_context
+from json_provider import dumps
+from config import API_VERSION
+import csv
+import io
 
 expense_service = ExpenseService()
+search_service = ExpenseSearchService(expenses=expense_service)
+import_service = ExpenseImportService(expenses=expense_service)
 
-api_version = os.getenv("CURRENT_API_VERSION", "/api/v1")
+api_version = API_VERSION
 
 expense_blp = Blueprint("Expense", __name__, description="Expense Service")
 
@@ -20,18 +26,176 @@ def filter_expense():
     expense_filter_category = request.args.get("filter_category")
     from_date = request.args.get("from_date")
     to_date = request.args.get("to_date")
+    limit = request.args.get("limit", type=int)
+    after = request.args.get("after")
+    fields = request.args.get("fields")
 
     try:
-        expenses = expense_service.filter_expense(
+        etag = expense_service.filter_etag(
+            user_email=user_email,
+            expense_filter_category=expense_filter_category,
+            from_date=from_date,
+            to_date=to_date,
+            limit=limit,
+            after=after,
+            fields=fields
+        )
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        body = response_cache.get(etag)
+        if body is None:
+            expenses, next_cursor = expense_service.filter_expense(
+                user_email=user_email,
+                expense_filter_category=expense_filter_category,
+                from_date=from_date,
+                to_date=to_date,
+                limit=limit,
+                after=after,
+                fields=fields
+            )
+            body = dumps({
+                "status": True,
+                "data": expenses,
+                "count": len(expenses),
+                "next_cursor": next_cursor
+            })
+            response_cache.set(etag, body)
+
+        response = Response(body, status=200, mimetype="application/json")
+        response.set_etag(etag)
+        return response
+    except ExpenseService.InvalidQuery as e:
+        return jsonify({
+            "status": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": False,
+            "error": str(e)
+        }), 500
+
+@expense_blp.route(f"{api_version}/search-expenses", methods = ["GET"])
+@jwt_required(fresh=True)
+def search_expenses():
+    query = request.args.get("q")
+    if not query or not query.strip():
+        return jsonify({
+            "status" : False,
+            "error" : "q is missing, please send the words to search for"
+        }), 400
+
+    try:
+        expenses, next_cursor = search_service.search(
+            user_email=get_jwt_identity(),
+            query=query,
+            category=request.args.get("category"),
+            expense_filter_category=request.args.get("filter_category"),
+            from_date=request.args.get("from_date"),
+            to_date=request.args.get("to_date"),
+            limit=request.args.get("limit", type=int),
+            after=request.args.get("after"),
+            fields=request.args.get("fields")
+        )
+        return Response(dumps({
+            "status": True,
+            "data": expenses,
+            "count": len(expenses),
+            "next_cursor": next_cursor
+        }), status=200, mimetype="application/json")
+    except (ExpenseSearchService.InvalidQuery, ExpenseService.InvalidQuery) as e:
+        return jsonify({
+            "status": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": False,
+            "error": str(e)
+        }), 500
+
+EXPORT_FIELDS = list(EXPENSE_FIELDS)
+
+
+def generate_ndjson(expenses):
+    for expense in expenses:
+        yield dumps(expense.to_dict()) + b"\n"
+
+
+def generate_csv(expenses):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for expense in expenses:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow(expense.to_dict())
+        yield buffer.getvalue()
+
+
+@expense_blp.route(f"{api_version}/export-expense", methods = ["GET"])
+@jwt_required(fresh=True)
+def export_expense():
+    user_email = get_jwt_identity()
+    export_format = (request.args.get("format") or "ndjson").lower()
+    expense_filter_category = request.args.get("filter_category")
+    from_date = request.args.get("from_date")
+    to_date = request.args.get("to_date")
+
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({
+            "status" : False,
+            "error" : "format must be either ndjson or csv"
+        }), 400
+
+    try:
+        expenses = expense_service.export_expense(
             user_email=user_email,
             expense_filter_category=expense_filter_category,
             from_date=from_date,
             to_date=to_date
         )
+    except Exception as e:
+        return jsonify({
+            "status": False,
+            "error": str(e)
+        }), 500
+
+    if export_format == "csv":
+        body, mimetype = generate_csv(expenses), "text/csv"
+    else:
+        body, mimetype = generate_ndjson(expenses), "application/x-ndjson"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=expenses.{export_format}"}
+    )
+
+@expense_blp.route(f"{api_version}/expense-summary", methods = ["GET"])
+@jwt_required(fresh=True)
+def expense_summary():
+    user_email = get_jwt_identity()
+    expense_filter_category = request.args.get("filter_category")
+    from_date = request.args.get("from_date")
+    to_date = request.args.get("to_date")
+    bucket = request.args.get("bucket")
+
+    try:
+        summary = expense_service.summarize(
+            user_email=user_email,
+            expense_filter_category=expense_filter_category,
+            from_date=from_date,
+            to_date=to_date,
+            bucket=bucket
+        )
         return jsonify({
             "status": True,
-            "data": [expense.to_dict() for expense in expenses],
-            "count": len(expenses)
+            "data": summary
         }), 200
     except Exception as e:
         return jsonify({
@@ -50,13 +214,13 @@ def delete_expense():
             "error" : "expense id not found, please send the valid one"
         }), 400
     try:
-        expense = expense_service.remove_expense(expense_id=expense_id)
+        expense = expense_service.remove_expense(expense_id=expense_id, user_email=get_jwt_identity())
         if not expense:
             return jsonify({
                 "status" : False,
                 "error" : "expense is not found associated with this id"
             }), 404
-        return jsonify(expense.to_dict()), 200
+        return jsonify(expense), 200
     except Exception as e:
         return jsonify({
             "status" : False,
@@ -83,6 +247,7 @@ def update_expense():
     try:
         expense = expense_service.update_expense(
             expense_id=expense_id,
+            user_email=get_jwt_identity(),
             title=title,
             amount=amount,
             description=description,
@@ -93,7 +258,7 @@ def update_expense():
                 "status" : False,
                 "error" : "expense not found man... please check"
             }), 404
-        return jsonify(expense.to_dict()), 200
+        return jsonify(expense), 200
     except Exception as e:
         return jsonify({
             "status" : False,
@@ -129,6 +294,22 @@ def create_expense():
             "error" : "Category is missing"
         }), 400
 
+    if ingestion_queue.enabled:
+        try:
+            row = expense_service.prepare_expense(
+                user_email=user_email,
+                title=title,
+                category=category,
+                description=description,
+                amount=amount
+            )
+            ingestion_queue.submit(row)
+            return jsonify({"status": True, "id": row["id"], "state": "pending"}), 202
+        except ingestion_queue.IngestionQueueFull as e:
+            return jsonify({"status": False, "error": str(e)}), 429
+        except Exception as e:
+            return jsonify({"status": False, "error": str(e)}), 500
+
     try:
         expense = expense_service.create_expense(
             user_email=user_email,
@@ -148,3 +329,151 @@ def create_expense():
             "status" : False,
             "error" : str(e)
         }), 500    
+
+
+@expense_blp.route(f"{api_version}/expense-status", methods = ["GET"])
+@jwt_required(fresh=True)
+def expense_status():
+    user_email = get_jwt_identity()
+    expense_id = request.args.get("expense_id")
+    if not expense_id:
+        return jsonify({
+            "status" : False,
+            "error" : "expense id is missing"
+        }), 400
+
+    try:
+        state = ingestion_queue.status(expense_id, expense_service.resolve_user_id(user_email))
+        if state is not None:
+            state, error = state
+            return jsonify({"status": True, "id": expense_id, "state": state, "error": error}), 200
+
+        expense = expense_service.find_expense(expense_id=expense_id, user_email=user_email)
+        if not expense:
+            return jsonify({
+                "status" : False,
+                "error" : "expense is not found associated with this id"
+            }), 404
+        return jsonify({"status": True, "id": expense_id, "state": "stored", "data": expense}), 200
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+def batch_response(results):
+    succeeded = sum(1 for result in results if result["status"])
+    return jsonify({
+        "status": True,
+        "data": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }), 200
+
+
+@expense_blp.route(f"{api_version}/create-expenses", methods = ["POST"])
+@jwt_required(fresh=True)
+def create_expenses():
+    user_email = get_jwt_identity()
+    expense_data = request.get_json() or {}
+    expenses = expense_data.get("expenses")
+
+    if not expenses:
+        return jsonify({
+            "status" : False,
+            "error" : "expenses are missing"
+        }), 400
+
+    try:
+        results = expense_service.create_expenses(expenses=expenses, user_email=user_email)
+        return batch_response(results)
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@expense_blp.route(f"{api_version}/update-expenses", methods = ["PUT"])
+@jwt_required(fresh=True)
+def update_expenses():
+    user_email = get_jwt_identity()
+    expense_data = request.get_json() or {}
+    expenses = expense_data.get("expenses")
+
+    if not expenses:
+        return jsonify({
+            "status" : False,
+            "error" : "expenses are missing"
+        }), 400
+
+    try:
+        results = expense_service.update_expenses(expenses=expenses, user_email=user_email)
+        return batch_response(results)
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@expense_blp.route(f"{api_version}/delete-expenses", methods = ["DELETE"])
+@jwt_required(fresh=True)
+def delete_expenses():
+    user_email = get_jwt_identity()
+    expense_data = request.get_json() or {}
+    expense_ids = expense_data.get("expense_ids")
+
+    if not expense_ids:
+        return jsonify({
+            "status" : False,
+            "error" : "expense ids are missing"
+        }), 400
+
+    try:
+        results = expense_service.remove_expenses(expense_ids=expense_ids, user_email=user_email)
+        return batch_response(results)
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+def import_reports(user_email: str, uploads, file_format: str = None, sign: str = None, date_format: str = None):
+    """One report per uploaded (filename, binary stream); a failing file does not stop the others."""
+    reports = []
+    for filename, stream in uploads:
+        try:
+            reports.append({"status": True, **import_service.import_file(
+                user_email=user_email, stream=stream, filename=filename,
+                file_format=file_format, sign=sign, date_format=date_format
+            )})
+        except Exception as e:
+            reports.append({"status": False, "file": filename, "error": str(e)})
+    return reports
+
+
+@expense_blp.route(f"{api_version}/import-expenses", methods = ["POST"])
+@jwt_required(fresh=True)
+def import_expenses():
+    files = request.files.getlist("file")
+    if files:
+        uploads = [(upload.filename, upload.stream) for upload in files]
+    elif request.content_length:
+        uploads = [(request.args.get("filename"), request.stream)]
+    else:
+        return jsonify({
+            "status" : False,
+            "error" : "statement is missing, please upload it as the file field or as the request body"
+        }), 400
+
+    reports = import_reports(
+        user_email=get_jwt_identity(),
+        uploads=uploads,
+        file_format=request.values.get("format"),
+        sign=request.values.get("sign"),
+        date_format=request.values.get("date_format")
+    )
+    return jsonify({"status": any(report["status"] for report in reports), "data": reports}), 200
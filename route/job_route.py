@@ -0,0 +1,69 @@
+from flask_smorest import Blueprint
+from flask import request, jsonify
+from route.analytics_route import admin_required
+from service.job_service import JobService
+from config import API_VERSION
+
+job_service = JobService()
+
+api_version = API_VERSION
+
+job_blp = Blueprint("Jobs", __name__, description="Background Jobs")
+
+
+@job_blp.route(f"{api_version}/admin/jobs", methods = ["GET"])
+@admin_required
+def jobs():
+    try:
+        data = job_service.jobs(
+            state=request.args.get("state"),
+            kind=request.args.get("kind"),
+            limit=request.args.get("limit", 50, type=int)
+        )
+        return jsonify({"status": True, "data": data, "count": len(data)}), 200
+    except JobService.JobException as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@job_blp.route(f"{api_version}/admin/jobs/<job_id>", methods = ["GET"])
+@admin_required
+def job(job_id):
+    try:
+        return jsonify({"status": True, "data": job_service.job(job_id)}), 200
+    except JobService.JobException as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 404
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
+
+
+@job_blp.route(f"{api_version}/admin/retention", methods = ["POST"])
+@admin_required
+def retention():
+    retention_data = request.get_json(silent=True) or {}
+    try:
+        data = job_service.request_retention(months=retention_data.get("months"), before=retention_data.get("before"))
+        return jsonify({"status": True, "data": data}), 202
+    except JobService.JobException as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status" : False,
+            "error" : str(e)
+        }), 500
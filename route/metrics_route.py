@@ -0,0 +1,37 @@
+from flask_smorest import Blueprint
+from flask import Response, current_app, request
+from route.analytics_route import admin_required
+from service.query_metrics import query_metrics
+from service.response_cache import response_cache
+from service.replica_router import replica_router
+from service.budget_notifier import budget_notifier
+from service.job_runner import job_runner
+import functools
+import hmac
+
+metrics_blp = Blueprint("Metrics", __name__, description="Prometheus Metrics")
+
+
+def metrics_access(handler):
+    """A request bearing METRICS_TOKEN, for scrapers, or else an admin's fresh token."""
+    admin_handler = admin_required(handler)
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get("METRICS_TOKEN")
+        if token and hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+        ):
+            return handler(*args, **kwargs)
+        return admin_handler(*args, **kwargs)
+    return wrapper
+
+
+@metrics_blp.route("/metrics", methods = ["GET"])
+@metrics_access
+def metrics():
+    return Response(
+        query_metrics.render_prometheus() + response_cache.render_prometheus() + replica_router.render_prometheus()
+        + budget_notifier.render_prometheus() + job_runner.render_prometheus(),
+        mimetype="text/plain; version=0.0.4"
+    )
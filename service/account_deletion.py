@@ -0,0 +1,132 @@
+from extension import db
+from models.user_model import UserModel
+from models.expense_model import ExpenseModel
+from models.expense_archive_model import ExpenseArchiveModel
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from models.expense_version_model import ExpenseVersionModel
+from models.budget_model import BudgetModel, BudgetMonthTotalModel
+from service.job_service import ACCOUNT_DELETION
+from service.user_cache import user_id_cache
+from sqlalchemy.exc import SQLAlchemyError
+
+# Per-user tables and the columns identifying a row among the user's,
+# which chunks are taken in the order of; deleted in this order, the users
+# row goes last.
+USER_TABLES = (
+    (ExpenseModel.__table__, ("createdAt", "id")),
+    (ExpenseArchiveModel.__table__, ("id",)),
+    (ExpenseDailyRollupModel.__table__, ("day", "category_id")),
+    (BudgetMonthTotalModel.__table__, ("month", "category_id")),
+    (BudgetModel.__table__, ("category_id",)),
+    (ExpenseVersionModel.__table__, ("user_id",)),
+)
+
+
+class AccountDeletion:
+    """Job deleting a user and everything they own, a bounded chunk per transaction.
+
+    Each chunk takes the keys of the user's next batch_size rows from the
+    user's index and deletes the rows with those keys, so no transaction
+    deletes or locks more than batch_size rows, however many expenses
+    share a createdAt. The users row is deleted last; ON DELETE CASCADE removes
+    anything written for the user while the job ran.
+    """
+
+    kind = ACCOUNT_DELETION
+
+    def __init__(self, database=db):
+        self.db = database
+
+    class AccountDeletionException(Exception):
+        pass
+
+    def install(self) -> list:
+        """Make the user foreign keys of an existing PostgreSQL database ON DELETE CASCADE; run by `flask init-db`.
+
+        The constraints are added NOT VALID and validated afterwards, which
+        does not block writes to the table while the rows are checked.
+        Partitioned tables do not support NOT VALID and are checked in one go.
+        SQLite does not enforce foreign keys here; the job deletes every
+        table itself.
+        """
+        engine = self.db.engine
+        if engine.dialect.name != "postgresql":
+            return []
+        inspector = db.inspect(engine)
+        changed = []
+        for table, _ in USER_TABLES:
+            for foreign_key in inspector.get_foreign_keys(table.name):
+                if foreign_key["referred_table"] != UserModel.__tablename__:
+                    continue
+                if (foreign_key.get("options") or {}).get("ondelete", "").upper() == "CASCADE":
+                    continue
+                name = foreign_key["name"]
+                columns = ", ".join(f'"{column}"' for column in foreign_key["constrained_columns"])
+                with engine.begin() as connection:
+                    partitioned = connection.execute(db.text(
+                        "SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)"
+                    ), {"table": table.name}).scalar()
+                    connection.execute(db.text(
+                        f'ALTER TABLE "{table.name}" DROP CONSTRAINT "{name}", ADD CONSTRAINT "{name}" '
+                        f'FOREIGN KEY ({columns}) REFERENCES {UserModel.__tablename__} (id) ON DELETE CASCADE'
+                        + ("" if partitioned else " NOT VALID")
+                    ))
+                if not partitioned:
+                    with engine.begin() as connection:
+                        connection.execute(db.text(f'ALTER TABLE "{table.name}" VALIDATE CONSTRAINT "{name}"'))
+                changed.append(f"{table.name}.{name}")
+        return changed
+
+    def total(self, params: dict) -> int:
+        user_id = params["user_id"]
+        return sum(
+            self.db.session.execute(db.select(db.func.count()).select_from(table).where(table.c.user_id == user_id)).scalar()
+            for table, _ in USER_TABLES
+        ) + 1
+
+    def delete_chunk(self, table, keys: tuple, user_id: str, batch_size: int) -> int:
+        columns = [table.c[key] for key in keys]
+        rows = self.db.session.execute(
+            db.select(*columns).where(table.c.user_id == user_id).order_by(*columns).limit(batch_size)
+        ).all()
+        if not rows:
+            return 0
+        statement = db.delete(table).where(table.c.user_id == user_id)
+        if len(columns) == 1:
+            statement = statement.where(columns[0].in_([row[0] for row in rows]))
+        else:
+            statement = statement.where(db.tuple_(*columns).in_([tuple(row) for row in rows]))
+        if "createdAt" in keys:
+            # The chunk's range on top: it is what the (user_id, createdAt) index and partitions are keyed by.
+            statement = statement.where(table.c.createdAt >= rows[0].createdAt, table.c.createdAt <= rows[-1].createdAt)
+        return self.db.session.execute(statement).rowcount
+
+    def remaining(self, user_id: str) -> bool:
+        return any(
+            self.db.session.execute(db.select(table.c.user_id).where(table.c.user_id == user_id).limit(1)).first()
+            for table, _ in USER_TABLES
+        )
+
+    def step(self, params: dict, cursor, batch_size: int) -> tuple:
+        """Delete one chunk in the open transaction; returns (rows deleted, next cursor, done)."""
+        user_id = params["user_id"]
+        index = (cursor or {}).get("table", 0)
+        try:
+            while index < len(USER_TABLES):
+                table, keys = USER_TABLES[index]
+                deleted = self.delete_chunk(table, keys, user_id, batch_size)
+                if deleted:
+                    return deleted, {"table": index}, False
+                index += 1
+            if self.remaining(user_id):
+                # Written by a process that still had the user cached; start over.
+                return 0, {"table": 0}, False
+            deleted = self.db.session.execute(db.delete(UserModel).where(UserModel.id == user_id)).rowcount
+            # The request dropped the email from its own process only; this one
+            # may have resolved the user while the job ran.
+            user_id_cache.forget_user(user_id)
+            return deleted, {"table": index}, True
+        except SQLAlchemyError:
+            raise
+        except Exception as e:
+            raise self.AccountDeletionException(f"Failed to delete the account of {user_id}: {str(e)}")
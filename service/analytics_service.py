@@ -0,0 +1,236 @@
+from service.analytics_snapshot import expense_snapshot, numpy
+from service.category_catalog import category_catalog, normalize
+from money import from_minor
+from datetime import datetime
+import functools
+import math
+
+PERCENTILES = (50, 90, 99)
+MAX_TOP_SPENDERS = 1000
+MAX_CACHED_REPORTS = 256
+
+
+@functools.cache
+def bucket_edges():
+    """Log-spaced amount buckets in cents, about 5% wide, for percentile estimates."""
+    return numpy.unique(numpy.rint(numpy.logspace(0, 11, 11 * 48 + 1))).astype(numpy.int64)
+
+
+def bucket_value(edges, bucket: int) -> float:
+    if bucket == 0:
+        return 0.0
+    if bucket >= len(edges):
+        return from_minor(edges[-1])
+    return from_minor(round(math.sqrt(edges[bucket - 1] * edges[bucket])))
+
+
+def share(part: float, whole: float) -> float:
+    return round(float(part / whole) * 100, 2) if whole else 0.0
+
+
+def growth(current: float, previous: float):
+    """Change from previous in percent; None when there was nothing to grow from."""
+    return round(float((current - previous) / previous) * 100, 2) if previous else None
+
+
+class AnalyticsService:
+    """Fleet-wide admin reports over the columnar snapshot; never queries expenses.
+
+    Reports are vectorized over the memory-mapped segments and cached until
+    the next snapshot generation.
+    """
+
+    def __init__(self, snapshot=expense_snapshot):
+        self.snapshot = snapshot
+
+    class AnalyticsException(Exception):
+        pass
+
+    class SnapshotMissing(AnalyticsException):
+        pass
+
+    def open(self):
+        try:
+            reader = self.snapshot.reader()
+        except self.snapshot.SnapshotException as e:
+            raise self.SnapshotMissing(str(e))
+        if reader is None:
+            raise self.SnapshotMissing(
+                "the analytics snapshot has not been built yet, run `flask refresh-analytics-snapshot`"
+            )
+        return reader
+
+    def month(self, value: str, name: str):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m").strftime("%Y-%m")
+        except ValueError:
+            raise self.AnalyticsException(f"{name} must be a month like 2026-03")
+
+    def cached(self, key: tuple, compute):
+        reader = self.open()
+        with reader.lock:
+            if key in reader.reports:
+                return reader.reports[key]
+        report = compute(reader)
+        with reader.lock:
+            if len(reader.reports) >= MAX_CACHED_REPORTS:
+                reader.reports.clear()
+            reader.reports[key] = report
+        return report
+
+    def category_codes(self, reader, category: str):
+        """Codes of the category named or aliased by category; None when not filtering."""
+        if not category:
+            return None
+        category_id = category_catalog.find(category)
+        name = category_catalog.name(category_id) if category_id is not None else None
+        return numpy.array([code for code, value in enumerate(reader.categories) if value == name], dtype=numpy.int16)
+
+    def range_of(self, reader, first: str, last: str) -> dict:
+        months = reader.months(first, last)
+        return {"from_month": months[0] if months else first, "to_month": months[-1] if months else last}
+
+    def category_distribution(self, from_month: str = None, to_month: str = None) -> dict:
+        """Spend per category with its share, mean and approximate p50/p90/p99 expense amounts."""
+        first, last = self.month(from_month, "from_month"), self.month(to_month, "to_month")
+
+        def compute(reader):
+            edges = bucket_edges()
+            width = len(edges) + 1
+            size = len(reader.categories)
+            counts = numpy.zeros(size, dtype=numpy.int64)
+            totals = numpy.zeros(size, dtype=numpy.float64)
+            histogram = numpy.zeros(size * width, dtype=numpy.int64)
+            for key in reader.months(first, last):
+                columns = reader.segments[key]
+                category = columns["category"].astype(numpy.int64)
+                counts += numpy.bincount(category, minlength=size)
+                totals += numpy.bincount(category, weights=columns["cents"], minlength=size)
+                buckets = numpy.searchsorted(edges, columns["cents"], side="right")
+                histogram += numpy.bincount(category * width + buckets, minlength=size * width)
+            histogram = histogram.reshape(size, width)
+
+            total = totals.sum()
+            categories = []
+            for code in numpy.argsort(-totals, kind="stable"):
+                if not counts[code]:
+                    continue
+                cumulative = numpy.cumsum(histogram[code])
+                categories.append({
+                    "category": reader.categories[code],
+                    "count": int(counts[code]),
+                    "total": from_minor(round(totals[code])),
+                    "share": share(totals[code], total),
+                    "mean": from_minor(round(totals[code] / counts[code])),
+                    **{
+                        f"p{percentile}": bucket_value(
+                            edges, int(numpy.searchsorted(cumulative, math.ceil(counts[code] * percentile / 100)))
+                        )
+                        for percentile in PERCENTILES
+                    },
+                })
+            return {
+                **self.range_of(reader, first, last),
+                "count": int(counts.sum()),
+                "total": from_minor(round(total)),
+                "categories": categories,
+            }
+
+        return self.cached(("category_distribution", first, last), compute)
+
+    def top_spenders(self, from_month: str = None, to_month: str = None, category: str = None, limit: int = 10) -> dict:
+        """The users with the highest spend, optionally in one category."""
+        first, last = self.month(from_month, "from_month"), self.month(to_month, "to_month")
+        limit = 10 if limit is None else limit
+        if not 1 <= limit <= MAX_TOP_SPENDERS:
+            raise self.AnalyticsException(f"limit must be between 1 and {MAX_TOP_SPENDERS}")
+
+        def compute(reader):
+            size = len(reader.user_ids)
+            codes = self.category_codes(reader, category)
+            counts = numpy.zeros(size, dtype=numpy.int64)
+            totals = numpy.zeros(size, dtype=numpy.float64)
+            for key in reader.months(first, last):
+                columns = reader.segments[key]
+                users, cents = columns["user"], columns["cents"]
+                if codes is not None:
+                    matches = numpy.isin(columns["category"], codes)
+                    users, cents = users[matches], cents[matches]
+                counts += numpy.bincount(users, minlength=size)
+                totals += numpy.bincount(users, weights=cents, minlength=size)
+
+            top = numpy.argpartition(-totals, limit - 1)[:limit] if limit < size else numpy.arange(size)
+            top = top[numpy.argsort(-totals[top], kind="stable")]
+            total = totals.sum()
+            return {
+                **self.range_of(reader, first, last),
+                "category": category,
+                "total": from_minor(round(total)),
+                "users": [
+                    {
+                        "user_id": reader.user_ids[code],
+                        "email": reader.user_emails[code],
+                        "count": int(counts[code]),
+                        "total": from_minor(round(totals[code])),
+                        "share": share(totals[code], total),
+                    }
+                    for code in top if counts[code]
+                ],
+            }
+
+        return self.cached(("top_spenders", first, last, normalize(category or ""), limit), compute)
+
+    def monthly_growth(self, from_month: str = None, to_month: str = None, category: str = None) -> dict:
+        """Spend per month, overall and per category, with the change from the month before in percent."""
+        first, last = self.month(from_month, "from_month"), self.month(to_month, "to_month")
+
+        def compute(reader):
+            size = len(reader.categories)
+            codes = self.category_codes(reader, category)
+            keys = reader.months(first, last)
+            months, previous = [], None
+            for month in numpy.arange(numpy.datetime64(keys[0]), numpy.datetime64(keys[-1]) + 1) if keys else ():
+                key, totals, count = str(month), numpy.zeros(size), 0
+                if key in reader.segments:
+                    columns = reader.segments[key]
+                    categories, cents = columns["category"], columns["cents"]
+                    if codes is not None:
+                        matches = numpy.isin(categories, codes)
+                        categories, cents = categories[matches], cents[matches]
+                    totals, count = numpy.bincount(categories, weights=cents, minlength=size), len(cents)
+                months.append({
+                    "month": key,
+                    "count": count,
+                    "total": from_minor(round(totals.sum())),
+                    "growth": growth(totals.sum(), previous.sum() if previous is not None else 0),
+                    "categories": {
+                        reader.categories[code]: {
+                            "total": from_minor(round(totals[code])),
+                            "growth": growth(totals[code], previous[code] if previous is not None else 0),
+                        }
+                        for code in numpy.flatnonzero(totals)
+                    },
+                })
+                previous = totals
+            return {**self.range_of(reader, first, last), "category": category, "months": months}
+
+        return self.cached(("monthly_growth", first, last, normalize(category or "")), compute)
+
+    def status(self) -> dict:
+        reader = self.open()
+        manifest = reader.manifest
+        months = list(reader.segments)
+        return {
+            "generation": manifest["generation"],
+            "built_at": manifest["built_at"],
+            "watermark": manifest["watermark"],
+            "rows": manifest["rows"],
+            "months": len(months),
+            "first_month": months[0] if months else None,
+            "last_month": months[-1] if months else None,
+            "users": len(reader.user_ids),
+            "categories": len(reader.categories),
+            "last_refresh": self.snapshot.last_refresh,
+        }
@@ -0,0 +1,248 @@
+from extension import db
+from models.user_model import UserModel
+from service.expense_service import ExpenseService
+from service.search_service import ExpenseSearchService
+from service.category_service import CategoryService
+from service.job_service import JobService
+from service.password_hasher import password_hasher
+from service.revocation_service import MemoryRevocationStore, DatabaseRevocationStore
+from service.user_cache import user_id_cache
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import time
+
+
+class RunSyncDatabase:
+    """Stands in for the Flask-SQLAlchemy db object inside AsyncSession.run_sync.
+
+    The synchronous services only touch the database through self.db.session,
+    so binding them to this object lets them run unchanged on the sync facade
+    of an AsyncSession while the actual I/O is awaited by the event loop.
+    """
+
+    def __init__(self):
+        self.current = ContextVar("run_sync_session")
+
+    @property
+    def session(self):
+        return self.current.get()
+
+    def call(self, sync_session, function, kwargs):
+        token = self.current.set(sync_session)
+        try:
+            return function(**kwargs)
+        finally:
+            self.current.reset(token)
+
+    async def run(self, session, function, **kwargs):
+        return await session.run_sync(self.call, function, kwargs)
+
+
+class AsyncExpenseService:
+    def __init__(self, sessionmaker):
+        self.sessionmaker = sessionmaker
+        self.database = RunSyncDatabase()
+        self.service = ExpenseService(self.database)
+        self.search = ExpenseSearchService(self.database, expenses=self.service)
+        self.category_service = CategoryService(self.database)
+        self.job_service = JobService(self.database)
+
+    ExpenseException = ExpenseService.ExpenseException
+
+    async def run(self, function, **kwargs):
+        async with self.sessionmaker() as session:
+            return await self.database.run(session, function, **kwargs)
+
+    async def filter_etag(self, **kwargs) -> str:
+        return await self.run(self.service.filter_etag, **kwargs)
+
+    async def filter_expense(self, **kwargs):
+        return await self.run(self.service.filter_expense, **kwargs)
+
+    async def search_expenses(self, **kwargs):
+        return await self.run(self.search.search, **kwargs)
+
+    async def summarize(self, **kwargs) -> dict:
+        return await self.run(self.service.summarize, **kwargs)
+
+    async def create_expense(self, **kwargs):
+        return await self.run(self.service.create_expense, **kwargs)
+
+    async def prepare_expense(self, **kwargs) -> dict:
+        return await self.run(self.service.prepare_expense, **kwargs)
+
+    async def resolve_user_id(self, **kwargs) -> str:
+        return await self.run(self.service.resolve_user_id, **kwargs)
+
+    async def find_expense(self, **kwargs):
+        return await self.run(self.service.find_expense, **kwargs)
+
+    async def update_expense(self, **kwargs):
+        return await self.run(self.service.update_expense, **kwargs)
+
+    async def remove_expense(self, **kwargs):
+        return await self.run(self.service.remove_expense, **kwargs)
+
+    async def create_expenses(self, **kwargs) -> list:
+        return await self.run(self.service.create_expenses, **kwargs)
+
+    async def update_expenses(self, **kwargs) -> list:
+        return await self.run(self.service.update_expenses, **kwargs)
+
+    async def remove_expenses(self, **kwargs) -> list:
+        return await self.run(self.service.remove_expenses, **kwargs)
+
+    async def set_budget(self, **kwargs) -> dict:
+        return await self.run(self.service.budgets.set_budget, **kwargs)
+
+    async def delete_budget(self, **kwargs) -> bool:
+        return await self.run(self.service.budgets.delete_budget, **kwargs)
+
+    async def budgets(self, **kwargs) -> list:
+        return await self.run(self.service.budgets.budgets, **kwargs)
+
+    async def budget_alerts(self, **kwargs) -> list:
+        return await self.run(self.service.budgets.alerts, **kwargs)
+
+    async def categories(self) -> list:
+        return await self.run(self.category_service.categories)
+
+    async def create_category(self, **kwargs) -> dict:
+        return await self.run(self.category_service.create_category, **kwargs)
+
+    async def request_account_deletion(self, **kwargs) -> dict:
+        return await self.run(self.job_service.request_account_deletion, **kwargs)
+
+    async def request_retention(self, **kwargs) -> dict:
+        return await self.run(self.job_service.request_retention, **kwargs)
+
+    async def jobs(self, **kwargs) -> list:
+        return await self.run(self.job_service.jobs, **kwargs)
+
+    async def job(self, **kwargs) -> dict:
+        return await self.run(self.job_service.job, **kwargs)
+
+    async def export_expense(self, **kwargs):
+        session = self.sessionmaker()
+        try:
+            statement = await self.database.run(session, self.service.export_statement, **kwargs)
+        except Exception:
+            await session.close()
+            raise
+        return self.stream_rows(session, statement)
+
+    async def stream_rows(self, session, statement):
+        try:
+            result = await session.stream_scalars(statement)
+            async for expense in result:
+                yield expense
+        finally:
+            await session.close()
+
+
+class AsyncAuthManager:
+    """Awaitable counterpart of AuthManager; hashing runs off the event loop."""
+
+    def __init__(self, sessionmaker):
+        self.sessionmaker = sessionmaker
+
+    class UserExceptions(Exception):
+        pass
+
+    async def find_user(self, session, email: str):
+        return (await session.execute(
+            db.select(UserModel).where(UserModel.email == email)
+        )).scalar()
+
+    async def login_user(self, password: str, email: str) -> UserModel:
+        if not email:
+            raise self.UserExceptions("User cannot be logged in — email is missing.")
+        if not password:
+            raise self.UserExceptions("User cannot be logged in — password is missing.")
+
+        async with self.sessionmaker() as session:
+            try:
+                existing_user = await self.find_user(session, email)
+                if not existing_user:
+                    raise self.UserExceptions("User does not exist — please sign up first.")
+
+                if not await asyncio.to_thread(password_hasher.verify, existing_user.password, password):
+                    raise self.UserExceptions("Password is incorrect.")
+
+                if password_hasher.needs_rehash(existing_user.password):
+                    existing_user.password = await asyncio.to_thread(password_hasher.hash, password)
+
+                existing_user.updatedAt = datetime.utcnow()
+                await session.commit()
+                return existing_user
+            except (self.UserExceptions, password_hasher.PasswordHasherBusy):
+                await session.rollback()
+                raise
+            except Exception as e:
+                await session.rollback()
+                raise self.UserExceptions(f"error in login the user: {str(e)}")
+
+    async def create_user(self, username: str, password: str, email: str) -> UserModel:
+        if not username:
+            raise self.UserExceptions("User cannot be created — username is missing.")
+        if not password:
+            raise self.UserExceptions("User cannot be created — password is missing.")
+        if not email:
+            raise self.UserExceptions("User cannot be created — email is missing.")
+
+        async with self.sessionmaker() as session:
+            if await self.find_user(session, email):
+                raise self.UserExceptions("User already exists — please log in instead.")
+
+            try:
+                hashed_password = await asyncio.to_thread(password_hasher.hash, password)
+                user = UserModel(
+                    username=username,
+                    email=email,
+                    password=hashed_password,
+                    createdAt=datetime.utcnow(),
+                    updatedAt=datetime.utcnow()
+                )
+                session.add(user)
+                await session.commit()
+                user_id_cache.invalidate(email)
+                return user
+            except password_hasher.PasswordHasherBusy:
+                await session.rollback()
+                raise
+            except Exception as e:
+                await session.rollback()
+                raise self.UserExceptions(f"Error creating user: {str(e)}")
+
+
+class AsyncTokenBlocklist:
+    def __init__(self, sessionmaker, backend: str = "memory", max_entries: int = 100_000, cache_ttl: float = 5.0,
+                 cache_size: int = 10_000, token_lifetime: float = 30 * 86400):
+        self.sessionmaker = sessionmaker
+        self.database = RunSyncDatabase()
+        self.token_lifetime = token_lifetime
+        if backend == "memory":
+            self.store = MemoryRevocationStore(max_entries=max_entries)
+        elif backend == "database":
+            self.store = DatabaseRevocationStore(cache_ttl=cache_ttl, cache_size=cache_size, database=self.database)
+        else:
+            raise ValueError(f"unknown REVOCATION_STORE {backend!r}, use memory or database")
+
+    async def run(self, function, **kwargs):
+        if isinstance(self.store, MemoryRevocationStore):
+            return function(**kwargs)
+        async with self.sessionmaker() as session:
+            return await self.database.run(session, function, **kwargs)
+
+    async def revoke(self, jwt_payload: dict):
+        await self.run(self.store.revoke, jti=jwt_payload["jti"], expires_at=float(jwt_payload["exp"]))
+
+    async def revoke_subject(self, subject: str):
+        now = time.time()
+        await self.run(self.store.revoke_subject, subject=subject, issued_before=now, expires_at=now + self.token_lifetime)
+
+    async def is_revoked(self, jwt_payload: dict) -> bool:
+        return await self.run(self.store.is_revoked, jti=jwt_payload["jti"]) or await self.run(
+            self.store.is_subject_revoked, subject=jwt_payload["sub"], issued_at=float(jwt_payload.get("iat", 0))
+        )
@@ -1,12 +1,13 @@
 from models.user_model import UserModel
 from extension import db
+from service.user_cache import user_id_cache
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from service.password_hasher import password_hasher
 
 
 class AuthManager:
-    def __init__(self):
-        self.db = db
+    def __init__(self, database=db):
+        self.db = database
 
     class UserExceptions(Exception):
         pass
@@ -18,19 +19,25 @@ class AuthManager:
             if not password:
                 raise self.UserExceptions("User cannot be logged in — password is missing.")
 
-            existing_user = UserModel.query.filter_by(email=email).first()
+            existing_user = self.db.session.query(UserModel).filter_by(email=email).first()
             if not existing_user:
                 raise self.UserExceptions("User does not exist — please sign up first.")
 
-            if not check_password_hash(existing_user.password, password):
+            if not password_hasher.verify(existing_user.password, password):
                 raise self.UserExceptions("Password is incorrect.")
 
+            if password_hasher.needs_rehash(existing_user.password):
+                existing_user.password = password_hasher.hash(password)
+
             existing_user.updatedAt = datetime.utcnow()
             self.db.session.commit()  
             return existing_user
+        except (self.UserExceptions, password_hasher.PasswordHasherBusy):
+            self.db.session.rollback()
+            raise
         except Exception as e:
             self.db.session.rollback()
-            self.UserExceptions("error in login the user")
+            raise self.UserExceptions(f"error in login the user: {str(e)}")
 
     def create_user(self, username: str, password: str, email: str) -> UserModel:
         if not username:
@@ -40,12 +47,12 @@ class AuthManager:
         if not email:
             raise self.UserExceptions("User cannot be created — email is missing.")
 
-        existing_user = UserModel.query.filter_by(email=email).first()
+        existing_user = self.db.session.query(UserModel).filter_by(email=email).first()
         if existing_user:
             raise self.UserExceptions("User already exists — please log in instead.")
 
         try:
-            hashed_password = generate_password_hash(password)
+            hashed_password = password_hasher.hash(password)
             user = UserModel(
                 username=username,
                 email=email,
@@ -56,8 +63,12 @@ class AuthManager:
 
             self.db.session.add(user)
             self.db.session.commit()
+            user_id_cache.invalidate(email)
 
             return user
+        except password_hasher.PasswordHasherBusy:
+            self.db.session.rollback()
+            raise
         except Exception as e:
             self.db.session.rollback()
             raise self.UserExceptions(f"Error creating user: {str(e)}")
@@ -0,0 +1,177 @@
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from threading import Event, Lock, Thread
+import atexit
+import json
+import logging
+import queue
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the alerts of the open transaction.
+PENDING_ALERTS = "budget_alerts"
+
+
+class AlertQueue:
+    """In-process sink keeping the most recent alerts, newest last."""
+
+    def __init__(self, max_size: int = 1000):
+        self.alerts = deque(maxlen=max(max_size, 1))
+        self.lock = Lock()
+
+    def __call__(self, alerts: list):
+        with self.lock:
+            self.alerts.extend(alerts)
+
+    def recent(self, user_id: str) -> list:
+        with self.lock:
+            return [alert for alert in self.alerts if alert["user_id"] == user_id]
+
+
+class WebhookSink:
+    """POSTs alerts as a JSON array from a background thread.
+
+    Writers only enqueue; when max_size alerts are waiting, new ones are
+    dropped and counted rather than slowing down the write path.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0, max_size: int = 1000):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max(max_size, 1))
+        self.stopping = Event()
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.sender = Thread(target=self.run, name="budget-webhook", daemon=True)
+        self.sender.start()
+
+    def __call__(self, alerts: list):
+        for alert in alerts:
+            try:
+                self.queue.put_nowait(alert)
+            except queue.Full:
+                self.dropped += 1
+
+    def take_batch(self) -> list:
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(batch) < 100:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def send(self, batch: list):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(batch).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+            self.delivered += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning("delivering %d budget alerts to %s failed: %s", len(batch), self.url, e)
+
+    def run(self):
+        while not self.stopping.is_set() or not self.queue.empty():
+            batch = self.take_batch()
+            if batch:
+                self.send(batch)
+
+    def shutdown(self, timeout: float = 5.0):
+        self.stopping.set()
+        self.sender.join(timeout=timeout)
+
+
+class BudgetNotifier:
+    """Fans budget threshold alerts out to sinks once their write has committed.
+
+    Sinks are callables taking a list of alerts. The in-process AlertQueue
+    is always installed, a WebhookSink when BUDGET_WEBHOOK_URL is set, and
+    add_sink plugs in anything else.
+    """
+
+    def __init__(self, thresholds: tuple = (80, 100), queue_size: int = 1000):
+        self.thresholds = thresholds
+        self.alert_queue = AlertQueue(queue_size)
+        self.webhook = None
+        self.sinks = [self.alert_queue]
+        self.published = 0
+
+    class BudgetNotifierException(Exception):
+        pass
+
+    def init_app(self, app):
+        self.shutdown()
+        thresholds = str(app.config.get("BUDGET_ALERT_THRESHOLDS", "80,100"))
+        try:
+            self.thresholds = tuple(sorted({int(value) for value in thresholds.split(",") if value.strip()}))
+        except ValueError:
+            raise self.BudgetNotifierException(
+                f"BUDGET_ALERT_THRESHOLDS must be comma separated percentages, got {thresholds!r}"
+            )
+        queue_size = int(app.config.get("BUDGET_ALERT_QUEUE_SIZE", 1000))
+        self.alert_queue = AlertQueue(queue_size)
+        self.sinks = [self.alert_queue]
+        if app.config.get("BUDGET_WEBHOOK_URL"):
+            self.webhook = WebhookSink(
+                app.config["BUDGET_WEBHOOK_URL"],
+                timeout=float(app.config.get("BUDGET_WEBHOOK_TIMEOUT", 2.0)),
+                max_size=queue_size
+            )
+            self.sinks.append(self.webhook)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def publish(self, alerts: list):
+        self.published += len(alerts)
+        for sink in self.sinks:
+            try:
+                sink(alerts)
+            except Exception:
+                logger.exception("budget alert sink %r failed", sink)
+
+    def shutdown(self):
+        if self.webhook is not None:
+            self.webhook.shutdown()
+            self.webhook = None
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP expense_api_budget_alerts_total Budget threshold alerts published.",
+            "# TYPE expense_api_budget_alerts_total counter",
+            f"expense_api_budget_alerts_total {self.published}",
+        ]
+        if self.webhook is not None:
+            lines += [
+                "# HELP expense_api_budget_webhook_alerts_total Budget alerts handed to the webhook by outcome.",
+                "# TYPE expense_api_budget_webhook_alerts_total counter",
+                f'expense_api_budget_webhook_alerts_total{{outcome="delivered"}} {self.webhook.delivered}',
+                f'expense_api_budget_webhook_alerts_total{{outcome="failed"}} {self.webhook.failed}',
+                f'expense_api_budget_webhook_alerts_total{{outcome="dropped"}} {self.webhook.dropped}',
+            ]
+        return "\n".join(lines) + "\n"
+
+
+budget_notifier = BudgetNotifier()
+atexit.register(budget_notifier.shutdown)
+
+
+@event.listens_for(Session, "after_commit")
+def publish_committed_alerts(session):
+    alerts = session.info.pop(PENDING_ALERTS, None)
+    if alerts:
+        budget_notifier.publish(alerts)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_rolled_back_alerts(session):
+    session.info.pop(PENDING_ALERTS, None)
@@ -0,0 +1,240 @@
+from extension import db
+from models.budget_model import BudgetModel, BudgetMonthTotalModel
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from service.budget_notifier import budget_notifier, PENDING_ALERTS
+from service.replica_router import replica_router
+from service.version_service import ExpenseVersionService
+from service.category_catalog import category_catalog
+from sqlalchemy.dialects import postgresql, sqlite
+from money import to_stored, from_stored
+from datetime import date, datetime
+
+
+class BudgetService:
+    """Monthly budgets per category and their month-to-date totals.
+
+    Totals are kept for budgeted categories only and are moved by the
+    per-day deltas the rollup maintenance already produces, so tracking a
+    write costs one budget lookup plus one upsert per budgeted month and
+    category, and never reads expenses. Crossing a threshold upwards queues
+    an alert that budget_notifier publishes after the commit.
+    """
+
+    def __init__(self, database=db, expenses=None):
+        self.db = database
+        self.expenses = expenses
+        self.versions = ExpenseVersionService(database)
+
+    class BudgetException(Exception):
+        pass
+
+    def month_start(self, day) -> date:
+        return date(day.year, day.month, 1)
+
+    def parse_month(self, month: str = None) -> date:
+        if not month:
+            return self.month_start(datetime.utcnow())
+        try:
+            return self.month_start(datetime.strptime(month, "%Y-%m"))
+        except ValueError:
+            raise self.BudgetException("month must look like YYYY-MM")
+
+    def insert(self):
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert
+        if dialect == "sqlite":
+            return sqlite.insert
+        raise self.BudgetException(f"budgets are not supported on {dialect}")
+
+    def add_to_total(self, user_id: str, month: date, category_id: int, delta) -> float:
+        """Move one month-to-date total by delta and return the new total."""
+        table = BudgetMonthTotalModel.__table__
+        statement = self.insert()(table).values(user_id=user_id, month=month, category_id=category_id, total=delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.month, table.c.category_id],
+            set_={"total": table.c.total + statement.excluded.total}
+        )
+        if self.db.session.get_bind().dialect.insert_returning:
+            return self.db.session.execute(statement.returning(table.c.total)).scalar()
+        self.db.session.execute(statement)
+        return self.db.session.execute(db.select(table.c.total).where(
+            table.c.user_id == user_id, table.c.month == month, table.c.category_id == category_id
+        )).scalar()
+
+    def track(self, user_id: str, deltas: dict):
+        """Apply {(day, category id): stored amount delta} of a write in the open transaction."""
+        months = {}
+        for (day, category), delta in deltas.items():
+            if delta:
+                key = (self.month_start(day), category)
+                months[key] = months.get(key, 0) + delta
+        if not months:
+            return
+
+        limits = dict(self.db.session.execute(
+            db.select(BudgetModel.category_id, BudgetModel.amount).where(
+                BudgetModel.user_id == user_id,
+                BudgetModel.category_id.in_({category for _, category in months})
+            )
+        ).all())
+        if not limits:
+            return
+
+        alerts = []
+        for (month, category), delta in months.items():
+            if category not in limits:
+                continue
+            limit = to_stored(limits[category])
+            total = self.add_to_total(user_id, month, category, delta)
+            for threshold in budget_notifier.thresholds:
+                line = limit * threshold / 100
+                if total - delta < line <= total:
+                    alerts.append({
+                        "user_id": user_id,
+                        "category": category_catalog.name(category),
+                        "month": month.strftime("%Y-%m"),
+                        "threshold": threshold,
+                        "budget": limits[category],
+                        "spent": from_stored(total),
+                        "at": datetime.utcnow().isoformat(),
+                    })
+        if alerts:
+            self.db.session.info.setdefault(PENDING_ALERTS, []).extend(alerts)
+
+    def rebuild(self, user_id: str = None, category_id: int = None) -> int:
+        """Recompute month-to-date totals of budgeted categories from the daily rollups.
+
+        Runs in the caller's transaction and does not commit.
+        """
+        delete = db.delete(BudgetMonthTotalModel)
+        source = db.select(
+            ExpenseDailyRollupModel.user_id,
+            ExpenseDailyRollupModel.day,
+            ExpenseDailyRollupModel.category_id,
+            ExpenseDailyRollupModel.total_amount
+        ).join(BudgetModel, db.and_(
+            BudgetModel.user_id == ExpenseDailyRollupModel.user_id,
+            BudgetModel.category_id == ExpenseDailyRollupModel.category_id
+        ))
+        if user_id:
+            delete = delete.where(BudgetMonthTotalModel.user_id == user_id)
+            source = source.where(ExpenseDailyRollupModel.user_id == user_id)
+        if category_id:
+            delete = delete.where(BudgetMonthTotalModel.category_id == category_id)
+            source = source.where(ExpenseDailyRollupModel.category_id == category_id)
+
+        totals = {}
+        for owner, day, cell_category, total in self.db.session.execute(source):
+            key = (owner, self.month_start(day), cell_category)
+            totals[key] = totals.get(key, 0) + total
+        self.db.session.execute(delete)
+        if totals:
+            self.db.session.execute(db.insert(BudgetMonthTotalModel), [
+                {"user_id": owner, "month": month, "category_id": cell_category, "total": total}
+                for (owner, month, cell_category), total in totals.items()
+            ])
+        return len(totals)
+
+    def set_budget(self, user_email: str, category: str, amount) -> dict:
+        if not user_email:
+            raise self.BudgetException("user email is missing")
+        if not category:
+            raise self.BudgetException("category of budget is missing")
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            raise self.BudgetException("amount must be a number")
+        if amount <= 0:
+            raise self.BudgetException("amount must be greater than 0")
+
+        try:
+            user_id = self.expenses.resolve_user_id(user_email)
+            category_id = category_catalog.resolve(category)
+            now = datetime.utcnow()
+            budget = self.db.session.get(BudgetModel, (user_id, category_id))
+            if budget is None:
+                self.db.session.add(BudgetModel(
+                    user_id=user_id, category_id=category_id, amount=amount, createdAt=now, updatedAt=now
+                ))
+                self.db.session.flush()
+                self.rebuild(user_id=user_id, category_id=category_id)
+            else:
+                budget.amount = amount
+                budget.updatedAt = now
+            self.versions.touch(user_id)
+            self.db.session.commit()
+            return self.budget_status(user_id, self.month_start(now), category_id=category_id)[0]
+        except self.expenses.ExpenseException:
+            self.db.session.rollback()
+            raise
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.BudgetException(f"Failed to set budget: {str(e)}")
+
+    def delete_budget(self, user_email: str, category: str) -> bool:
+        if not user_email:
+            raise self.BudgetException("user email is missing")
+        if not category:
+            raise self.BudgetException("category of budget is missing")
+
+        try:
+            user_id = self.expenses.resolve_user_id(user_email)
+            category_id = category_catalog.resolve(category)
+            deleted = self.db.session.execute(db.delete(BudgetModel).where(
+                BudgetModel.user_id == user_id, BudgetModel.category_id == category_id
+            )).rowcount
+            self.db.session.execute(db.delete(BudgetMonthTotalModel).where(
+                BudgetMonthTotalModel.user_id == user_id, BudgetMonthTotalModel.category_id == category_id
+            ))
+            self.versions.touch(user_id)
+            self.db.session.commit()
+            return deleted > 0
+        except self.expenses.ExpenseException:
+            self.db.session.rollback()
+            raise
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.BudgetException(f"Failed to delete budget: {str(e)}")
+
+    def budget_status(self, user_id: str, month: date, category_id: int = None) -> list:
+        statement = db.select(BudgetModel.category_id, BudgetModel.amount, BudgetMonthTotalModel.total).outerjoin(
+            BudgetMonthTotalModel, db.and_(
+                BudgetMonthTotalModel.user_id == BudgetModel.user_id,
+                BudgetMonthTotalModel.category_id == BudgetModel.category_id,
+                BudgetMonthTotalModel.month == month
+            )
+        ).where(BudgetModel.user_id == user_id)
+        if category_id:
+            statement = statement.where(BudgetModel.category_id == category_id)
+
+        budgets = []
+        for budget_category, amount, total in self.db.session.execute(replica_router.for_user(statement, user_id)):
+            spent = from_stored(total) or 0
+            budgets.append({
+                "category": category_catalog.name(budget_category),
+                "month": month.strftime("%Y-%m"),
+                "budget": amount,
+                "spent": spent,
+                "remaining": round(amount - spent, 2),
+                "percent": round(spent * 100 / amount, 1),
+            })
+        return sorted(budgets, key=lambda budget: budget["category"])
+
+    def budgets(self, user_email: str, month: str = None) -> list:
+        """Every budget of the user with its spend in month (default: the current one)."""
+        if not user_email:
+            raise self.BudgetException("user email is missing")
+        month = self.parse_month(month)
+        try:
+            return self.budget_status(self.expenses.resolve_user_id(user_email), month)
+        except self.expenses.ExpenseException:
+            raise
+        except Exception as e:
+            raise self.BudgetException(f"Failed to read budgets: {str(e)}")
+
+    def alerts(self, user_email: str) -> list:
+        """Recent alerts of the user held by this process's in-process queue."""
+        if not user_email:
+            raise self.BudgetException("user email is missing")
+        return budget_notifier.alert_queue.recent(self.expenses.resolve_user_id(user_email))
@@ -0,0 +1,131 @@
+from extension import db
+from models.category_model import CategoryModel, CategoryAliasModel
+from sqlalchemy.exc import SQLAlchemyError
+from threading import Lock
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# (id, name, extra aliases). The ids are stored in expenses: never renumber
+# them, and give a new built-in category an id below FIRST_CUSTOM_ID.
+BUILTIN_CATEGORIES = (
+    (1, "groceries", ("grocery",)),
+    (2, "leisure", ()),
+    (3, "electronics", ("electronic",)),
+    (4, "utilities", ("utility",)),
+    (5, "clothing", ("clothes",)),
+    (6, "health", ()),
+    (7, "others", ("other",)),
+)
+OTHERS = 7
+FIRST_CUSTOM_ID = 101
+MAX_CATEGORY_ID = 32767
+# Distinct raw spellings remembered per process; clients send a handful.
+MAX_SPELLINGS = 10_000
+MISSING = object()
+
+
+def normalize(name) -> str:
+    """The lookup key of a category name or alias: trimmed, single-spaced and lower case."""
+    return " ".join(str(name).split()).lower()
+
+
+class CategoryCatalog:
+    """Per-process lookup of category alias -> id and id -> name.
+
+    Starts out with the built-in categories and loads the categories
+    tables at startup. Each raw spelling is normalized once and then
+    resolved by one dict lookup. A name no alias matches reloads the tables
+    at most every reload_interval seconds, to pick up categories other
+    processes created, and otherwise resolves to others as before. The
+    dicts are replaced rather than changed in place, so lookups take no
+    lock.
+    """
+
+    def __init__(self, reload_interval: float = 10.0):
+        self.reload_interval = reload_interval
+        self.engine = None
+        self.lock = Lock()
+        self.reset()
+
+    def init_app(self, app):
+        self.reload_interval = float(app.config.get("CATEGORY_RELOAD_INTERVAL", self.reload_interval))
+        self.reset()
+        # Loads use their own connection, so they work the same under
+        # Flask, the ASGI app and the CLI.
+        with app.app_context():
+            self.engine = db.engine
+        self.load()
+
+    def reset(self):
+        self.ids = {
+            alias: category_id for category_id, name, aliases in BUILTIN_CATEGORIES for alias in (name, *aliases)
+        }
+        self.names = {category_id: name for category_id, name, _ in BUILTIN_CATEGORIES}
+        self.spellings = {}
+        self.loaded_at = None
+
+    def stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.reload_interval
+
+    def load(self) -> bool:
+        """Replace the lookup with the tables' contents; False when they cannot be read (yet)."""
+        self.loaded_at = time.monotonic()
+        if self.engine is None:
+            return False
+        try:
+            with self.engine.connect() as connection:
+                names = dict(connection.execute(db.select(CategoryModel.id, CategoryModel.name)).all())
+                ids = dict(connection.execute(db.select(CategoryAliasModel.alias, CategoryAliasModel.category_id)).all())
+        except SQLAlchemyError as e:
+            # Before `flask init-db` or `flask migrate-categories`; the built-ins still resolve.
+            logger.debug("category tables not readable, using the built-in categories: %s", e)
+            return False
+        self.names = {**self.names, **names}
+        self.ids = {**self.ids, **ids}
+        return True
+
+    def add(self, category_id: int, name: str, aliases):
+        """Make a category this process just stored resolvable right away."""
+        with self.lock:
+            self.names = {**self.names, category_id: name}
+            self.ids = {**self.ids, **{alias: category_id for alias in aliases}}
+            self.spellings = {}
+
+    def find(self, name):
+        """Id of the category called name or aliased by it, or None."""
+        name = name if isinstance(name, str) else str(name)
+        category_id = self.spellings.get(name, MISSING)
+        # Unknown spellings are looked at again once the tables may have changed.
+        if category_id is not MISSING and (category_id is not None or not self.stale()):
+            return category_id
+        key = normalize(name)
+        category_id = self.ids.get(key)
+        if category_id is None and self.stale():
+            with self.lock:
+                if self.stale():
+                    self.load()
+            category_id = self.ids.get(key)
+        if len(self.spellings) >= MAX_SPELLINGS:
+            self.spellings = {}
+        self.spellings[name] = category_id
+        return category_id
+
+    def resolve(self, name) -> int:
+        """Id of the category for name; names no category is known by are others."""
+        category_id = self.find(name)
+        return OTHERS if category_id is None else category_id
+
+    def name(self, category_id: int) -> str:
+        name = self.names.get(category_id)
+        if name is None:
+            # Ids come from the categories table, so an unknown one was
+            # created by another process since the last load.
+            with self.lock:
+                self.load()
+            name = self.names.get(category_id, str(category_id))
+        return name
+
+
+category_catalog = CategoryCatalog()
@@ -0,0 +1,161 @@
+from extension import db
+from models.expense_model import ExpenseModel
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from models.budget_model import BudgetModel, BudgetMonthTotalModel
+from models.category_model import CategoryModel, CategoryAliasModel
+from service.rollup_service import RollupService
+from service.budget_service import BudgetService
+from service.category_service import CategoryService
+from service.category_catalog import category_catalog
+
+# The free-text column expenses and budgets had before category ids.
+LEGACY_COLUMN = "category"
+IN_LIST_SIZE = 1000
+
+
+class CategoryMigration:
+    """Moves an existing database from free-text categories to category ids.
+
+    Creates and seeds the categories tables, adds expenses.category_id and
+    fills it from the old text in batches, which also folds spellings like
+    'Clothing' and 'clothing' into one category, then drops the text
+    column. Budgets are carried over to ids, the rollup and budget total
+    tables are recreated and rebuilt. Safe to re-run; only expenses without
+    an id are touched.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+
+    class CategoryMigrationException(Exception):
+        pass
+
+    def columns(self, table_name: str) -> set:
+        return {column["name"] for column in db.inspect(self.db.engine).get_columns(table_name)}
+
+    def create_tables(self) -> int:
+        for model in (CategoryModel, CategoryAliasModel):
+            model.__table__.create(self.db.engine, checkfirst=True)
+        CategoryService(self.db).install()
+        return self.db.session.execute(db.select(db.func.count()).select_from(CategoryModel)).scalar()
+
+    def add_column(self) -> bool:
+        if "category_id" in self.columns(ExpenseModel.__tablename__):
+            return False
+        with self.db.engine.begin() as connection:
+            connection.execute(db.text(
+                f"ALTER TABLE {ExpenseModel.__tablename__} ADD COLUMN category_id SMALLINT REFERENCES categories (id)"
+            ))
+        return True
+
+    def backfill(self, batch_size: int = 10_000) -> int:
+        """Set category_id from the text column, walking expenses in id order."""
+        if LEGACY_COLUMN not in self.columns(ExpenseModel.__tablename__):
+            return 0
+        legacy = db.table(ExpenseModel.__tablename__, db.column("id"), db.column(LEGACY_COLUMN), db.column("category_id"))
+        migrated, last = 0, None
+        while True:
+            statement = db.select(legacy.c.id, legacy.c.category).where(legacy.c.category_id.is_(None))
+            if last is not None:
+                statement = statement.where(legacy.c.id > last)
+            rows = self.db.session.execute(statement.order_by(legacy.c.id).limit(batch_size)).all()
+            if not rows:
+                return migrated
+            # A few distinct names per batch, so one UPDATE per category instead of one per row.
+            by_category = {}
+            for expense_id, name in rows:
+                by_category.setdefault(category_catalog.resolve(name or ""), []).append(expense_id)
+            for category_id, expense_ids in by_category.items():
+                for start in range(0, len(expense_ids), IN_LIST_SIZE):
+                    self.db.session.execute(
+                        db.update(legacy).where(legacy.c.id.in_(expense_ids[start:start + IN_LIST_SIZE]))
+                        .values(category_id=category_id)
+                    )
+            self.db.session.commit()
+            migrated += len(rows)
+            last = rows[-1][0]
+
+    def retire_column(self) -> bool:
+        if LEGACY_COLUMN not in self.columns(ExpenseModel.__tablename__):
+            return False
+        table = ExpenseModel.__tablename__
+        with self.db.engine.begin() as connection:
+            missing = connection.execute(db.text(f"SELECT count(*) FROM {table} WHERE category_id IS NULL")).scalar()
+            if missing:
+                raise self.CategoryMigrationException(
+                    f"{missing} expenses were written without a category id during the migration, run it again"
+                )
+            if connection.dialect.name == "postgresql":
+                # SQLite cannot add NOT NULL to an existing column; new databases get it from the model.
+                connection.execute(db.text(f"ALTER TABLE {table} ALTER COLUMN category_id SET NOT NULL"))
+            connection.execute(db.text(f"ALTER TABLE {table} DROP COLUMN {LEGACY_COLUMN}"))
+        return True
+
+    def migrate_budgets(self) -> int:
+        """Move budgets to a table keyed by category id, keeping the latest where two names fold into one.
+
+        The old table is renamed first and dropped only after its rows are
+        copied, so a failed run leaves it for the next one.
+        """
+        table = BudgetModel.__table__
+        legacy_name = f"{table.name}_legacy"
+        if legacy_name not in db.inspect(self.db.engine).get_table_names():
+            if LEGACY_COLUMN not in self.columns(table.name):
+                return 0
+            with self.db.engine.begin() as connection:
+                connection.execute(db.text(f"ALTER TABLE {table.name} RENAME TO {legacy_name}"))
+                if connection.dialect.name == "postgresql":
+                    connection.execute(db.text(
+                        f"ALTER INDEX IF EXISTS {table.name}_pkey RENAME TO {legacy_name}_pkey"
+                    ))
+        legacy = db.table(
+            legacy_name, db.column("user_id"), db.column(LEGACY_COLUMN), db.column("amount"),
+            db.column("createdAt", db.DateTime), db.column("updatedAt", db.DateTime)
+        )
+        with self.db.engine.begin() as connection:
+            budgets = {}
+            for row in connection.execute(db.select(legacy).order_by(legacy.c.updatedAt)):
+                budgets[(row.user_id, category_catalog.resolve(row.category or ""))] = row
+            table.create(connection, checkfirst=True)
+            connection.execute(db.delete(table))
+            if budgets:
+                connection.execute(db.insert(table), [
+                    {"user_id": user_id, "category_id": category_id, "amount": row.amount,
+                     "createdAt": row.createdAt, "updatedAt": row.updatedAt}
+                    for (user_id, category_id), row in budgets.items()
+                ])
+        with self.db.engine.begin() as connection:
+            connection.execute(db.text(f"DROP TABLE {legacy_name}"))
+        return len(budgets)
+
+    def recreate_with_ids(self, table):
+        if "category_id" not in self.columns(table.name):
+            table.drop(self.db.engine, checkfirst=True)
+            table.create(self.db.engine)
+
+    def rebuild_rollups(self) -> int:
+        self.recreate_with_ids(ExpenseDailyRollupModel.__table__)
+        rows = RollupService(self.db).rebuild()
+        self.recreate_with_ids(BudgetMonthTotalModel.__table__)
+        BudgetService(self.db).rebuild()
+        self.db.session.commit()
+        return rows
+
+    def run(self, batch_size: int = 10_000) -> dict:
+        try:
+            categories = self.create_tables()
+            added = self.add_column()
+            migrated = self.backfill(batch_size=batch_size)
+            dropped = self.retire_column()
+            budgets = self.migrate_budgets()
+            rollups = self.rebuild_rollups()
+            category_catalog.load()
+            return {
+                "categories": categories, "added_column": added, "migrated_rows": migrated,
+                "dropped_column": dropped, "budgets": budgets, "rollup_rows": rollups,
+            }
+        except self.CategoryMigrationException:
+            raise
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.CategoryMigrationException(f"Failed to migrate categories: {str(e)}")
@@ -0,0 +1,94 @@
+from extension import db
+from models.category_model import CategoryModel, CategoryAliasModel
+from service.category_catalog import (
+    category_catalog, normalize, BUILTIN_CATEGORIES, FIRST_CUSTOM_ID, MAX_CATEGORY_ID
+)
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+MAX_NAME_LENGTH = 64
+MAX_ALIASES = 20
+
+
+class CategoryService:
+    """The categories table behind category_catalog: listing, custom categories and the built-in seed."""
+
+    def __init__(self, database=db):
+        self.db = database
+
+    class CategoryException(Exception):
+        pass
+
+    def install(self):
+        """Insert the built-in categories and aliases that are missing; run by `flask init-db`."""
+        existing = set(self.db.session.execute(db.select(CategoryModel.id)).scalars())
+        aliases = set(self.db.session.execute(db.select(CategoryAliasModel.alias)).scalars())
+        now = datetime.utcnow()
+        for category_id, name, extra in BUILTIN_CATEGORIES:
+            if category_id not in existing:
+                self.db.session.add(CategoryModel(id=category_id, name=name, builtin=True, createdAt=now))
+        self.db.session.flush()
+        for category_id, name, extra in BUILTIN_CATEGORIES:
+            for alias in (name, *extra):
+                if alias not in aliases:
+                    self.db.session.add(CategoryAliasModel(alias=alias, category_id=category_id))
+        self.db.session.commit()
+        category_catalog.load()
+
+    def categories(self) -> list:
+        aliases = {}
+        for alias, category_id in self.db.session.execute(
+            db.select(CategoryAliasModel.alias, CategoryAliasModel.category_id).order_by(CategoryAliasModel.alias)
+        ):
+            aliases.setdefault(category_id, []).append(alias)
+        return [
+            {"id": category_id, "name": name, "builtin": builtin, "aliases": aliases.get(category_id, [])}
+            for category_id, name, builtin in self.db.session.execute(
+                db.select(CategoryModel.id, CategoryModel.name, CategoryModel.builtin).order_by(CategoryModel.id)
+            )
+        ]
+
+    def keys(self, name, aliases) -> list:
+        if not isinstance(name, str) or not normalize(name):
+            raise self.CategoryException("category name is missing")
+        if aliases is None:
+            aliases = []
+        if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+            raise self.CategoryException("aliases must be a list of strings")
+        if len(aliases) > MAX_ALIASES:
+            raise self.CategoryException(f"a category can have at most {MAX_ALIASES} aliases")
+        keys = list(dict.fromkeys(key for key in map(normalize, [name, *aliases]) if key))
+        if any(len(key) > MAX_NAME_LENGTH for key in keys):
+            raise self.CategoryException(f"names and aliases can be at most {MAX_NAME_LENGTH} characters")
+        return keys
+
+    def create_category(self, name: str, aliases: list = None) -> dict:
+        """Store a custom category, recognised by its name and aliases from then on."""
+        keys = self.keys(name, aliases)
+        try:
+            taken = self.db.session.execute(
+                db.select(CategoryAliasModel.alias).where(CategoryAliasModel.alias.in_(keys))
+            ).scalars().all()
+            if taken:
+                raise self.CategoryException(f"already used by another category: {', '.join(sorted(taken))}")
+            last = self.db.session.execute(db.select(db.func.max(CategoryModel.id))).scalar() or 0
+            category_id = max(last + 1, FIRST_CUSTOM_ID)
+            if category_id > MAX_CATEGORY_ID:
+                raise self.CategoryException(f"no more than {MAX_CATEGORY_ID} categories can be stored")
+
+            self.db.session.add(CategoryModel(id=category_id, name=keys[0], builtin=False, createdAt=datetime.utcnow()))
+            self.db.session.flush()
+            self.db.session.add_all([CategoryAliasModel(alias=key, category_id=category_id) for key in keys])
+            self.db.session.commit()
+        except self.CategoryException:
+            self.db.session.rollback()
+            raise
+        except IntegrityError:
+            # Another process took the id or one of the aliases in the meantime.
+            self.db.session.rollback()
+            raise self.CategoryException("the category could not be stored, please try again")
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.CategoryException(f"Failed to create category: {str(e)}")
+        category_catalog.add(category_id, keys[0], keys)
+        return {"id": category_id, "name": keys[0], "builtin": False, "aliases": sorted(keys)}
@@ -0,0 +1,138 @@
+from extension import db
+from models.user_model import UserModel
+from models.expense_model import ExpenseModel
+from models.expense_archive_model import ExpenseArchiveModel
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from service.version_service import ExpenseVersionService
+from service.budget_service import BudgetService
+from service.rollup_service import RollupService
+from service.job_service import RETENTION
+from json_provider import dumps
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+import zlib
+
+# Users looked at per chunk while searching for the next one with expenses to archive.
+USER_PAGE_SIZE = 500
+IN_LIST_SIZE = 500
+
+
+class ExpenseRetention:
+    """Job moving expenses created before a cutoff into expense_archives, one user and chunk at a time.
+
+    A chunk is the user's next batch_size expenses in (createdAt, id)
+    order after the job's cursor, and is deleted from expenses and stored
+    as one compressed archive row in the same transaction. The rollup
+    cells of the days the chunk covers in full are deleted, like detaching
+    a partition, and the chunk's first and last day are recomputed, as
+    another chunk may hold the rest of them; the budget totals are lowered
+    and the user's expense version is bumped.
+    """
+
+    kind = RETENTION
+
+    def __init__(self, database=db):
+        self.db = database
+        self.versions = ExpenseVersionService(self.db)
+        self.budgets = BudgetService(self.db)
+        self.rollups = RollupService(self.db)
+
+    class RetentionException(Exception):
+        pass
+
+    class ChunkConflict(RetentionException):
+        """Rows of the chunk changed under the job; the chunk is rolled back and retried."""
+
+    def total(self, params: dict) -> int:
+        """Expenses to archive, counted from the daily rollups rather than by scanning expenses."""
+        before = datetime.fromisoformat(params["before"])
+        return int(self.db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(ExpenseDailyRollupModel.count), 0))
+            .where(ExpenseDailyRollupModel.day < before.date())
+        ).scalar())
+
+    def has_expired(self, user_id: str, before: datetime) -> bool:
+        return self.db.session.execute(
+            db.select(ExpenseModel.id).where(ExpenseModel.user_id == user_id, ExpenseModel.createdAt < before).limit(1)
+        ).first() is not None
+
+    def next_user(self, after, before: datetime):
+        """(user id with expenses to archive or None, last user looked at), looking at one page of users."""
+        statement = db.select(UserModel.id).order_by(UserModel.id).limit(USER_PAGE_SIZE)
+        if after is not None:
+            statement = statement.where(UserModel.id > after)
+        user_ids = self.db.session.execute(statement).scalars().all()
+        for user_id in user_ids:
+            if self.has_expired(user_id, before):
+                return user_id, user_id
+        return None, user_ids[-1] if user_ids else None
+
+    def chunk_rows(self, user_id: str, before: datetime, after, batch_size: int) -> list:
+        """The user's next batch_size expenses created before `before`, in (createdAt, id) order after the cursor."""
+        table = ExpenseModel.__table__
+        statement = db.select(table).where(table.c.user_id == user_id, table.c.createdAt < before)
+        if after:
+            statement = statement.where(db.tuple_(table.c.createdAt, table.c.id) > (datetime.fromisoformat(after[0]), after[1]))
+        return self.db.session.execute(
+            statement.order_by(table.c.createdAt, table.c.id).limit(batch_size)
+        ).mappings().all()
+
+    def archive(self, user_id: str, rows: list) -> int:
+        table = ExpenseModel.__table__
+        first, last = rows[0]["createdAt"], rows[-1]["createdAt"]
+        ids = [row["id"] for row in rows]
+        deleted = 0
+        for start in range(0, len(ids), IN_LIST_SIZE):
+            deleted += self.db.session.execute(db.delete(table).where(
+                table.c.user_id == user_id,
+                table.c.createdAt >= first,
+                table.c.createdAt <= last,
+                table.c.id.in_(ids[start:start + IN_LIST_SIZE])
+            )).rowcount
+        if deleted != len(rows):
+            raise self.ChunkConflict(f"expected to archive {len(rows)} expenses of {user_id}, deleted {deleted}")
+
+        self.db.session.add(ExpenseArchiveModel(
+            user_id=user_id, first_created=first, last_created=last, count=len(rows),
+            payload=zlib.compress(dumps([dict(row) for row in rows])), createdAt=datetime.utcnow()
+        ))
+
+        # The days between the first and the last are whole, so their cells only counted archived expenses.
+        rollups = ExpenseDailyRollupModel
+        inner = (rollups.user_id == user_id, rollups.day > first.date(), rollups.day < last.date())
+        cells = self.db.session.execute(
+            db.select(rollups.day, rollups.category_id, rollups.total_amount).where(*inner)
+        ).all()
+        self.db.session.execute(db.delete(rollups).where(*inner))
+        deltas = {(day, category_id): -total for day, category_id, total in cells}
+        deltas.update(self.rollups.refresh(user_id, {
+            (row["createdAt"].date(), row["category_id"]) for row in rows
+            if row["createdAt"].date() in (first.date(), last.date())
+        }))
+        self.budgets.track(user_id, deltas)
+        self.versions.bump(user_id)
+        return deleted
+
+    def step(self, params: dict, cursor, batch_size: int) -> tuple:
+        """Archive one chunk in the open transaction; returns (rows archived, next cursor, done)."""
+        before = datetime.fromisoformat(params["before"])
+        cursor = dict(cursor or {})
+        try:
+            user_id = cursor.get("user_id")
+            if user_id is None or not self.has_expired(user_id, before):
+                user_id, cursor["after"] = self.next_user(cursor.get("after"), before)
+                cursor["user_id"], cursor["expense"] = user_id, None
+                if user_id is None:
+                    return 0, cursor, cursor["after"] is None
+            rows = self.chunk_rows(user_id, before, cursor.get("expense"), batch_size)
+            if not rows:
+                # Only expenses before the cursor are left, written after the job passed them.
+                cursor["expense"] = None
+                return 0, cursor, False
+            archived = self.archive(user_id, rows)
+            cursor["expense"] = [rows[-1]["createdAt"].isoformat(), rows[-1]["id"]]
+            return archived, cursor, False
+        except (SQLAlchemyError, self.RetentionException):
+            raise
+        except Exception as e:
+            raise self.RetentionException(f"Failed to archive expenses: {str(e)}")
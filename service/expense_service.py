@@ -1,18 +1,39 @@
 from enum import Enum
 from extension import db
-from models.expense_model import ExpenseModel
+from models.expense_model import ExpenseModel, STORED_AMOUNT
 from models.user_model import UserModel
-from datetime import datetime, timedelta
-from copy import deepcopy
+from service.rollup_service import RollupService
+from service.budget_service import BudgetService
+from service.user_cache import user_id_cache
+from service.version_service import ExpenseVersionService
+from service.replica_router import replica_router
+from service.category_catalog import category_catalog
+from money import MINOR_UNITS, amount_columns, fold, from_stored, present
+from datetime import date, datetime, timedelta
+import base64
+import hashlib
+import uuid
 
-class Category(Enum):
-    GROCERIES = "Groceries"
-    LEISURE = "Leisure"
-    ELECTRONICS = "Electronics"
-    UTILITIES = "Utilities"
-    CLOTHING = "Clothing"
-    HEALTH = "Health"
-    OTHERS = "Others"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+BATCH_CHUNK_SIZE = 500
+EXPENSE_FIELDS = ("id", "title", "amount", "category", "description", "user_id", "createdAt", "updatedAt")
+if MINOR_UNITS:
+    EXPENSE_FIELDS += ("currency",)
+# Columns of a whole expense row as the API returns it.
+EXPENSE_COLUMNS = tuple(column for column in ExpenseModel.__table__.columns if column.name != "content_hash")
+
+
+def present_expense(row: dict) -> dict:
+    """Row as the API returns it: amount as in present, and the category by name instead of id."""
+    row = present(row)
+    if row is None or "category_id" not in row:
+        return row
+    row = dict(row)
+    row["category"] = category_catalog.name(row.pop("category_id"))
+    return row
 
 
 class ExpenseFilter(Enum):
@@ -21,29 +42,35 @@ class ExpenseFilter(Enum):
     LAST_THREE_MONTH = "last_three_month"
     CUSTOM = "custom"
 
+class SummaryBucket(Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
 class ExpenseService:
-    def __init__(self):
-        self.db = db
+    def __init__(self, database=db):
+        self.db = database
+        self.rollups = RollupService(self.db)
+        self.versions = ExpenseVersionService(self.db)
+        self.budgets = BudgetService(self.db, expenses=self)
 
     class ExpenseException(Exception):
         pass
 
-    def check_assign_category(self, category : str) -> str:
-        if category.lower() == Category.CLOTHING.value.lower():
-            return Category.CLOTHING.value
-        elif category.lower() == Category.GROCERIES.value.lower():
-            return Category.GROCERIES.value.lower()
-        elif category.lower() == Category.LEISURE.value.lower():
-            return Category.LEISURE.value.lower()
-        elif category.lower() == Category.ELECTRONICS.value.lower():
-            return Category.ELECTRONICS.value.lower()
-        elif category.lower() == Category.UTILITIES.value.lower():
-            return Category.UTILITIES.value.lower()
-        elif category.lower() == Category.HEALTH.value.lower():
-            return Category.HEALTH.value.lower()
-        else:
-            return Category.OTHERS.value.lower()
-        
+    class InvalidQuery(ExpenseException):
+        """A page, cursor, field list or date range the client sent that cannot be served."""
+
+    def resolve_user_id(self, user_email: str, missing_message: str = "user not found") -> str:
+        user_id = user_id_cache.get(user_email)
+        if user_id is None:
+            user_id = self.db.session.execute(
+                db.select(UserModel.id).where(UserModel.email == user_email)
+            ).scalar()
+            if not user_id:
+                raise self.ExpenseException(missing_message)
+            user_id_cache.set(user_email, user_id)
+        return user_id
+
     def check_assign_expense_filter(self, filter_category: str) -> str:
         if filter_category.lower() == ExpenseFilter.PAST_WEEK.value.lower():
             return ExpenseFilter.PAST_WEEK.value
@@ -56,67 +83,380 @@ class ExpenseService:
         else:
             return ExpenseFilter.PAST_WEEK.value
         
-    def filter_expense(self, user_email: str, expense_filter_category: str = None, from_date: str = None, to_date: str = None):
+    def resolve_date_range(self, expense_filter_category: str = None, from_date: str = None, to_date: str = None):
+        if not expense_filter_category:
+            expense_filter_category = ExpenseFilter.PAST_WEEK.value
+
+        expense_filter_category = self.check_assign_expense_filter(filter_category=expense_filter_category)
+
+        now = datetime.utcnow()
+        # Preset windows start on a whole minute so repeated polls within that
+        # minute cover the same range and can share an ETag.
+        window_end = now.replace(second=0, microsecond=0)
+
+        if expense_filter_category == ExpenseFilter.PAST_WEEK.value:
+            start_date = window_end - timedelta(days=7)
+            end_date = now
+        elif expense_filter_category == ExpenseFilter.PAST_MONTH.value:
+            start_date = window_end - timedelta(days=30)
+            end_date = now
+        elif expense_filter_category == ExpenseFilter.LAST_THREE_MONTH.value:
+            start_date = window_end - timedelta(days=90)
+            end_date = now
+        elif expense_filter_category == ExpenseFilter.CUSTOM.value:
+            if not from_date or not to_date:
+                raise self.InvalidQuery("from_date and to_date are required for custom filter")
+            try:
+                start_date = datetime.fromisoformat(from_date)
+                end_date = datetime.fromisoformat(to_date)
+            except ValueError:
+                raise self.InvalidQuery("Invalid date format. Use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)")
+        else:
+            start_date = window_end - timedelta(days=7)
+            end_date = now
+
+        return start_date, end_date
+
+    def resolve_fields(self, fields: str = None) -> tuple:
+        if not fields:
+            return EXPENSE_FIELDS
+        requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [field for field in requested if field not in EXPENSE_FIELDS]
+        if unknown or not requested:
+            raise self.InvalidQuery(f"fields must be a comma separated subset of {', '.join(EXPENSE_FIELDS)}")
+        return requested
+
+    def projected_column(self, field: str):
+        if field == "amount" and MINOR_UNITS:
+            return (db.cast(ExpenseModel.amount_cents, db.Float) / 100).label("amount")
+        if field == "category":
+            return ExpenseModel.category_id.label("category")
+        return getattr(ExpenseModel, field)
+
+    def name_categories(self, expenses: list) -> list:
+        """Replace the category ids of projected rows by names, in place."""
+        for expense in expenses:
+            if "category" in expense:
+                expense["category"] = category_catalog.name(expense["category"])
+        return expenses
+
+    def encode_cursor(self, expense: ExpenseModel) -> str:
+        raw = f"{expense.createdAt.isoformat()}|{expense.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            created_at, expense_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            return datetime.fromisoformat(created_at), expense_id
+        except (ValueError, UnicodeDecodeError):
+            raise self.InvalidQuery("invalid cursor, please send the next_cursor from the previous page")
+
+    def filter_etag(
+        self, user_email: str,
+        expense_filter_category: str = None,
+        from_date: str = None, to_date: str = None,
+        limit: int = None, after: str = None,
+        fields: str = None
+    ) -> str:
+        """Strong ETag of the filter_expense page for these arguments.
+
+        Built from the user's expense version and the resolved range, so it
+        costs one primary key lookup and never reads the expenses table.
+        Preset ranges end at the request time; anything created after the
+        previous request bumps the version anyway.
+        """
         if not user_email:
             raise self.ExpenseException("user email is missing")
 
         try:
-            user = UserModel.query.filter_by(email=user_email).first()
-            if not user:
-                raise self.ExpenseException("user not found")
+            user_id = self.resolve_user_id(user_email)
+            start_date, end_date = self.resolve_date_range(
+                expense_filter_category=expense_filter_category,
+                from_date=from_date,
+                to_date=to_date
+            )
+            if (expense_filter_category or "").lower() != ExpenseFilter.CUSTOM.value:
+                end_date = None
+            key = "|".join(str(part) for part in (
+                user_id, self.versions.current(user_id), start_date.isoformat(),
+                end_date.isoformat() if end_date else "",
+                limit or DEFAULT_PAGE_SIZE, after or "", ",".join(self.resolve_fields(fields))
+            ))
+            return hashlib.sha256(key.encode()).hexdigest()[:32]
+        except self.ExpenseException:
+            raise
+        except Exception as e:
+            raise self.ExpenseException(f"Failed to filter expenses: {str(e)}")
 
-            if not expense_filter_category:
-                expense_filter_category = ExpenseFilter.PAST_WEEK.value
+    def filter_statement(
+        self, user_id: str, start_date: datetime, end_date: datetime,
+        fields: tuple = EXPENSE_FIELDS, limit: int = DEFAULT_PAGE_SIZE, after: str = None
+    ):
+        """The page query of filter_expense; fetches one row more than limit."""
+        columns = tuple(dict.fromkeys(fields + ("createdAt", "id")))
+        statement = db.select(*[self.projected_column(column) for column in columns]).where(
+            ExpenseModel.user_id == user_id,
+            ExpenseModel.createdAt >= start_date,
+            ExpenseModel.createdAt <= end_date
+        )
+        if after:
+            statement = statement.where(
+                db.tuple_(ExpenseModel.createdAt, ExpenseModel.id) < self.decode_cursor(after)
+            )
+        return replica_router.for_user(statement.order_by(
+            ExpenseModel.createdAt.desc(),
+            ExpenseModel.id.desc()
+        ).limit(limit + 1), user_id)
 
-            expense_filter_category = self.check_assign_expense_filter(filter_category=expense_filter_category)
+    def filter_expense(
+        self, user_email: str,
+        expense_filter_category: str = None,
+        from_date: str = None, to_date: str = None,
+        limit: int = None, after: str = None,
+        fields: str = None
+    ) -> tuple:
+        """One page of expenses as plain dicts holding only the requested fields.
 
-            now = datetime.utcnow()
+        Selects the columns directly instead of loading ORM instances, so no
+        identity map or attribute instrumentation is involved per row.
+        """
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
 
-            if expense_filter_category == ExpenseFilter.PAST_WEEK.value:
-                start_date = now - timedelta(days=7)
-                end_date = now
-            elif expense_filter_category == ExpenseFilter.PAST_MONTH.value:
-                start_date = now - timedelta(days=30)
-                end_date = now
-            elif expense_filter_category == ExpenseFilter.LAST_THREE_MONTH.value:
-                start_date = now - timedelta(days=90)
-                end_date = now
-            elif expense_filter_category == ExpenseFilter.CUSTOM.value:
-                if not from_date or not to_date:
-                    raise self.ExpenseException("from_date and to_date are required for custom filter")
-                try:
-                    start_date = datetime.fromisoformat(from_date)
-                    end_date = datetime.fromisoformat(to_date)
-                except ValueError:
-                    raise self.ExpenseException("Invalid date format. Use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)")
-            else:
-                start_date = now - timedelta(days=7)
-                end_date = now
+        selected_fields = self.resolve_fields(fields)
 
-            expenses = ExpenseModel.query.filter(
-                ExpenseModel.user_id == user.id,
-                ExpenseModel.createdAt >= start_date,
-                ExpenseModel.createdAt <= end_date
-            ).order_by(ExpenseModel.createdAt.desc()).all()
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise self.InvalidQuery(f"limit must be between 1 and {MAX_PAGE_SIZE}")
 
-            return expenses
+        try:
+            user_id = self.resolve_user_id(user_email)
+
+            start_date, end_date = self.resolve_date_range(
+                expense_filter_category=expense_filter_category,
+                from_date=from_date,
+                to_date=to_date
+            )
+
+            rows = self.db.session.execute(self.filter_statement(
+                user_id, start_date, end_date, selected_fields, limit=limit, after=after
+            )).all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = self.encode_cursor(rows[-1])
 
+            width = len(selected_fields)
+            return self.name_categories([dict(zip(selected_fields, row[:width])) for row in rows]), next_cursor
+
+        except self.InvalidQuery:
+            raise
         except Exception as e:
             raise self.ExpenseException(f"Failed to filter expenses: {str(e)}")
 
         
-    def remove_expense(self, expense_id : str) -> ExpenseModel:
+    def export_statement(self, user_email: str, expense_filter_category: str = None, from_date: str = None, to_date: str = None):
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        try:
+            user_id = self.resolve_user_id(user_email)
+
+            start_date, end_date = self.resolve_date_range(
+                expense_filter_category=expense_filter_category,
+                from_date=from_date,
+                to_date=to_date
+            )
+
+            return replica_router.for_user(db.select(ExpenseModel).where(
+                ExpenseModel.user_id == user_id,
+                ExpenseModel.createdAt >= start_date,
+                ExpenseModel.createdAt <= end_date
+            ).order_by(
+                ExpenseModel.createdAt.asc(),
+                ExpenseModel.id.asc()
+            ).execution_options(yield_per=EXPORT_BATCH_SIZE), user_id)
+
+        except Exception as e:
+            raise self.ExpenseException(f"Failed to export expenses: {str(e)}")
+
+    def export_expense(self, user_email: str, expense_filter_category: str = None, from_date: str = None, to_date: str = None):
+        statement = self.export_statement(
+            user_email=user_email,
+            expense_filter_category=expense_filter_category,
+            from_date=from_date,
+            to_date=to_date
+        )
+        return self.stream_rows(statement)
+
+    def stream_rows(self, statement):
+        yield from self.db.session.execute(statement).scalars()
+
+    def bucket_start(self, day: date, bucket: str) -> date:
+        if bucket == SummaryBucket.MONTH.value:
+            return day.replace(day=1)
+        if bucket == SummaryBucket.WEEK.value:
+            return day - timedelta(days=day.weekday())
+        return day
+
+    def edge_daily_totals(self, user_id: str, start_date: datetime, end_date: datetime, inclusive: bool) -> list:
+        day_column = db.func.date(ExpenseModel.createdAt)
+        rows = self.db.session.execute(replica_router.for_user(
+            db.select(
+                day_column,
+                ExpenseModel.category_id,
+                db.func.sum(STORED_AMOUNT),
+                db.func.count(),
+                db.func.min(STORED_AMOUNT),
+                db.func.max(STORED_AMOUNT)
+            ).where(
+                ExpenseModel.user_id == user_id,
+                ExpenseModel.createdAt >= start_date,
+                ExpenseModel.createdAt <= end_date if inclusive else ExpenseModel.createdAt < end_date
+            ).group_by(day_column, ExpenseModel.category_id),
+            user_id
+        )).all()
+        return [
+            (day if isinstance(day, date) else date.fromisoformat(day), *rest)
+            for day, *rest in rows
+        ]
+
+    def summarize(
+        self, user_email: str,
+        expense_filter_category: str = None,
+        from_date: str = None, to_date: str = None,
+        bucket: str = None
+    ) -> dict:
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        bucket = (bucket or SummaryBucket.DAY.value).lower()
+        if bucket not in [member.value for member in SummaryBucket]:
+            raise self.ExpenseException("bucket must be one of day, week or month")
+
+        try:
+            user_id = self.resolve_user_id(user_email)
+
+            start_date, end_date = self.resolve_date_range(
+                expense_filter_category=expense_filter_category,
+                from_date=from_date,
+                to_date=to_date
+            )
+
+            # Whole days inside the range come from the rollup table, the
+            # partial days at either edge are aggregated from expenses.
+            first_full_day = start_date.date()
+            if start_date != self.rollups.day_start(first_full_day):
+                first_full_day += timedelta(days=1)
+            last_full_day = end_date.date() - timedelta(days=1)
+
+            if first_full_day > last_full_day:
+                daily = self.edge_daily_totals(user_id, start_date, end_date, inclusive=True)
+            else:
+                daily = self.rollups.daily_totals(user_id, first_full_day, last_full_day)
+                daily += self.edge_daily_totals(
+                    user_id, start_date, self.rollups.day_start(first_full_day), inclusive=False
+                )
+                daily += self.edge_daily_totals(
+                    user_id, self.rollups.day_start(last_full_day + timedelta(days=1)), end_date, inclusive=True
+                )
+
+            # Totals stay in stored units (whole cents in cents mode) until
+            # the response is built; categories stay ids until then as well.
+            daily_columns = [list(column) for column in zip(*daily)] or [[] for _ in range(6)]
+            buckets = fold(
+                [(self.bucket_start(day, bucket), category) for day, category in zip(*daily_columns[:2])],
+                *daily_columns[2:]
+            )
+            buckets = {
+                (bucket_day, category_catalog.name(category)): cell for (bucket_day, category), cell in buckets.items()
+            }
+            bucket_columns = [list(column) for column in zip(*buckets.values())] or [[] for _ in range(4)]
+            categories = fold([category for _, category in buckets], *bucket_columns)
+
+            by_bucket = [
+                {
+                    "bucket": bucket_day.isoformat(),
+                    "category": category,
+                    "total": from_stored(total),
+                    "count": count,
+                    "min": from_stored(minimum),
+                    "max": from_stored(maximum)
+                }
+                for (bucket_day, category), (total, count, minimum, maximum) in sorted(buckets.items())
+            ]
+            by_category = [
+                {
+                    "category": category,
+                    "total": from_stored(total),
+                    "count": count,
+                    "min": from_stored(minimum),
+                    "max": from_stored(maximum)
+                }
+                for category, (total, count, minimum, maximum) in sorted(categories.items())
+            ]
+            return {
+                "from_date": start_date.isoformat(),
+                "to_date": end_date.isoformat(),
+                "bucket": bucket,
+                "total": from_stored(sum(cell[0] for cell in categories.values())),
+                "count": sum(cell[1] for cell in categories.values()),
+                "by_category": by_category,
+                "by_bucket": by_bucket
+            }
+
+        except Exception as e:
+            raise self.ExpenseException(f"Failed to summarize expenses: {str(e)}")
+
+    def returning_supported(self, statement: str) -> bool:
+        return getattr(self.db.session.get_bind().dialect, f"{statement}_returning", False)
+
+    def owned_expense_row(self, expense_id: str, user_id: str):
+        return self.db.session.execute(
+            db.select(*EXPENSE_COLUMNS).where(
+                ExpenseModel.id == expense_id,
+                ExpenseModel.user_id == user_id
+            ).with_for_update()
+        ).first()
+
+    def remove_expense(self, expense_id : str, user_email: str) -> dict:
+        """Delete one of the user's expenses with a single DELETE ... RETURNING.
+
+        Returns the deleted row as a dict, or None when no expense with this
+        id belongs to the user.
+        """
         if not expense_id:
             raise self.ExpenseException("expense id is missing, please send valid one")
-        
+
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
         try:
-            expense = ExpenseModel.query.filter_by(id = expense_id).first()
-            if not expense:
-                raise self.ExpenseException("expense not found")
-            expense_cpy = deepcopy(expense)
-            self.db.session.delete(expense)
+            user_id = self.resolve_user_id(user_email)
+            statement = db.delete(ExpenseModel).where(
+                ExpenseModel.id == expense_id,
+                ExpenseModel.user_id == user_id
+            )
+            if self.returning_supported("delete"):
+                row = self.db.session.execute(
+                    statement.returning(*EXPENSE_COLUMNS),
+                    execution_options={"synchronize_session": False}
+                ).first()
+            else:
+                row = self.owned_expense_row(expense_id, user_id)
+                if row:
+                    self.db.session.execute(statement, execution_options={"synchronize_session": False})
+
+            if not row:
+                self.db.session.rollback()
+                return None
+
+            self.budgets.track(user_id, self.rollups.remove(user_id, [(row.createdAt, row.category_id, row.amount)]))
+            self.versions.bump(user_id)
             self.db.session.commit()
-            return expense_cpy
+            return present_expense(dict(row._mapping))
         except Exception as e:
             self.db.session.rollback()
             raise self.ExpenseException(str(e))
@@ -125,35 +465,73 @@ class ExpenseService:
     def update_expense(
         self,
         expense_id: str,
+        user_email: str,
         title: str = None,
         amount: float = None,
         description: str = None,
         category: str = None,
-    ) -> ExpenseModel:
+    ) -> dict:
+        """Update one of the user's expenses with a single UPDATE ... RETURNING.
+
+        Returns the updated row as a dict, or None when no expense with this
+        id belongs to the user.
+        """
         if not expense_id:
             raise self.ExpenseException("Expense ID is missing. Please provide a valid one.")
 
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        changes = {"updatedAt": datetime.utcnow()}
+        if title:
+            changes["title"] = title
+        if amount is not None:
+            try:
+                changes["amount"] = float(amount)
+            except (TypeError, ValueError):
+                raise self.ExpenseException("amount must be a number")
+            if changes["amount"] < 0:
+                raise self.ExpenseException("amnount cannot less than 0")
+            changes.update(amount_columns(changes["amount"]))
+        if description:
+            changes["description"] = description
+        if category:
+            changes["category_id"] = category_catalog.resolve(category)
+
         try:
-            expense = ExpenseModel.query.filter_by(id=expense_id).first()
+            user_id = self.resolve_user_id(user_email)
+            statement = db.update(ExpenseModel).where(
+                ExpenseModel.id == expense_id,
+                ExpenseModel.user_id == user_id
+            ).values(**changes)
+            if self.returning_supported("update"):
+                row = self.db.session.execute(
+                    statement.returning(*EXPENSE_COLUMNS),
+                    execution_options={"synchronize_session": False}
+                ).first()
+                expense = present(dict(row._mapping)) if row else None
+            else:
+                row = self.owned_expense_row(expense_id, user_id)
+                expense = None
+                if row:
+                    self.db.session.execute(statement, execution_options={"synchronize_session": False})
+                    expense = present({**row._mapping, **changes})
+
             if not expense:
-                raise self.ExpenseException("Expense not found for the given ID.")
-
-            if title:
-                expense.title = title
-            if amount is not None:  
-                expense.amount = amount
-            if description:
-                expense.description = description
-            if category:
-                expense.category = self.check_assign_category(category)
-
-            if float(amount) < 0:
-                raise self.ExpenseException("amnount cannot less than 0")
+                self.db.session.rollback()
+                return None
 
-            expense.updatedAt = datetime.utcnow()
+            if "amount" in changes or "category_id" in changes:
+                # The previous category is not returned, so a category change
+                # refreshes every category cell the user has on that day.
+                day = expense["createdAt"].date()
+                categories = {expense["category_id"]}
+                if "category_id" in changes:
+                    categories.update(self.rollups.day_categories(user_id, day))
+                self.budgets.track(user_id, self.rollups.refresh(user_id, {(day, category) for category in categories}))
+            self.versions.bump(user_id)
             self.db.session.commit()
-
-            return expense
+            return present_expense(expense)
 
         except Exception as e:
             self.db.session.rollback()
@@ -184,21 +562,296 @@ class ExpenseService:
             raise self.ExpenseException("user email is missing")
 
         try:
-            user = UserModel.query.filter_by(email=user_email).first()
-            if not user:
-                raise self.ExpenseException("user not found, cannot add expense...")
+            user_id = self.resolve_user_id(user_email, "user not found, cannot add expense...")
             expense = ExpenseModel(
                 title = title,
                 amount = amount,
-                category = self.check_assign_category(category=category),
+                category_id = category_catalog.resolve(category),
                 description = description,
-                user_id = user.id,
+                user_id = user_id,
                 createdAt=datetime.utcnow(),
-                updatedAt=datetime.utcnow()
+                updatedAt=datetime.utcnow(),
+                **amount_columns(amount, new=True)
             )
             self.db.session.add(expense)
+            self.budgets.track(user_id, self.rollups.add(user_id, [(expense.createdAt, expense.category_id, float(amount))]))
+            self.versions.bump(user_id)
             self.db.session.commit()
             return expense
         except Exception as e:
             self.db.session.rollback()
-            raise self.ExpenseException(str(e))        
+            raise self.ExpenseException(str(e))
+
+
+    def prepare_expense(
+        self, title : str,
+        amount : float, category : str,
+        description : str, user_email : str
+    ) -> dict:
+        """Validated expense row with its id and timestamps assigned, not yet stored."""
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        row = self.validate_new_expense({
+            "title": title,
+            "amount": amount,
+            "category": category,
+            "description": description,
+        })
+        now = datetime.utcnow()
+        row.update(
+            id=str(uuid.uuid4()),
+            user_id=self.resolve_user_id(user_email, "user not found, cannot add expense..."),
+            createdAt=now,
+            updatedAt=now
+        )
+        return row
+
+    def store_expense_rows(self, rows: list, skip_existing: bool = False) -> int:
+        """Insert prepared rows of any number of users in one transaction.
+
+        With skip_existing, rows whose id is already stored are left out, so
+        replaying the same rows twice is harmless.
+        """
+        try:
+            if skip_existing:
+                existing = set()
+                for chunk in self.chunked([row["id"] for row in rows]):
+                    existing.update(self.db.session.execute(
+                        db.select(ExpenseModel.id).where(ExpenseModel.id.in_(chunk))
+                    ).scalars())
+                rows = [row for row in rows if row["id"] not in existing]
+            if not rows:
+                return 0
+
+            by_user = {}
+            for row in rows:
+                by_user.setdefault(row["user_id"], []).append(row)
+            for chunk in self.chunked(rows):
+                self.db.session.execute(db.insert(ExpenseModel), chunk)
+            for user_id, user_rows in by_user.items():
+                self.budgets.track(user_id, self.rollups.add(
+                    user_id, [(row["createdAt"], row["category_id"], row["amount"]) for row in user_rows]
+                ))
+                self.versions.bump(user_id)
+            self.db.session.commit()
+            return len(rows)
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.ExpenseException(f"Failed to store expenses: {str(e)}")
+
+    def find_expense(self, expense_id: str, user_email: str) -> dict:
+        user_id = self.resolve_user_id(user_email)
+        row = self.db.session.execute(
+            db.select(*EXPENSE_COLUMNS).where(
+                ExpenseModel.id == expense_id,
+                ExpenseModel.user_id == user_id
+            )
+        ).first()
+        return present_expense(dict(row._mapping)) if row else None
+
+    def check_batch(self, items: list, name: str = "expenses"):
+        if not isinstance(items, list) or not items:
+            raise self.ExpenseException(f"{name} is missing, please send a non empty list")
+        if len(items) > MAX_BATCH_SIZE:
+            raise self.ExpenseException(f"cannot process more than {MAX_BATCH_SIZE} {name} in one batch")
+
+    def chunked(self, items: list):
+        for start in range(0, len(items), BATCH_CHUNK_SIZE):
+            yield items[start:start + BATCH_CHUNK_SIZE]
+
+    def validate_new_expense(self, item: dict) -> dict:
+        if not isinstance(item, dict):
+            raise self.ExpenseException("expense must be an object")
+        if not item.get("title"):
+            raise self.ExpenseException("expense title is missing..")
+        if not item.get("amount"):
+            raise self.ExpenseException("amount is missing")
+        try:
+            amount = float(item["amount"])
+        except (TypeError, ValueError):
+            raise self.ExpenseException("amount must be a number")
+        if amount < 0:
+            raise self.ExpenseException("amnount cannot less than 0")
+        if not item.get("category"):
+            raise self.ExpenseException("category of expense is missing")
+        if not item.get("description"):
+            raise self.ExpenseException("description is missing")
+        return {
+            "title": item["title"],
+            "amount": amount,
+            "category_id": category_catalog.resolve(item["category"]),
+            "description": item["description"],
+            **amount_columns(amount, new=True),
+        }
+
+    def validate_expense_changes(self, item: dict) -> dict:
+        if not isinstance(item, dict):
+            raise self.ExpenseException("expense must be an object")
+        if not item.get("expense_id"):
+            raise self.ExpenseException("Expense ID is missing. Please provide a valid one.")
+        changes = {"id": item["expense_id"]}
+        if item.get("title"):
+            changes["title"] = item["title"]
+        if item.get("amount") is not None:
+            try:
+                changes["amount"] = float(item["amount"])
+            except (TypeError, ValueError):
+                raise self.ExpenseException("amount must be a number")
+            if changes["amount"] < 0:
+                raise self.ExpenseException("amnount cannot less than 0")
+            changes.update(amount_columns(changes["amount"]))
+        if item.get("description"):
+            changes["description"] = item["description"]
+        if item.get("category"):
+            changes["category_id"] = category_catalog.resolve(item["category"])
+        return changes
+
+    def find_owned_expenses(self, user_id: str, expense_ids: list) -> dict:
+        """{id: (day, category)} of the ids that belong to the user, locked until the transaction ends."""
+        owned = {}
+        for chunk in self.chunked(list(set(expense_ids))):
+            for expense_id, created_at, category in self.db.session.execute(
+                db.select(ExpenseModel.id, ExpenseModel.createdAt, ExpenseModel.category_id).where(
+                    ExpenseModel.user_id == user_id,
+                    ExpenseModel.id.in_(chunk)
+                ).with_for_update()
+            ):
+                owned[expense_id] = (created_at.date(), category)
+        return owned
+
+    def create_expenses(self, expenses: list, user_email: str) -> list:
+        self.check_batch(expenses)
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        try:
+            user_id = self.resolve_user_id(user_email, "user not found, cannot add expense...")
+
+            now = datetime.utcnow()
+            results, rows = [], []
+            for item in expenses:
+                try:
+                    row = self.validate_new_expense(item)
+                except self.ExpenseException as e:
+                    results.append({"status": False, "error": str(e)})
+                    continue
+                row.update(id=str(uuid.uuid4()), user_id=user_id, createdAt=now, updatedAt=now)
+                rows.append(row)
+                results.append({
+                    "status": True,
+                    "data": present_expense({**row, "createdAt": now.isoformat(), "updatedAt": now.isoformat()})
+                })
+
+            if rows:
+                self.db.session.execute(db.insert(ExpenseModel), rows)
+                self.budgets.track(user_id, self.rollups.add(
+                    user_id, [(row["createdAt"], row["category_id"], row["amount"]) for row in rows]
+                ))
+                self.versions.bump(user_id)
+                self.db.session.commit()
+            return results
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.ExpenseException(f"Failed to create expenses: {str(e)}")
+
+    def update_expenses(self, expenses: list, user_email: str) -> list:
+        self.check_batch(expenses)
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        try:
+            user_id = self.resolve_user_id(user_email)
+
+            results, changes = [], []
+            for item in expenses:
+                try:
+                    changes.append(self.validate_expense_changes(item))
+                    results.append(None)
+                except self.ExpenseException as e:
+                    changes.append(None)
+                    results.append({"status": False, "error": str(e)})
+
+            now = datetime.utcnow()
+            rows = [{**change, "updatedAt": now} for change in changes if change]
+            if rows:
+                # Write first, with the ownership check in the WHERE, and only then
+                # read the rows back: the update holds them (SQLite: the database)
+                # locked, so what is read is what was updated. A row deleted by
+                # another request in the meantime is not returned.
+                for chunk in self.chunked(rows):
+                    self.db.session.execute(
+                        db.update(ExpenseModel).where(ExpenseModel.user_id == user_id), chunk,
+                        execution_options={"synchronize_session": False}
+                    )
+            owned = self.find_owned_expenses(user_id=user_id, expense_ids=[row["id"] for row in rows])
+
+            cells, recategorized = set(), set()
+            for index, change in enumerate(changes):
+                if change is None:
+                    continue
+                if change["id"] not in owned:
+                    results[index] = {"status": False, "id": change["id"], "error": "Expense not found for the given ID."}
+                    continue
+                day, category = owned[change["id"]]
+                cells.add((day, category))
+                if "category_id" in change:
+                    recategorized.add(day)
+                results[index] = {"status": True, "id": change["id"]}
+            # The previous category is not known once the row is updated, so a
+            # category change refreshes every category cell the user has on that day.
+            for day in recategorized:
+                cells.update((day, category) for category in self.rollups.day_categories(user_id, day))
+
+            if owned:
+                self.budgets.track(user_id, self.rollups.refresh(user_id, cells))
+                self.versions.bump(user_id)
+            self.db.session.commit()
+            return results
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.ExpenseException(f"Failed to update expenses: {str(e)}")
+
+    def remove_expenses(self, expense_ids: list, user_email: str) -> list:
+        self.check_batch(expense_ids, name="expense_ids")
+        if not user_email:
+            raise self.ExpenseException("user email is missing")
+
+        try:
+            user_id = self.resolve_user_id(user_email)
+
+            requested = list({expense_id for expense_id in expense_ids if isinstance(expense_id, str)})
+            if self.returning_supported("delete"):
+                # Report the rows the DELETE removed, not the ones a read before it found.
+                owned = {}
+                for chunk in self.chunked(requested):
+                    for expense_id, created_at, category in self.db.session.execute(
+                        db.delete(ExpenseModel).where(
+                            ExpenseModel.user_id == user_id,
+                            ExpenseModel.id.in_(chunk)
+                        ).returning(ExpenseModel.id, ExpenseModel.createdAt, ExpenseModel.category_id),
+                        execution_options={"synchronize_session": False}
+                    ):
+                        owned[expense_id] = (created_at.date(), category)
+            else:
+                owned = self.find_owned_expenses(user_id=user_id, expense_ids=requested)
+                for chunk in self.chunked(list(owned)):
+                    self.db.session.execute(
+                        db.delete(ExpenseModel).where(
+                            ExpenseModel.user_id == user_id,
+                            ExpenseModel.id.in_(chunk)
+                        )
+                    )
+            self.budgets.track(user_id, self.rollups.refresh(user_id, set(owned.values())))
+            if owned:
+                self.versions.bump(user_id)
+            self.db.session.commit()
+
+            return [
+                {"status": True, "id": expense_id} if isinstance(expense_id, str) and expense_id in owned
+                else {"status": False, "id": expense_id, "error": "expense not found"}
+                for expense_id in expense_ids
+            ]
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.ExpenseException(f"Failed to delete expenses: {str(e)}")
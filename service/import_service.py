@@ -0,0 +1,206 @@
+from extension import db
+from models.expense_model import ExpenseModel, PARTITIONED
+from service.expense_service import ExpenseService
+from service.category_catalog import category_catalog
+from service.statement_parser import (
+    SIGNS, StatementFormatException, detect_format, normalize_chunk, occurrence_hash, read_csv, read_ofx
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from money import amount_columns
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import datetime
+from threading import Lock
+import atexit
+import io
+import os
+import time
+import uuid
+
+MAX_REPORTED_ERRORS = 20
+
+
+class ImportWorkers:
+    """Process pool normalizing statement chunks for every import in this process.
+
+    map() keeps at most two chunks per worker in flight, so a file of any
+    size is held in memory a few chunks at a time. With workers set to 0
+    chunks are normalized on the calling thread.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 2000, batch_size: int = 5000):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.executor = None
+        self.lock = Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.workers = int(app.config.get("IMPORT_WORKERS", os.cpu_count() or 1))
+        self.chunk_size = int(app.config.get("IMPORT_CHUNK_SIZE", self.chunk_size))
+        self.batch_size = int(app.config.get("IMPORT_BATCH_SIZE", self.batch_size))
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def map(self, function, chunks, *args):
+        if self.workers <= 0:
+            for chunk in chunks:
+                yield function(chunk, *args)
+            return
+        executor = self.get_executor()
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(function, chunk, *args))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+import_workers = ImportWorkers()
+atexit.register(import_workers.shutdown)
+
+
+class ExpenseImportService:
+    """Imports CSV and OFX bank statements as expenses.
+
+    The file is read as a stream and normalized in chunks by import_workers.
+    Every row carries a content hash over (user, date, amount, normalized
+    title) and the number of times the same line came before it in the
+    file; a unique index on it makes INSERT ... ON CONFLICT DO NOTHING skip
+    lines already imported, so overlapping statements can be re-uploaded,
+    while two identical purchases on one day are both kept.
+    Each batch is stored in its own transaction together with its rollups,
+    budget totals and version bump.
+    """
+
+    def __init__(self, database=db, expenses=None):
+        self.db = database
+        self.expenses = expenses or ExpenseService(database)
+
+    class ImportException(Exception):
+        pass
+
+    def install(self):
+        """Add the content_hash column and its unique index to an existing table; run by `flask init-db`."""
+        inspector = db.inspect(self.db.session.connection())
+        columns = {column["name"] for column in inspector.get_columns(ExpenseModel.__tablename__)}
+        if "content_hash" not in columns:
+            self.db.session.execute(db.text(
+                f"ALTER TABLE {ExpenseModel.__tablename__} ADD COLUMN content_hash VARCHAR(32)"
+            ))
+        key = 'content_hash, "createdAt"' if PARTITIONED else "content_hash"
+        self.db.session.execute(db.text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS ux_expenses_content_hash ON {ExpenseModel.__tablename__} ({key})"
+        ))
+        self.db.session.commit()
+
+    def insert_statement(self):
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            insert = postgresql.insert
+        elif dialect == "sqlite":
+            insert = sqlite.insert
+        else:
+            raise self.ImportException(f"statement imports are not supported on {dialect}")
+        # On the table rather than the mapper: batches skip the ORM bulk insert bookkeeping.
+        table = ExpenseModel.__table__
+        return insert(table).on_conflict_do_nothing().returning(table.c.createdAt, table.c.category_id, table.c.amount)
+
+    def store_batch(self, user_id: str, rows: list) -> int:
+        """Insert rows skipping known content hashes; returns how many were new."""
+        try:
+            inserted = self.db.session.execute(self.insert_statement(), rows).all()
+            if inserted:
+                self.expenses.budgets.track(user_id, self.expenses.rollups.add(user_id, inserted))
+                self.expenses.versions.bump(user_id)
+            self.db.session.commit()
+            return len(inserted)
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.ImportException(f"Failed to store imported expenses: {str(e)}")
+
+    def import_file(
+        self, user_email: str, stream, filename: str = None,
+        file_format: str = None, sign: str = None, date_format: str = None
+    ) -> dict:
+        """Import one statement from a binary stream and report what happened to its rows."""
+        if not user_email:
+            raise self.ImportException("user email is missing")
+        sign = (sign or "negative").lower()
+        if sign not in SIGNS:
+            raise self.ImportException(f"sign must be one of {', '.join(SIGNS)}")
+        started = time.perf_counter()
+        user_id = self.expenses.resolve_user_id(user_email)
+
+        stream = io.BufferedReader(stream) if not hasattr(stream, "peek") else stream
+        file_format = (file_format or detect_format(filename, stream.peek(4096))).lower()
+        if file_format not in ("csv", "ofx"):
+            raise self.ImportException("format must be either csv or ofx")
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+        reader = read_csv if file_format == "csv" else read_ofx
+
+        report = {
+            "file": filename, "format": file_format,
+            "rows": 0, "inserted": 0, "duplicates": 0, "rejected": 0, "errors": []
+        }
+        categories = {}
+        # Lines seen per content hash; identical lines are told apart by their occurrence.
+        occurrences = {}
+        batch = []
+        now = datetime.utcnow()
+
+        def flush():
+            inserted = self.store_batch(user_id, batch)
+            report["inserted"] += inserted
+            report["duplicates"] += len(batch) - inserted
+            batch.clear()
+
+        try:
+            chunks = reader(text, import_workers.chunk_size)
+            for rows, rejected in import_workers.map(normalize_chunk, chunks, user_id, sign, date_format):
+                report["rows"] += len(rows) + len(rejected)
+                report["rejected"] += len(rejected)
+                for number, error in rejected[:MAX_REPORTED_ERRORS - len(report["errors"])]:
+                    report["errors"].append({"row": number, "error": error})
+                for digest, day, amount, title, description, category in rows:
+                    occurrences[digest] = occurrence = occurrences.get(digest, 0) + 1
+                    if category not in categories:
+                        categories[category] = category_catalog.resolve(category)
+                    batch.append({
+                        "id": str(uuid.uuid4()),
+                        "title": title,
+                        "amount": amount,
+                        "category_id": categories[category],
+                        "description": description,
+                        "user_id": user_id,
+                        "content_hash": occurrence_hash(digest, occurrence),
+                        "createdAt": day,
+                        "updatedAt": now,
+                        **amount_columns(amount, new=True),
+                    })
+                if len(batch) >= import_workers.batch_size:
+                    flush()
+            if batch:
+                flush()
+        except StatementFormatException as e:
+            raise self.ImportException(str(e))
+        finally:
+            text.detach()
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
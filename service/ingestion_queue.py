@@ -0,0 +1,277 @@
+from service.expense_service import ExpenseService
+from service.category_catalog import category_catalog
+from collections import OrderedDict
+from datetime import datetime
+from threading import Event, Lock, Thread
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def file_locks():
+    """fcntl, imported only once INGEST_WAL_PATH is set: it is POSIX only, and the queue runs without it elsewhere."""
+    try:
+        import fcntl
+    except ImportError:
+        raise RuntimeError("INGEST_WAL_PATH needs fcntl file locks, which this platform does not have; leave it unset")
+    return fcntl
+
+
+class IngestionQueue:
+    """Write-behind buffer for /create-expense.
+
+    Prepared rows wait in a bounded in-process queue and a background thread
+    stores them in batches of batch_size, or whatever arrived within
+    flush_interval seconds. With a wal_path every row is appended (and
+    fsynced) to a write-ahead file of this process, <wal_path>.<pid>,
+    before it is accepted. The process holds an flock on its file while it
+    runs; on start, files no running process holds are replayed and
+    removed, so rows a dead worker accepted are stored by the next one.
+    Rows that could not be stored stay in the file and are retried on the
+    next start. max_size 0 disables the queue.
+    """
+
+    def __init__(
+        self, max_size: int = 0, batch_size: int = 500,
+        flush_interval: float = 0.5, wal_path: str = None, failed_size: int = 10_000, retries: int = 3
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.wal_path = wal_path
+        self.failed_size = failed_size
+        self.retries = retries
+        self.app = None
+        self.queue = queue.Queue(maxsize=max(max_size, 1))
+        self.pending = {}
+        self.failed = OrderedDict()
+        self.lock = Lock()
+        self.wal_lock = Lock()
+        self.wal = None
+        self.stopping = Event()
+        self.writer = None
+        self.stored = 0
+
+    class IngestionQueueFull(Exception):
+        pass
+
+    def init_app(self, app):
+        self.shutdown()
+        self.max_size = int(app.config.get("INGEST_QUEUE_SIZE", self.max_size))
+        self.batch_size = int(app.config.get("INGEST_BATCH_SIZE", self.batch_size))
+        self.flush_interval = float(app.config.get("INGEST_FLUSH_INTERVAL", self.flush_interval))
+        self.wal_path = app.config.get("INGEST_WAL_PATH") or None
+        self.app = app
+        self.queue = queue.Queue(maxsize=max(self.max_size, 1))
+        self.pending = {}
+        self.failed = OrderedDict()
+        self.stopping = Event()
+        if not self.enabled:
+            return
+        if self.wal_path:
+            self.wal = self.open_wal()
+        self.writer = Thread(target=self.run, name="expense-ingestion", daemon=True)
+        self.writer.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def encode(self, row: dict) -> dict:
+        return {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        }
+
+    def decode(self, row: dict) -> dict:
+        row = {**row, "createdAt": datetime.fromisoformat(row["createdAt"]),
+               "updatedAt": datetime.fromisoformat(row["updatedAt"])}
+        if "category" in row:
+            # Written before expenses stored category ids.
+            row["category_id"] = category_catalog.resolve(row.pop("category"))
+        return row
+
+    def append_wal(self, record: dict):
+        if self.wal is None:
+            return
+        with self.wal_lock:
+            self.wal.write(json.dumps(record) + "\n")
+            self.wal.flush()
+            os.fsync(self.wal.fileno())
+
+    def open_wal(self):
+        """Replay and remove the write-ahead files of processes that are gone, then open this process's own."""
+        fcntl = file_locks()
+        with open(f"{self.wal_path}.lock", "w") as lock:
+            # Starting workers take turns, so a file is replayed once and never
+            # taken for an orphan between being opened and locked by its owner.
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # <wal_path> itself was written by versions sharing one file between processes.
+            for path in [self.wal_path] + sorted(glob.glob(f"{glob.escape(self.wal_path)}.*")):
+                if path == self.wal_path or path.rpartition(".")[2].isdigit():
+                    self.reclaim(path)
+            wal = open(f"{self.wal_path}.{os.getpid()}", "a", encoding="utf-8")
+            # Held until the file is closed; tells other processes the file has a live owner.
+            fcntl.flock(wal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return wal
+
+    def reclaim(self, path: str) -> int:
+        """Store the rows of a write-ahead file no running process holds, then remove it."""
+        fcntl = file_locks()
+        try:
+            wal = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+        with wal:
+            try:
+                fcntl.flock(wal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            stored = self.replay(wal)
+            os.remove(path)
+        return stored
+
+    def replay(self, wal) -> int:
+        """Store rows a write-ahead file accepted but never marked done."""
+        rows = OrderedDict()
+        for line in wal:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-append was never acknowledged.
+                continue
+            if record.get("op") == "add":
+                rows[record["row"]["id"]] = self.decode(record["row"])
+            elif record.get("op") == "done":
+                for expense_id in record["ids"]:
+                    rows.pop(expense_id, None)
+        if not rows:
+            return 0
+        failures = self.store(list(rows.values()), skip_existing=True)
+        for expense_id, (_, error, _) in failures.items():
+            logger.error("dropping unflushed expense %s from %s: %s", expense_id, wal.name, error)
+        logger.info("replayed %d unflushed expenses from %s", len(rows) - len(failures), wal.name)
+        return len(rows) - len(failures)
+
+    def submit(self, row: dict):
+        if self.stopping.is_set():
+            raise self.IngestionQueueFull("ingestion is shutting down, please retry shortly")
+        with self.lock:
+            if len(self.pending) >= self.max_size:
+                raise self.IngestionQueueFull("too many expenses waiting to be stored, please retry shortly")
+            self.append_wal({"op": "add", "row": self.encode(row)})
+            self.pending[row["id"]] = row
+            self.queue.put_nowait(row)
+
+    def status(self, expense_id: str, user_id: str):
+        """("pending", None), ("failed", error) or None when this queue does not know the id."""
+        with self.lock:
+            row = self.pending.get(expense_id)
+            if row is not None and row["user_id"] == user_id:
+                return "pending", None
+            failure = self.failed.get(expense_id)
+            if failure is not None and failure[0] == user_id:
+                return "failed", failure[1]
+        return None
+
+    def take_batch(self) -> list:
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def drain(self) -> list:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while not self.stopping.is_set():
+            batch = self.take_batch()
+            if batch:
+                self.flush(batch)
+        while True:
+            batch = self.drain()
+            if not batch:
+                break
+            self.flush(batch)
+
+    def store(self, batch: list, skip_existing: bool = False) -> dict:
+        """Store a batch; returns {id: (user id, error, row)} of the rows that could not be stored."""
+        with self.app.app_context():
+            service = ExpenseService()
+            for attempt in range(self.retries):
+                try:
+                    service.store_expense_rows(batch, skip_existing=skip_existing or attempt > 0)
+                    return {}
+                except ExpenseService.ExpenseException as e:
+                    logger.warning("storing %d queued expenses failed: %s", len(batch), e)
+                    time.sleep(self.flush_interval * (attempt + 1))
+
+            # Store row by row so one bad row does not sink the batch.
+            failures = {}
+            for row in batch:
+                try:
+                    service.store_expense_rows([row], skip_existing=True)
+                except ExpenseService.ExpenseException as e:
+                    failures[row["id"]] = (row["user_id"], str(e), row)
+            return failures
+
+    def flush(self, batch: list):
+        failures = self.store(batch)
+        # Rows that failed stay in the write-ahead file and are retried on the next start.
+        self.append_wal({"op": "done", "ids": [row["id"] for row in batch if row["id"] not in failures]})
+        with self.lock:
+            for row in batch:
+                self.pending.pop(row["id"], None)
+            self.failed.update(failures)
+            while len(self.failed) > self.failed_size:
+                self.failed.popitem(last=False)
+            self.stored += len(batch) - len(failures)
+            if not self.pending and self.wal is not None:
+                # Only this process writes the file; start it over with just the failed rows.
+                with self.wal_lock:
+                    self.wal.truncate(0)
+                    if self.failed:
+                        self.wal.writelines(
+                            json.dumps({"op": "add", "row": self.encode(row)}) + "\n" for _, _, row in self.failed.values()
+                        )
+                        self.wal.flush()
+                        os.fsync(self.wal.fileno())
+
+    def shutdown(self, timeout: float = 30.0):
+        """Stop accepting rows and store everything still queued."""
+        self.stopping.set()
+        if self.writer is not None:
+            self.writer.join(timeout=timeout)
+            self.writer = None
+        if self.wal is not None:
+            with self.wal_lock:
+                if not self.pending and not self.failed:
+                    os.remove(self.wal.name)
+                self.wal.close()
+            self.wal = None
+
+
+ingestion_queue = IngestionQueue()
+atexit.register(ingestion_queue.shutdown)
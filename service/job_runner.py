@@ -0,0 +1,196 @@
+from extension import db
+from models.job_model import JobModel
+from service.job_service import JobService
+from service.account_deletion import AccountDeletion
+from service.expense_retention import ExpenseRetention
+from sqlalchemy.exc import OperationalError
+from datetime import timedelta
+from threading import Event, Lock, Thread
+import atexit
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+RETENTION_INTERVAL = timedelta(days=1)
+# Chunks between progress log lines.
+LOG_EVERY = 100
+# Consecutive rolled back chunks after which a job is failed.
+MAX_RETRIES = 20
+RETRY_PAUSE = 0.5
+
+
+class JobRunner:
+    """Works through the jobs table one bounded chunk per transaction.
+
+    Every chunk commits together with the job's progress and cursor, then
+    the runner sleeps batch_pause seconds so live requests get the locks
+    and the write lock of SQLite in between. On PostgreSQL each chunk runs
+    with lock_timeout_ms: a chunk that would wait behind a live
+    transaction gives up, is rolled back and retried after a pause,
+    rather than queueing requests behind its own locks.
+
+    With poll_interval set, a background thread polls for jobs, and queues
+    the daily retention job when retention_months is set. `flask run-jobs`
+    runs them in a process of its own.
+    """
+
+    def __init__(self, poll_interval: float = 0.0, batch_size: int = 1000, batch_pause: float = 0.1,
+                 lease: float = 60.0, lock_timeout_ms: int = 1000, retention_months: int = 0):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.lease = lease
+        self.lock_timeout_ms = lock_timeout_ms
+        self.retention_months = retention_months
+        self.app = None
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers = {handler.kind: handler for handler in (AccountDeletion(), ExpenseRetention())}
+        self.jobs = JobService()
+        self.stopping = Event()
+        self.poller = None
+        self.lock = Lock()
+        self.rows = {kind: 0 for kind in self.handlers}
+        self.chunks = {kind: 0 for kind in self.handlers}
+        self.retries = 0
+        self.finished = {"done": 0, "failed": 0}
+
+    class JobLeaseLost(Exception):
+        pass
+
+    def init_app(self, app):
+        self.shutdown()
+        self.poll_interval = float(app.config.get("JOB_POLL_INTERVAL", self.poll_interval))
+        self.batch_size = max(int(app.config.get("JOB_BATCH_SIZE", self.batch_size)), 1)
+        self.batch_pause = float(app.config.get("JOB_BATCH_PAUSE", self.batch_pause))
+        self.lease = float(app.config.get("JOB_LEASE_SECONDS", self.lease))
+        self.lock_timeout_ms = int(app.config.get("JOB_LOCK_TIMEOUT_MS", self.lock_timeout_ms))
+        self.retention_months = int(app.config.get("RETENTION_MONTHS", self.retention_months))
+        self.app = app
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = Event()
+        if self.poll_interval > 0:
+            self.poller = Thread(target=self.run, name="background-jobs", daemon=True)
+            self.poller.start()
+
+    def run(self):
+        while not self.stopping.wait(self.poll_interval):
+            try:
+                with self.app.app_context():
+                    if self.retention_months > 0 and self.jobs.retention_due(RETENTION_INTERVAL):
+                        self.jobs.request_retention(months=self.retention_months)
+                    self.run_pending()
+            except Exception:
+                logger.exception("running background jobs failed")
+
+    def shutdown(self):
+        self.stopping.set()
+        if self.poller is not None:
+            self.poller.join(timeout=5.0)
+            self.poller = None
+
+    def run_pending(self, limit: int = None) -> list:
+        """Claim and finish jobs until none is left, the runner stops, or limit jobs ran."""
+        finished = []
+        while not self.stopping.is_set() and (limit is None or len(finished) < limit):
+            job = self.jobs.claim(self.worker, self.lease, list(self.handlers))
+            if job is None:
+                break
+            finished.append(self.work(job))
+        return finished
+
+    def begin_chunk(self):
+        if self.lock_timeout_ms > 0 and db.session.get_bind().dialect.name == "postgresql":
+            db.session.execute(db.text(f"SET LOCAL lock_timeout = '{int(self.lock_timeout_ms)}ms'"))
+
+    def work(self, job) -> dict:
+        # Plain values: the instance expires on every commit.
+        job_id, kind, params = job.id, job.kind, job.params
+        handler = self.handlers[kind]
+        cursor, total, chunks, retries = job.cursor, job.total, 0, 0
+        logger.info("job %s (%s) started at %s rows", job_id, kind, job.processed)
+        last = time.perf_counter()
+        while True:
+            if self.stopping.is_set():
+                # Hand the job back instead of leaving it to wait out its lease.
+                self.jobs.release(job_id, self.worker)
+                break
+            try:
+                self.begin_chunk()
+                if total is None:
+                    total = handler.total(params)
+                rows, next_cursor, done = handler.step(params, cursor, self.batch_size)
+                now = time.perf_counter()
+                if not self.jobs.record(job_id, self.worker, rows, now - last, cursor=next_cursor, total=total, done=done):
+                    raise self.JobLeaseLost(f"job {job_id} was taken over by another worker")
+                db.session.commit()
+                cursor, last, retries = next_cursor, now, 0
+            except self.JobLeaseLost:
+                db.session.rollback()
+                logger.warning("job %s was taken over by another worker", job_id)
+                break
+            except (OperationalError, ExpenseRetention.ChunkConflict) as e:
+                # A lock timeout, a busy SQLite database, or rows changed under the chunk.
+                db.session.rollback()
+                retries += 1
+                self.retries += 1
+                if retries > MAX_RETRIES:
+                    self.fail(job_id, e)
+                    break
+                logger.info("job %s chunk rolled back, retrying: %s", job_id, e)
+                self.stopping.wait(max(self.batch_pause, RETRY_PAUSE))
+                continue
+            except Exception as e:
+                db.session.rollback()
+                self.fail(job_id, e)
+                break
+
+            chunks += 1
+            with self.lock:
+                self.rows[kind] += rows
+                self.chunks[kind] += 1
+            if done:
+                with self.lock:
+                    self.finished["done"] += 1
+                break
+            if chunks % LOG_EVERY == 0:
+                logger.info("job %s: %s chunks this run", job_id, chunks)
+            if rows:
+                self.stopping.wait(self.batch_pause)
+        db.session.remove()
+        job = db.session.get(JobModel, job_id)
+        logger.info("job %s (%s) is %s after %s rows", job.id, job.kind, job.state, job.processed)
+        return job.to_dict()
+
+    def fail(self, job_id: str, error: Exception):
+        logger.error("job %s failed: %s", job_id, error)
+        self.jobs.fail(job_id, self.worker, str(error))
+        with self.lock:
+            self.finished["failed"] += 1
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP expense_api_job_rows_total Rows deleted or archived by background jobs.",
+            "# TYPE expense_api_job_rows_total counter",
+        ]
+        lines += [f'expense_api_job_rows_total{{kind="{kind}"}} {rows}' for kind, rows in self.rows.items()]
+        lines += [
+            "# HELP expense_api_job_chunks_total Chunk transactions committed by background jobs.",
+            "# TYPE expense_api_job_chunks_total counter",
+        ]
+        lines += [f'expense_api_job_chunks_total{{kind="{kind}"}} {chunks}' for kind, chunks in self.chunks.items()]
+        lines += [
+            "# HELP expense_api_job_chunk_retries_total Chunks rolled back on a lock timeout or conflict and retried.",
+            "# TYPE expense_api_job_chunk_retries_total counter",
+            f"expense_api_job_chunk_retries_total {self.retries}",
+            "# HELP expense_api_jobs_finished_total Background jobs finished by this process, by outcome.",
+            "# TYPE expense_api_jobs_finished_total counter",
+        ]
+        lines += [f'expense_api_jobs_finished_total{{state="{state}"}} {count}' for state, count in self.finished.items()]
+        return "\n".join(lines) + "\n"
+
+
+job_runner = JobRunner()
+atexit.register(job_runner.shutdown)
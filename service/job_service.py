@@ -0,0 +1,177 @@
+from extension import db
+from models.job_model import JobModel
+from models.user_model import UserModel
+from service.user_cache import user_id_cache
+from datetime import date, datetime, timedelta
+
+ACCOUNT_DELETION = "delete_account"
+RETENTION = "retention"
+JOB_STATES = ("pending", "running", "done", "failed")
+MAX_JOBS_LISTED = 500
+
+
+def month_start_before(months: int, today: date = None) -> datetime:
+    """First day of the month `months` months before the current one, at midnight."""
+    today = today or datetime.utcnow().date()
+    index = today.year * 12 + today.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class JobService:
+    """The jobs table: queueing, claiming and recording progress of background jobs.
+
+    Workers claim a job for lease seconds and renew the claim with every
+    chunk they record, so a job whose worker died is picked up again once
+    its lease ran out.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+
+    class JobException(Exception):
+        pass
+
+    def enqueue(self, kind: str, params: dict) -> JobModel:
+        """Add a pending job in the open transaction."""
+        job = JobModel(kind=kind, state="pending", params=params, processed=0, elapsed=0)
+        self.db.session.add(job)
+        self.db.session.flush()
+        return job
+
+    def open_job(self, kind: str, **params):
+        """A pending or running job of kind with these params, if there is one."""
+        jobs = self.db.session.execute(
+            db.select(JobModel).where(JobModel.kind == kind, JobModel.state.in_(("pending", "running")))
+        ).scalars()
+        return next((job for job in jobs if all(job.params.get(key) == value for key, value in params.items())), None)
+
+    def request_account_deletion(self, user_email: str) -> dict:
+        """Queue the deletion of a user's account and data.
+
+        The user's email is replaced by a placeholder right away, so logins
+        stop working and the address can sign up again, while the job
+        deletes the data in chunks. The caller revokes the tokens issued for
+        the email, which would otherwise be valid for a new account of it.
+        """
+        if not user_email:
+            raise self.JobException("user email is missing")
+        try:
+            user = self.db.session.execute(db.select(UserModel).where(UserModel.email == user_email)).scalar()
+            if user is None:
+                raise self.JobException("user not found")
+            job = self.open_job(ACCOUNT_DELETION, user_id=user.id) or self.enqueue(ACCOUNT_DELETION, {"user_id": user.id})
+            user.email = f"deleted+{user.id}@deleted.invalid"
+            self.db.session.commit()
+            user_id_cache.invalidate(user_email)
+            return job.to_dict()
+        except self.JobException:
+            self.db.session.rollback()
+            raise
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.JobException(f"Failed to request the account deletion: {str(e)}")
+
+    def request_retention(self, months: int = None, before: str = None) -> dict:
+        """Queue archiving every expense created before `before`, or before the month `months` months back."""
+        if before:
+            try:
+                cutoff = datetime.combine(date.fromisoformat(before), datetime.min.time())
+            except (TypeError, ValueError):
+                raise self.JobException("before must be a date like 2024-01-01")
+        elif isinstance(months, int) and not isinstance(months, bool) and months > 0:
+            cutoff = month_start_before(months)
+        else:
+            raise self.JobException("months must be a positive number of months")
+        try:
+            job = self.open_job(RETENTION) or self.enqueue(RETENTION, {"before": cutoff.isoformat()})
+            self.db.session.commit()
+            return job.to_dict()
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.JobException(f"Failed to queue the retention job: {str(e)}")
+
+    def retention_due(self, interval: timedelta) -> bool:
+        """No retention job is open and none was queued within interval."""
+        latest = self.db.session.execute(
+            db.select(JobModel.state, JobModel.createdAt).where(JobModel.kind == RETENTION)
+            .order_by(JobModel.createdAt.desc()).limit(1)
+        ).first()
+        if latest is None:
+            return True
+        state, created_at = latest
+        return state not in ("pending", "running") and created_at <= datetime.utcnow() - interval
+
+    def job(self, job_id: str) -> dict:
+        job = self.db.session.get(JobModel, job_id) if job_id else None
+        if job is None:
+            raise self.JobException("job not found")
+        return job.to_dict()
+
+    def jobs(self, state: str = None, kind: str = None, limit: int = 50) -> list:
+        if state is not None and state not in JOB_STATES:
+            raise self.JobException(f"state must be one of {', '.join(JOB_STATES)}")
+        statement = db.select(JobModel).order_by(JobModel.createdAt.desc())
+        if state:
+            statement = statement.where(JobModel.state == state)
+        if kind:
+            statement = statement.where(JobModel.kind == kind)
+        limit = min(max(limit or 50, 1), MAX_JOBS_LISTED)
+        return [job.to_dict() for job in self.db.session.execute(statement.limit(limit)).scalars()]
+
+    def claim(self, worker: str, lease: float, kinds) -> JobModel:
+        """Take the oldest pending job, or a running one whose worker stopped renewing its lease."""
+        now = datetime.utcnow()
+        claimable = db.or_(
+            JobModel.state == "pending",
+            db.and_(JobModel.state == "running", JobModel.heartbeat_at < now - timedelta(seconds=lease))
+        )
+        candidates = self.db.session.execute(
+            db.select(JobModel.id).where(claimable, JobModel.kind.in_(kinds)).order_by(JobModel.createdAt).limit(10)
+        ).scalars().all()
+        for job_id in candidates:
+            # Another worker may claim the same job; only one UPDATE matches.
+            claimed = self.db.session.execute(
+                db.update(JobModel).where(JobModel.id == job_id, claimable)
+                .values(state="running", worker=worker, heartbeat_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            self.db.session.commit()
+            if claimed:
+                return self.db.session.get(JobModel, job_id, populate_existing=True)
+        self.db.session.rollback()
+        return None
+
+    def record(self, job_id: str, worker: str, rows: int, elapsed: float, cursor=None,
+               total: int = None, done: bool = False) -> bool:
+        """Add a chunk's progress in the chunk's transaction; False when the lease went to another worker."""
+        values = {
+            "processed": JobModel.processed + rows,
+            "elapsed": JobModel.elapsed + elapsed,
+            "cursor": cursor,
+            "heartbeat_at": datetime.utcnow(),
+        }
+        if total is not None:
+            values["total"] = total
+        if done:
+            values.update(state="done", finished_at=datetime.utcnow())
+        owned = self.db.session.execute(
+            db.update(JobModel).where(JobModel.id == job_id, JobModel.worker == worker, JobModel.state == "running")
+            .values(**values).execution_options(synchronize_session=False)
+        ).rowcount
+        return bool(owned)
+
+    def release(self, job_id: str, worker: str):
+        """Put a job this worker stops working on back in the queue."""
+        self.db.session.execute(
+            db.update(JobModel).where(JobModel.id == job_id, JobModel.worker == worker, JobModel.state == "running")
+            .values(state="pending", worker=None).execution_options(synchronize_session=False)
+        )
+        self.db.session.commit()
+
+    def fail(self, job_id: str, worker: str, error: str):
+        self.db.session.execute(
+            db.update(JobModel).where(JobModel.id == job_id, JobModel.worker == worker)
+            .values(state="failed", error=error[:2000], finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        self.db.session.commit()
@@ -0,0 +1,86 @@
+from extension import db
+from models.expense_model import ExpenseModel
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from models.budget_model import BudgetMonthTotalModel
+from service.rollup_service import RollupService
+from service.budget_service import BudgetService
+from money import MINOR_UNITS, DEFAULT_CURRENCY, to_minor
+
+
+class MoneyMigration:
+    """Moves an existing database from Float amounts to integer cents.
+
+    Adds amount_cents and currency to expenses, fills amount_cents from
+    amount in batches (rounding half up, like new writes), then recreates
+    the rollup and budget total tables with integer totals and rebuilds
+    them. Safe to re-run;
+    only rows without cents are touched.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+
+    class MoneyMigrationException(Exception):
+        pass
+
+    def add_columns(self) -> list:
+        inspector = db.inspect(self.db.engine)
+        existing = {column["name"] for column in inspector.get_columns(ExpenseModel.__tablename__)}
+        added = []
+        with self.db.engine.begin() as connection:
+            if "amount_cents" not in existing:
+                connection.execute(db.text(f"ALTER TABLE {ExpenseModel.__tablename__} ADD COLUMN amount_cents BIGINT"))
+                added.append("amount_cents")
+            if "currency" not in existing:
+                connection.execute(db.text(
+                    f"ALTER TABLE {ExpenseModel.__tablename__} "
+                    f"ADD COLUMN currency VARCHAR(3) NOT NULL DEFAULT '{DEFAULT_CURRENCY}'"
+                ))
+                added.append("currency")
+        return added
+
+    def backfill(self, batch_size: int = 10_000) -> int:
+        migrated = 0
+        while True:
+            rows = self.db.session.execute(
+                db.select(ExpenseModel.id, ExpenseModel.amount)
+                .where(ExpenseModel.amount_cents.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return migrated
+            self.db.session.execute(
+                db.update(ExpenseModel),
+                [{"id": expense_id, "amount_cents": to_minor(amount)} for expense_id, amount in rows]
+            )
+            self.db.session.commit()
+            migrated += len(rows)
+
+    def recreate_with_integers(self, table, column: str):
+        inspector = db.inspect(self.db.engine)
+        columns = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        if not isinstance(columns.get(column), db.Integer):
+            table.drop(self.db.engine, checkfirst=True)
+            table.create(self.db.engine)
+
+    def rebuild_rollups(self) -> int:
+        self.recreate_with_integers(ExpenseDailyRollupModel.__table__, "total_amount")
+        rows = RollupService(self.db).rebuild()
+        self.recreate_with_integers(BudgetMonthTotalModel.__table__, "total")
+        BudgetService(self.db).rebuild()
+        self.db.session.commit()
+        return rows
+
+    def run(self, batch_size: int = 10_000) -> dict:
+        if not MINOR_UNITS:
+            raise self.MoneyMigrationException("set MONEY_MODE=cents before migrating amounts to cents")
+        try:
+            added = self.add_columns()
+            migrated = self.backfill(batch_size=batch_size)
+            rollups = self.rebuild_rollups()
+            return {"added_columns": added, "migrated_rows": migrated, "rollup_rows": rollups}
+        except self.MoneyMigrationException:
+            raise
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.MoneyMigrationException(f"Failed to migrate amounts to cents: {str(e)}")
@@ -0,0 +1,241 @@
+from extension import db
+from models.expense_model import ExpenseModel, PARTITIONED
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from models.budget_model import BudgetMonthTotalModel
+from service.expense_service import ExpenseService, ExpenseFilter
+from service.version_service import ExpenseVersionService
+from datetime import date, datetime
+import re
+
+PARTITION_NAME = re.compile(r"^expenses_y(\d{4})m(\d{2})$")
+
+
+class ExpensePartitionService:
+    """Monthly range partitions of expenses on PostgreSQL.
+
+    Every month of createdAt gets its own partition (expenses_y2026m01, ...)
+    and expenses_default catches rows outside the created months, so inserts
+    never fail. ensure() creates the months ahead and moves stray rows out of
+    the default partition; detach() takes old months out of the table and
+    keeps them as expenses_archive_y2024m01 tables (or drops them).
+    """
+
+    def __init__(self, database=db, expenses=None):
+        self.db = database
+        self.expenses = expenses or ExpenseService(database)
+        self.versions = ExpenseVersionService(database)
+        self.table = ExpenseModel.__tablename__
+        self.default = f"{self.table}_default"
+
+    class PartitionException(Exception):
+        pass
+
+    def month_start(self, value) -> date:
+        return date(value.year, value.month, 1)
+
+    def add_months(self, month: date, months: int) -> date:
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.table}_y{month.year:04d}m{month.month:02d}"
+
+    def check_dialect(self):
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect != "postgresql":
+            raise self.PartitionException(f"expense partitioning needs PostgreSQL, not {dialect}")
+        if not PARTITIONED:
+            raise self.PartitionException("set EXPENSE_PARTITIONING=monthly before partitioning expenses")
+
+    def lock(self):
+        # Workers starting together would otherwise race to create the same months.
+        self.db.session.execute(db.text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": self.table})
+
+    def is_partitioned(self) -> bool:
+        return bool(self.db.session.execute(db.text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+        ), {"table": self.table}).scalar())
+
+    def partitions(self) -> dict:
+        """Attached monthly partitions keyed by their first day."""
+        names = self.db.session.execute(db.text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+        ), {"table": self.table}).scalars()
+        months = {}
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return months
+
+    def create_default(self):
+        self.db.session.execute(db.text(
+            f'CREATE TABLE IF NOT EXISTS "{self.default}" PARTITION OF "{self.table}" DEFAULT'
+        ))
+
+    def create_partition(self, month: date) -> str:
+        """Attach the partition of month, moving its rows out of the default partition first."""
+        name = self.partition_name(month)
+        bounds = {"start": datetime.combine(month, datetime.min.time()),
+                  "end": datetime.combine(self.add_months(month, 1), datetime.min.time())}
+        self.db.session.execute(db.text(
+            f'CREATE TABLE "{name}" (LIKE "{self.table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        self.db.session.execute(db.text(
+            f'WITH moved AS (DELETE FROM "{self.default}" '
+            f'WHERE "createdAt" >= :start AND "createdAt" < :end RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ), bounds)
+        self.db.session.execute(db.text(
+            f'ALTER TABLE "{self.table}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{self.add_months(month, 1).isoformat()}')"
+        ))
+        return name
+
+    def missing_months(self, months_ahead: int, since: date = None) -> list:
+        existing = self.partitions()
+        first = self.month_start(datetime.utcnow())
+        stray = self.db.session.execute(db.text(
+            f'SELECT min("createdAt") FROM "{self.default}"'
+        )).scalar()
+        for candidate in (since, stray):
+            if candidate is not None:
+                first = min(first, self.month_start(candidate))
+        last = self.add_months(self.month_start(datetime.utcnow()), months_ahead)
+
+        months = []
+        month = first
+        while month <= last:
+            if month not in existing:
+                months.append(month)
+            month = self.add_months(month, 1)
+        return months
+
+    def ensure(self, months_ahead: int = 3, since: date = None) -> list:
+        """Create the partitions from since (or the oldest stray row) through months_ahead months from now."""
+        self.check_dialect()
+        try:
+            self.lock()
+            if not self.is_partitioned():
+                raise self.PartitionException(
+                    f"{self.table} is not partitioned yet, run `flask partition-expenses` first"
+                )
+            self.create_default()
+            created = [self.create_partition(month) for month in self.missing_months(months_ahead, since)]
+            self.db.session.commit()
+            return created
+        except self.PartitionException:
+            self.db.session.rollback()
+            raise
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.PartitionException(f"Failed to create expense partitions: {str(e)}")
+
+    def convert(self, months_ahead: int = 3) -> int:
+        """Move an unpartitioned expenses table into a partitioned one, in one transaction."""
+        self.check_dialect()
+        self.lock()
+        if self.is_partitioned():
+            self.db.session.rollback()
+            return 0
+        old = f"{self.table}_unpartitioned"
+        index = "ix_expenses_user_id_createdAt_id"
+        columns = ", ".join(f'"{column.name}"' for column in ExpenseModel.__table__.columns)
+        try:
+            self.db.session.execute(db.text(f'ALTER TABLE "{self.table}" RENAME TO "{old}"'))
+            self.db.session.execute(db.text(f'ALTER INDEX IF EXISTS "{self.table}_pkey" RENAME TO "{old}_pkey"'))
+            self.db.session.execute(db.text(f'ALTER INDEX IF EXISTS "{index}" RENAME TO "{old}_{index[3:]}"'))
+            self.db.session.execute(db.text(
+                f'ALTER INDEX IF EXISTS "ux_expenses_content_hash" RENAME TO "{old}_content_hash"'
+            ))
+            self.db.session.execute(db.text(
+                f'ALTER INDEX IF EXISTS "ix_expenses_updatedAt" RENAME TO "{old}_updatedAt"'
+            ))
+            ExpenseModel.__table__.create(self.db.session.connection())
+            self.create_default()
+
+            oldest = self.db.session.execute(db.text(f'SELECT min("createdAt") FROM "{old}"')).scalar()
+            for month in self.missing_months(months_ahead, since=oldest):
+                self.create_partition(month)
+            moved = self.db.session.execute(db.text(
+                f'INSERT INTO "{self.table}" ({columns}) SELECT {columns} FROM "{old}"'
+            )).rowcount
+            self.db.session.execute(db.text(f'DROP TABLE "{old}"'))
+            self.db.session.commit()
+            return moved
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.PartitionException(f"Failed to partition expenses: {str(e)}")
+
+    def detach(self, before: date, drop: bool = False) -> list:
+        """Take every month that ends on or before `before` out of expenses.
+
+        Their rollup and budget total rows are deleted and the owners'
+        versions bumped, so summaries, budgets and ETags stop counting the
+        archived expenses.
+        """
+        self.check_dialect()
+        before = self.month_start(before)
+        detached = []
+        try:
+            self.lock()
+            for month, name in sorted(self.partitions().items()):
+                if month >= before:
+                    continue
+                user_ids = self.db.session.execute(db.text(f'SELECT DISTINCT user_id FROM "{name}"')).scalars().all()
+                self.db.session.execute(db.text(f'ALTER TABLE "{self.table}" DETACH PARTITION "{name}"'))
+                if drop:
+                    self.db.session.execute(db.text(f'DROP TABLE "{name}"'))
+                else:
+                    archive = name.replace(f"{self.table}_", f"{self.table}_archive_", 1)
+                    self.db.session.execute(db.text(f'ALTER TABLE "{name}" RENAME TO "{archive}"'))
+                self.db.session.execute(db.delete(ExpenseDailyRollupModel).where(
+                    ExpenseDailyRollupModel.day >= month,
+                    ExpenseDailyRollupModel.day < self.add_months(month, 1)
+                ))
+                self.db.session.execute(db.delete(BudgetMonthTotalModel).where(BudgetMonthTotalModel.month == month))
+                for user_id in user_ids:
+                    self.versions.bump(user_id)
+                detached.append(name)
+            self.db.session.commit()
+            return detached
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.PartitionException(f"Failed to detach expense partitions: {str(e)}")
+
+    def scanned_partitions(self, statement) -> list:
+        """Partitions the planner keeps for statement, from EXPLAIN (FORMAT JSON)."""
+        compiled = statement.compile(dialect=self.db.session.get_bind().dialect)
+        plan = self.db.session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        relations = []
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            relation = node.get("Relation Name")
+            if relation and relation not in relations:
+                relations.append(relation)
+            nodes.extend(node.get("Plans", []))
+        return sorted(relations)
+
+    def check_pruning(self, user_email: str, max_partitions: int = 2) -> dict:
+        """Partitions the past_week and past_month filter pages touch, failing above max_partitions."""
+        self.check_dialect()
+        user_id = self.expenses.resolve_user_id(user_email)
+        report = {}
+        for preset in (ExpenseFilter.PAST_WEEK.value, ExpenseFilter.PAST_MONTH.value):
+            start_date, end_date = self.expenses.resolve_date_range(expense_filter_category=preset)
+            report[preset] = self.scanned_partitions(self.expenses.filter_statement(user_id, start_date, end_date))
+        too_many = {preset: names for preset, names in report.items() if len(names) > max_partitions}
+        if too_many:
+            raise self.PartitionException(
+                "filter queries are not pruned: " + "; ".join(
+                    f"{preset} scans {', '.join(names)}" for preset, names in too_many.items()
+                )
+            )
+        return report
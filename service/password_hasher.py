@@ -0,0 +1,97 @@
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from threading import BoundedSemaphore, Lock
+import atexit
+import os
+
+
+def method_prefix(method: str) -> str:
+    """The method and parameters generate_password_hash stores in front of a hash made with method."""
+    name, *args = method.split(":")
+    try:
+        if name == "scrypt":
+            n, r, p = map(int, args) if args else (2**15, 8, 1)
+            return f"scrypt:{n}:{r}:{p}"
+        if name == "pbkdf2" and len(args) <= 2:
+            hash_name = args[0] if args else "sha256"
+            iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+            return f"pbkdf2:{hash_name}:{iterations}"
+    except ValueError:
+        pass
+    raise ValueError(f"invalid PASSWORD_HASH_METHOD {method!r}, use e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000")
+
+
+class PasswordHasher:
+    """Werkzeug password hashing run on a bounded process pool.
+
+    At most max_pending hashes may be queued or running at once, further
+    calls raise PasswordHasherBusy instead of waiting. A hash keeps its
+    slot until the pool has finished it, even when the caller stopped
+    waiting after timeout seconds; the caller then gets PasswordHasherBusy
+    too, as the pool is saturated. With workers set to 0 hashing runs
+    inline on the calling thread.
+    """
+
+    def __init__(self, method: str = "scrypt", workers: int = 0, max_pending: int = 0, timeout: float = 10.0):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending or max(workers * 4, 1)
+        self.timeout = timeout
+        self.executor = None
+        self.slots = BoundedSemaphore(self.max_pending)
+        self.lock = Lock()
+        self.method_prefix = method_prefix(method)
+
+    class PasswordHasherBusy(Exception):
+        pass
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+        self.workers = int(app.config.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+        self.max_pending = int(app.config.get("PASSWORD_HASH_MAX_PENDING", 0)) or max(self.workers * 4, 1)
+        self.timeout = float(app.config.get("PASSWORD_HASH_TIMEOUT", 10.0))
+        self.slots = BoundedSemaphore(self.max_pending)
+        self.method_prefix = method_prefix(self.method)
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def run(self, function, *args):
+        if self.workers <= 0:
+            return function(*args)
+        slots = self.slots
+        if not slots.acquire(blocking=False):
+            raise self.PasswordHasherBusy("too many password checks in progress, please retry shortly")
+        try:
+            future = self.get_executor().submit(function, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise self.PasswordHasherBusy("password checks are taking too long, please retry shortly")
+
+    def hash(self, password: str) -> str:
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self.run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return password_hash.split("$", 1)[0] != self.method_prefix
+
+
+password_hasher = PasswordHasher()
+atexit.register(password_hasher.shutdown)
@@ -0,0 +1,144 @@
+from extension import db
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import URL
+from threading import Lock
+import re
+import time
+
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def mask_literals(statement: str) -> str:
+    """statement with its string and number literals replaced by ?, so exported SQL carries no user data."""
+    return LITERAL.sub("?", statement)
+
+
+def database_label(url) -> str:
+    """url without its username, password and query, which may hold credentials."""
+    return URL.create(url.drivername, host=url.host, port=url.port, database=url.database).render_as_string()
+
+
+class QueryMetrics:
+    """Per-request SQL query count and time, aggregated per endpoint."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = Lock()
+        self.engines = []
+
+    def init_app(self, app):
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if engine not in self.engines:
+                event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+                self.engines.append(engine)
+
+        app.before_request(self.start_request)
+        app.after_request(self.add_server_timing)
+        app.teardown_request(self.finish_request)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if not has_request_context() or "db_queries" not in g:
+            return
+        g.db_queries += 1
+        g.db_time += elapsed
+        if elapsed > g.db_slowest[0]:
+            g.db_slowest = (elapsed, statement)
+
+    def start_request(self):
+        g.request_start = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+        g.db_slowest = (0.0, None)
+
+    def add_server_timing(self, response):
+        if "db_queries" in g:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={g.db_time * 1000:.2f};desc="{g.db_queries} queries", '
+                f"app;dur={(time.perf_counter() - g.request_start) * 1000:.2f}"
+            )
+        return response
+
+    def finish_request(self, error=None):
+        if "db_queries" not in g or g.get("db_recorded"):
+            return
+        g.db_recorded = True
+        endpoint = request.endpoint or "unmatched"
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {
+                "requests": 0,
+                "queries": 0,
+                "db_seconds": 0.0,
+                "request_seconds": 0.0,
+                "slowest_seconds": 0.0,
+                "slowest_statement": None,
+            })
+            stats["requests"] += 1
+            stats["queries"] += g.db_queries
+            stats["db_seconds"] += g.db_time
+            stats["request_seconds"] += time.perf_counter() - g.request_start
+            if g.db_slowest[0] > stats["slowest_seconds"]:
+                stats["slowest_seconds"] = g.db_slowest[0]
+                stats["slowest_statement"] = mask_literals(g.db_slowest[1])
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+    def render_prometheus(self) -> str:
+        def escape(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+        with self.lock:
+            endpoints = {endpoint: dict(stats) for endpoint, stats in self.endpoints.items()}
+
+        lines = []
+        for name, key, kind, description in [
+            ("expense_api_requests_total", "requests", "counter", "Requests handled."),
+            ("expense_api_request_seconds_total", "request_seconds", "counter", "Time spent handling requests."),
+            ("expense_api_db_queries_total", "queries", "counter", "SQL statements executed."),
+            ("expense_api_db_seconds_total", "db_seconds", "counter", "Time spent executing SQL statements."),
+        ]:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for endpoint, stats in sorted(endpoints.items()):
+                lines.append(f'{name}{{endpoint="{escape(endpoint)}"}} {stats[key]}')
+
+        lines.append("# HELP expense_api_db_slowest_statement_seconds Slowest SQL statement seen per endpoint.")
+        lines.append("# TYPE expense_api_db_slowest_statement_seconds gauge")
+        for endpoint, stats in sorted(endpoints.items()):
+            if stats["slowest_statement"]:
+                statement = escape(" ".join(stats["slowest_statement"].split())[:300])
+                lines.append(
+                    f'expense_api_db_slowest_statement_seconds{{endpoint="{escape(endpoint)}",'
+                    f'statement="{statement}"}} {stats["slowest_seconds"]}'
+                )
+
+        pools = [
+            (escape(database_label(engine.url)), engine.pool)
+            for engine in self.engines if hasattr(engine.pool, "checkedout")
+        ]
+        for name, reading, description in [
+            ("expense_api_db_pool_size", lambda pool: pool.size(), "Connections kept in the pool."),
+            ("expense_api_db_pool_checked_out", lambda pool: pool.checkedout(), "Connections currently in use."),
+            ("expense_api_db_pool_overflow", lambda pool: pool.overflow(), "Connections opened beyond the pool size."),
+        ]:
+            if not pools:
+                break
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            for url, pool in pools:
+                lines.append(f'{name}{{database="{url}"}} {reading(pool)}')
+
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics()
@@ -0,0 +1,106 @@
+from flask_sqlalchemy.session import Session
+from sqlalchemy import select
+from datetime import datetime, timedelta
+from threading import Lock
+import random
+
+REPLICA_OPTION = "replica_read_for"
+
+
+class ReplicaRouter:
+    """Sends marked read-only selects to a replica bind.
+
+    Services mark a statement with for_user(statement, user_id). Such a
+    statement runs on one of the `replica*` binds, unless that user wrote
+    within the last sticky_seconds, in which case it stays on the primary
+    so the user reads their own writes. The time of the last write is the
+    writtenAt of the user's expense_versions row, set by every write in its
+    transaction and read from the primary once per session, so a write
+    handled by one worker keeps the next read on any worker on the
+    primary. Everything else, including every flush, goes to the primary.
+    """
+
+    def __init__(self, sticky_seconds: float = 5.0):
+        self.sticky_seconds = sticky_seconds
+        self.bind_keys = []
+        self.lock = Lock()
+        self.reads = {"primary": 0, "replica": 0}
+
+    def init_app(self, app):
+        binds = app.config.get("SQLALCHEMY_BINDS") or {}
+        self.bind_keys = sorted(key for key in binds if key.startswith("replica"))
+        self.sticky_seconds = float(app.config.get("REPLICA_STICKY_SECONDS", self.sticky_seconds))
+        with self.lock:
+            self.reads = {"primary": 0, "replica": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.bind_keys)
+
+    def for_user(self, statement, user_id: str):
+        """Mark statement as safe to read from a replica on behalf of user_id."""
+        if not self.enabled:
+            return statement
+        return statement.execution_options(**{REPLICA_OPTION: user_id})
+
+    def last_write(self, session, user_id: str):
+        # Imported here: the models import the session class defined below.
+        from models.expense_version_model import ExpenseVersionModel
+
+        written = session.info.setdefault("written", {})
+        if user_id not in written:
+            with session.no_autoflush:
+                written[user_id] = session.execute(
+                    select(ExpenseVersionModel.writtenAt).where(ExpenseVersionModel.user_id == user_id),
+                    bind_arguments={"bind": Session.get_bind(session)}
+                ).scalar()
+        return written[user_id]
+
+    def sticky(self, session, user_id: str) -> bool:
+        written = self.last_write(session, user_id)
+        return written is not None and written > datetime.utcnow() - timedelta(seconds=self.sticky_seconds)
+
+    def engine_for(self, session, clause):
+        """The replica engine for clause, or None when it belongs on the primary."""
+        if not self.enabled or clause is None or not getattr(clause, "is_select", False):
+            return None
+        user_id = clause.get_execution_options().get(REPLICA_OPTION)
+        if user_id is None:
+            return None
+        if self.sticky(session, user_id):
+            self.count("primary")
+            return None
+        # One replica per session, so every read of a request sees the same snapshot.
+        key = session.info.get("replica")
+        if key is None:
+            key = session.info["replica"] = random.choice(self.bind_keys)
+        self.count("replica")
+        return session._db.engines[key]
+
+    def count(self, target: str):
+        with self.lock:
+            self.reads[target] += 1
+
+    def render_prometheus(self) -> str:
+        if not self.enabled:
+            return ""
+        with self.lock:
+            reads = dict(self.reads)
+        return "\n".join([
+            "# HELP expense_api_replica_reads_total Replica-eligible reads by the database they ran on.",
+            "# TYPE expense_api_replica_reads_total counter",
+            f'expense_api_replica_reads_total{{target="replica"}} {reads["replica"]}',
+            f'expense_api_replica_reads_total{{target="primary"}} {reads["primary"]}',
+        ]) + "\n"
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            engine = replica_router.engine_for(self, clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
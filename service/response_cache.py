@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class ResponseCache:
+    """Per-process LRU of serialized response bodies keyed by ETag.
+
+    Keys already carry the user's expense version, so writes never need to
+    evict anything; ttl only bounds how long an entry may be served.
+    max_entries 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int = 0, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = int(app.config.get("RESPONSE_CACHE_SIZE", self.max_entries))
+        self.ttl = float(app.config.get("RESPONSE_CACHE_TTL", self.ttl))
+        self.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, body: bytes):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[key] = (body, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def render_prometheus(self) -> str:
+        with self.lock:
+            hits, misses, size = self.hits, self.misses, len(self.entries)
+        return "\n".join([
+            "# HELP expense_api_response_cache_hits_total Responses served from the response cache.",
+            "# TYPE expense_api_response_cache_hits_total counter",
+            f"expense_api_response_cache_hits_total {hits}",
+            "# HELP expense_api_response_cache_misses_total Response cache lookups that missed.",
+            "# TYPE expense_api_response_cache_misses_total counter",
+            f"expense_api_response_cache_misses_total {misses}",
+            "# HELP expense_api_response_cache_entries Responses currently cached.",
+            "# TYPE expense_api_response_cache_entries gauge",
+            f"expense_api_response_cache_entries {size}",
+        ]) + "\n"
+
+
+response_cache = ResponseCache()
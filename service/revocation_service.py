@@ -0,0 +1,217 @@
+from extension import db
+from models.revoked_token_model import RevokedTokenModel, RevokedSubjectModel
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+import heapq
+import time
+
+
+def to_utc_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class MemoryRevocationStore:
+    """Per-process revoked JTIs, each dropped once its token has expired.
+
+    Subjects whose every earlier token is revoked are kept the same way,
+    until the last of those tokens has expired. Only expired entries are
+    ever dropped: a store holding max_entries unexpired ones refuses
+    further revocations rather than forgetting a revoked token that is
+    still valid.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.expiries = {}
+        self.heap = []
+        self.subjects = {}
+        self.lock = Lock()
+
+    class RevocationStoreFull(Exception):
+        pass
+
+    def purge(self, now: float):
+        while self.heap and self.heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self.heap)
+            if self.expiries.get(jti) == expires_at:
+                del self.expiries[jti]
+
+    def check_room(self, adding: bool):
+        if adding and len(self) >= self.max_entries:
+            raise self.RevocationStoreFull(
+                "too many tokens are revoked and not yet expired, please retry later"
+            )
+
+    def revoke(self, jti: str, expires_at: float):
+        now = time.time()
+        if expires_at <= now:
+            return
+        with self.lock:
+            self.purge(now)
+            self.check_room(jti not in self.expiries)
+            self.expiries[jti] = expires_at
+            heapq.heappush(self.heap, (expires_at, jti))
+
+    def revoke_subject(self, subject: str, issued_before: float, expires_at: float):
+        now = time.time()
+        with self.lock:
+            self.purge(now)
+            # Few subjects are revoked, so their expired entries are dropped by a scan.
+            for expired in [key for key, (_, until) in self.subjects.items() if until <= now]:
+                del self.subjects[expired]
+            self.check_room(subject not in self.subjects)
+            previous = self.subjects.get(subject, (0.0, 0.0))
+            self.subjects[subject] = (max(previous[0], issued_before), max(previous[1], expires_at))
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self.expiries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def is_subject_revoked(self, subject: str, issued_at: float) -> bool:
+        entry = self.subjects.get(subject)
+        return entry is not None and issued_at < entry[0]
+
+    def __len__(self):
+        return len(self.expiries) + len(self.subjects)
+
+
+class DatabaseRevocationStore:
+    """Revoked JTIs in the revoked_tokens table, shared by every worker.
+
+    Lookups are cached per process: revocations until the token expires,
+    misses for cache_ttl seconds, so a token revoked by another worker is
+    rejected here at most cache_ttl seconds later.
+    """
+
+    def __init__(self, cache_ttl: float = 5.0, cache_size: int = 10_000, purge_interval: float = 300.0, database=db):
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.purge_interval = purge_interval
+        self.cache = OrderedDict()
+        self.last_purge = 0.0
+        self.lock = Lock()
+        self.db = database
+
+    class RevocationException(Exception):
+        pass
+
+    def remember(self, key: str, value, valid_until: float):
+        with self.lock:
+            self.cache[key] = (value, valid_until)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def purge(self, now: float):
+        if now - self.last_purge > self.purge_interval:
+            self.last_purge = now
+            for model in (RevokedTokenModel, RevokedSubjectModel):
+                self.db.session.query(model).filter(
+                    model.expires_at <= to_utc_datetime(now)
+                ).delete(synchronize_session=False)
+
+    def revoke(self, jti: str, expires_at: float):
+        now = time.time()
+        if expires_at <= now:
+            return
+        try:
+            if not self.db.session.get(RevokedTokenModel, jti):
+                self.db.session.add(RevokedTokenModel(
+                    jti=jti,
+                    expires_at=to_utc_datetime(expires_at)
+                ))
+            self.purge(now)
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.RevocationException(f"Failed to revoke token: {str(e)}")
+        self.remember(jti, True, expires_at)
+
+    def revoke_subject(self, subject: str, issued_before: float, expires_at: float):
+        try:
+            entry = self.db.session.get(RevokedSubjectModel, subject)
+            if entry is None:
+                entry = RevokedSubjectModel(subject=subject, issued_before=to_utc_datetime(0), expires_at=to_utc_datetime(0))
+                self.db.session.add(entry)
+            entry.issued_before = max(entry.issued_before, to_utc_datetime(issued_before))
+            entry.expires_at = max(entry.expires_at, to_utc_datetime(expires_at))
+            self.purge(time.time())
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.RevocationException(f"Failed to revoke the tokens of {subject}: {str(e)}")
+        self.remember(f"subject:{subject}", issued_before, expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        now = time.time()
+        cached = self.cache.get(jti)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        token = self.db.session.get(RevokedTokenModel, jti)
+        if token and to_timestamp(token.expires_at) > now:
+            self.remember(jti, True, to_timestamp(token.expires_at))
+            return True
+        self.remember(jti, False, now + self.cache_ttl)
+        return False
+
+    def is_subject_revoked(self, subject: str, issued_at: float) -> bool:
+        now = time.time()
+        key = f"subject:{subject}"
+        cached = self.cache.get(key)
+        if not (cached and cached[1] > now):
+            entry = self.db.session.get(RevokedSubjectModel, subject)
+            if entry and to_timestamp(entry.expires_at) > now:
+                cached = (to_timestamp(entry.issued_before), to_timestamp(entry.expires_at))
+            else:
+                cached = (0.0, now + self.cache_ttl)
+            self.remember(key, *cached)
+        return issued_at < cached[0]
+
+
+class TokenBlocklist:
+    def __init__(self):
+        self.store = MemoryRevocationStore()
+        self.token_lifetime = timedelta(days=30).total_seconds()
+
+    def init_app(self, app):
+        backend = app.config.get("REVOCATION_STORE", "memory")
+        if backend == "memory":
+            self.store = MemoryRevocationStore(
+                max_entries=int(app.config.get("REVOCATION_MAX_ENTRIES", 100_000))
+            )
+        elif backend == "database":
+            self.store = DatabaseRevocationStore(
+                cache_ttl=float(app.config.get("REVOCATION_CACHE_TTL", 5.0)),
+                cache_size=int(app.config.get("REVOCATION_CACHE_SIZE", 10_000))
+            )
+        else:
+            raise ValueError(f"unknown REVOCATION_STORE {backend!r}, use memory or database")
+        self.token_lifetime = token_lifetime(app.config)
+
+    def revoke(self, jwt_payload: dict):
+        self.store.revoke(jwt_payload["jti"], float(jwt_payload["exp"]))
+
+    def revoke_subject(self, subject: str):
+        """Revoke every token issued to subject so far, the refresh tokens too."""
+        now = time.time()
+        self.store.revoke_subject(subject, now, now + self.token_lifetime)
+
+    def is_revoked(self, jwt_payload: dict) -> bool:
+        return self.store.is_revoked(jwt_payload["jti"]) or self.store.is_subject_revoked(
+            jwt_payload["sub"], float(jwt_payload.get("iat", 0))
+        )
+
+
+def token_lifetime(config) -> float:
+    """Seconds the longest lived token, a refresh token, stays valid."""
+    lifetime = config.get("JWT_REFRESH_TOKEN_EXPIRES", timedelta(days=30))
+    return max(lifetime, config.get("JWT_ACCESS_TOKEN_EXPIRES", timedelta(minutes=15))).total_seconds()
+
+
+token_blocklist = TokenBlocklist()
@@ -0,0 +1,226 @@
+from extension import db
+from models.expense_model import ExpenseModel, STORED_AMOUNT
+from models.expense_rollup_model import ExpenseDailyRollupModel
+from sqlalchemy.dialects import postgresql, sqlite
+from service.replica_router import replica_router
+from money import to_stored
+from datetime import datetime, timedelta
+
+
+class RollupService:
+    def __init__(self, database=db):
+        self.db = database
+
+    class RollupException(Exception):
+        pass
+
+    def day_start(self, day) -> datetime:
+        return datetime(day.year, day.month, day.day)
+
+    def collect_cells(self, entries) -> dict:
+        cells = {}
+        for created_at, category, amount in entries:
+            amount = to_stored(amount)
+            key = (created_at.date(), category)
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [amount, 1, amount, amount]
+            else:
+                cell[0] += amount
+                cell[1] += 1
+                cell[2] = min(cell[2], amount)
+                cell[3] = max(cell[3], amount)
+        return cells
+
+    def dialect(self) -> str:
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            raise self.RollupException(f"rollups are not supported on {dialect}")
+        return dialect
+
+    def upsert(self, user_id: str, cells: dict, increment: bool = True):
+        if not cells:
+            return
+        if self.dialect() == "postgresql":
+            insert, least, greatest = postgresql.insert, db.func.least, db.func.greatest
+        else:
+            insert, least, greatest = sqlite.insert, db.func.min, db.func.max
+
+        statement = insert(ExpenseDailyRollupModel.__table__)
+        table = ExpenseDailyRollupModel.__table__
+        if increment:
+            changes = {
+                "total_amount": table.c.total_amount + statement.excluded.total_amount,
+                "count": table.c.count + statement.excluded.count,
+                "min_amount": least(table.c.min_amount, statement.excluded.min_amount),
+                "max_amount": greatest(table.c.max_amount, statement.excluded.max_amount),
+            }
+        else:
+            changes = {
+                "total_amount": statement.excluded.total_amount,
+                "count": statement.excluded.count,
+                "min_amount": statement.excluded.min_amount,
+                "max_amount": statement.excluded.max_amount,
+            }
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.day, table.c.category_id],
+            set_=changes
+        )
+        self.db.session.execute(statement, [
+            {
+                "user_id": user_id,
+                "day": day,
+                "category_id": category,
+                "total_amount": total,
+                "count": count,
+                "min_amount": minimum,
+                "max_amount": maximum,
+            }
+            # In key order, so transactions upserting the same cells lock them in the same order.
+            for (day, category), (total, count, minimum, maximum) in sorted(cells.items())
+        ])
+
+    def lock_cells(self, user_id: str, cells):
+        """Create the cells that are missing, empty, and lock them for the rest of the transaction.
+
+        A write adding to one of the cells then waits for this transaction
+        to commit, instead of committing between a recompute's read of
+        expenses and its write of the cell, which would lose the write's
+        increment. SQLite has a single writer, so the insert alone holds
+        off other writers.
+        """
+        table = ExpenseDailyRollupModel.__table__
+        keys = sorted(cells)
+        insert = postgresql.insert if self.dialect() == "postgresql" else sqlite.insert
+        self.db.session.execute(insert(table).on_conflict_do_nothing(), [
+            {
+                "user_id": user_id, "day": day, "category_id": category,
+                "total_amount": 0, "count": 0, "min_amount": 0, "max_amount": 0,
+            }
+            for day, category in keys
+        ])
+        if self.dialect() == "postgresql":
+            self.db.session.execute(
+                db.select(table.c.day, table.c.category_id).where(
+                    table.c.user_id == user_id,
+                    db.tuple_(table.c.day, table.c.category_id).in_(keys)
+                ).order_by(table.c.day, table.c.category_id).with_for_update()
+            ).all()
+
+    def add(self, user_id: str, entries) -> dict:
+        """Add entries to their cells; returns {(day, category): total added}."""
+        cells = self.collect_cells(entries)
+        self.upsert(user_id=user_id, cells=cells)
+        return {key: cell[0] for key, cell in cells.items()}
+
+    def refresh(self, user_id: str, cells) -> dict:
+        """Recompute cells from expenses; returns {(day, category): change of the total}."""
+        if not cells:
+            return {}
+        self.lock_cells(user_id, cells)
+        days = {}
+        for day, category in cells:
+            days.setdefault(day, set()).add(category)
+
+        deltas = {}
+        for day, categories in days.items():
+            previous = dict(self.db.session.execute(
+                db.select(ExpenseDailyRollupModel.category_id, ExpenseDailyRollupModel.total_amount).where(
+                    ExpenseDailyRollupModel.user_id == user_id,
+                    ExpenseDailyRollupModel.day == day,
+                    ExpenseDailyRollupModel.category_id.in_(categories)
+                )
+            ).all())
+            start = self.day_start(day)
+            rows = self.db.session.execute(
+                db.select(
+                    ExpenseModel.category_id,
+                    db.func.sum(STORED_AMOUNT),
+                    db.func.count(),
+                    db.func.min(STORED_AMOUNT),
+                    db.func.max(STORED_AMOUNT)
+                ).where(
+                    ExpenseModel.user_id == user_id,
+                    ExpenseModel.createdAt >= start,
+                    ExpenseModel.createdAt < start + timedelta(days=1),
+                    ExpenseModel.category_id.in_(categories)
+                ).group_by(ExpenseModel.category_id)
+            ).all()
+
+            fresh = {(day, category): [total, count, minimum, maximum] for category, total, count, minimum, maximum in rows}
+            self.upsert(user_id=user_id, cells=fresh, increment=False)
+            for category in categories:
+                cell = fresh.get((day, category))
+                deltas[(day, category)] = (cell[0] if cell else 0) - previous.get(category, 0)
+
+            empty = categories - {category for _, category in fresh}
+            if empty:
+                self.db.session.execute(
+                    db.delete(ExpenseDailyRollupModel).where(
+                        ExpenseDailyRollupModel.user_id == user_id,
+                        ExpenseDailyRollupModel.day == day,
+                        ExpenseDailyRollupModel.category_id.in_(empty)
+                    )
+                )
+        return deltas
+
+    def day_categories(self, user_id: str, day) -> set:
+        """Categories the user has a cell for on day."""
+        return set(self.db.session.execute(
+            db.select(ExpenseDailyRollupModel.category_id).where(
+                ExpenseDailyRollupModel.user_id == user_id,
+                ExpenseDailyRollupModel.day == day
+            )
+        ).scalars())
+
+    def remove(self, user_id: str, entries) -> dict:
+        return self.refresh(user_id=user_id, cells={(created_at.date(), category) for created_at, category, _ in entries})
+
+    def daily_totals(self, user_id: str, first_day, last_day) -> list:
+        return self.db.session.execute(replica_router.for_user(
+            db.select(
+                ExpenseDailyRollupModel.day,
+                ExpenseDailyRollupModel.category_id,
+                ExpenseDailyRollupModel.total_amount,
+                ExpenseDailyRollupModel.count,
+                ExpenseDailyRollupModel.min_amount,
+                ExpenseDailyRollupModel.max_amount
+            ).where(
+                ExpenseDailyRollupModel.user_id == user_id,
+                ExpenseDailyRollupModel.day >= first_day,
+                ExpenseDailyRollupModel.day <= last_day
+            ), user_id
+        )).all()
+
+    def rebuild(self, user_id: str = None) -> int:
+        try:
+            delete = db.delete(ExpenseDailyRollupModel)
+            source = db.select(
+                ExpenseModel.user_id,
+                db.func.date(ExpenseModel.createdAt),
+                ExpenseModel.category_id,
+                db.func.sum(STORED_AMOUNT),
+                db.func.count(),
+                db.func.min(STORED_AMOUNT),
+                db.func.max(STORED_AMOUNT)
+            ).group_by(
+                ExpenseModel.user_id,
+                db.func.date(ExpenseModel.createdAt),
+                ExpenseModel.category_id
+            )
+            if user_id:
+                delete = delete.where(ExpenseDailyRollupModel.user_id == user_id)
+                source = source.where(ExpenseModel.user_id == user_id)
+
+            self.db.session.execute(delete)
+            result = self.db.session.execute(
+                db.insert(ExpenseDailyRollupModel.__table__).from_select(
+                    ["user_id", "day", "category_id", "total_amount", "count", "min_amount", "max_amount"],
+                    source
+                )
+            )
+            self.db.session.commit()
+            return result.rowcount
+        except Exception as e:
+            self.db.session.rollback()
+            raise self.RollupException(f"Failed to rebuild rollups: {str(e)}")
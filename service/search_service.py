@@ -0,0 +1,197 @@
+from extension import db
+from models.expense_model import ExpenseModel
+from service.expense_service import ExpenseService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from service.replica_router import replica_router
+from service.category_catalog import category_catalog
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from datetime import datetime
+import base64
+import re
+
+WORD = re.compile(r"\w+", re.UNICODE)
+MAX_QUERY_WORDS = 8
+
+# Kept verbatim in the PostgreSQL index definitions so the planner matches
+# the search expressions below against them.
+SEARCH_TEXT_SQL = "coalesce(title, '') || ' ' || coalesce(description, '')"
+
+
+class ExpenseSearchService:
+    """Ranked search over expense titles and descriptions.
+
+    PostgreSQL: a GIN index on to_tsvector('simple', title || description)
+    answers prefix word matches and a pg_trgm GIN index answers typos via
+    word similarity; both feed the rank. SQLite: an FTS5 table kept in step
+    with expenses by triggers answers prefix word matches, ranked by bm25.
+    """
+
+    def __init__(self, database=db, expenses=None):
+        self.db = database
+        self.expenses = expenses or ExpenseService(database)
+
+    class SearchException(Exception):
+        pass
+
+    class InvalidQuery(SearchException):
+        """A query, cursor or page size the client sent that cannot be served."""
+
+    def dialect(self) -> str:
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            raise self.SearchException(f"expense search is not supported on {dialect}")
+        return dialect
+
+    def install(self):
+        """Create the search indexes, idempotently; run by `flask init-db`."""
+        if self.dialect() == "postgresql":
+            self.db.session.execute(db.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            self.db.session.execute(db.text(
+                "CREATE INDEX IF NOT EXISTS ix_expenses_search_document ON expenses "
+                f"USING gin (to_tsvector('simple', {SEARCH_TEXT_SQL}))"
+            ))
+            self.db.session.execute(db.text(
+                "CREATE INDEX IF NOT EXISTS ix_expenses_search_trigram ON expenses "
+                f"USING gin (({SEARCH_TEXT_SQL}) gin_trgm_ops)"
+            ))
+        else:
+            exists = self.db.session.execute(db.text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expenses_search'"
+            )).scalar()
+            if not exists:
+                self.db.session.execute(db.text(
+                    "CREATE VIRTUAL TABLE expenses_search USING fts5("
+                    "title, description, content='expenses', tokenize='unicode61 remove_diacritics 2')"
+                ))
+                self.db.session.execute(db.text(
+                    "CREATE TRIGGER expenses_search_insert AFTER INSERT ON expenses BEGIN "
+                    "INSERT INTO expenses_search(rowid, title, description) "
+                    "VALUES (new.rowid, new.title, new.description); END"
+                ))
+                self.db.session.execute(db.text(
+                    "CREATE TRIGGER expenses_search_delete AFTER DELETE ON expenses BEGIN "
+                    "INSERT INTO expenses_search(expenses_search, rowid, title, description) "
+                    "VALUES ('delete', old.rowid, old.title, old.description); END"
+                ))
+                self.db.session.execute(db.text(
+                    "CREATE TRIGGER expenses_search_update AFTER UPDATE OF title, description ON expenses BEGIN "
+                    "INSERT INTO expenses_search(expenses_search, rowid, title, description) "
+                    "VALUES ('delete', old.rowid, old.title, old.description); "
+                    "INSERT INTO expenses_search(rowid, title, description) "
+                    "VALUES (new.rowid, new.title, new.description); END"
+                ))
+                self.rebuild()
+        self.db.session.commit()
+
+    def rebuild(self):
+        """Re-index every expense; on SQLite needed after VACUUM renumbers rowids."""
+        if self.dialect() == "postgresql":
+            self.db.session.execute(db.text("REINDEX INDEX ix_expenses_search_document"))
+            self.db.session.execute(db.text("REINDEX INDEX ix_expenses_search_trigram"))
+        else:
+            self.db.session.execute(db.text("INSERT INTO expenses_search(expenses_search) VALUES ('rebuild')"))
+        self.db.session.commit()
+
+    def query_words(self, query: str) -> list:
+        words = WORD.findall((query or "").lower())[:MAX_QUERY_WORDS]
+        if not words:
+            raise self.InvalidQuery("q must contain at least one letter or digit")
+        return words
+
+    def encode_cursor(self, rank: float, created_at, expense_id: str) -> str:
+        raw = f"{rank!r}|{created_at.isoformat()}|{expense_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            rank, created_at, expense_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 2)
+            return float(rank), datetime.fromisoformat(created_at), expense_id
+        except (ValueError, UnicodeDecodeError):
+            raise self.InvalidQuery("invalid cursor, please send the next_cursor from the previous page")
+
+    def match(self, dialect: str, words: list):
+        """The match condition and rank (higher is better) for the dialect."""
+        if dialect == "postgresql":
+            text = db.literal_column(f"({SEARCH_TEXT_SQL})")
+            document = db.func.to_tsvector(db.literal_column("'simple'"), text)
+            tsquery = db.func.to_tsquery(db.literal_column("'simple'"), " & ".join(f"{word}:*" for word in words))
+            phrase = " ".join(words)
+            condition = db.or_(document.op("@@")(tsquery), db.literal(phrase).op("<%")(text))
+            # Double precision so the rank in a cursor compares exactly on the next page.
+            rank = db.cast(db.func.ts_rank(document, tsquery) + db.func.word_similarity(phrase, text), DOUBLE_PRECISION)
+            return condition, rank, None
+        search = db.table("expenses_search")
+        join = db.literal_column("expenses_search.rowid") == db.literal_column("expenses.rowid")
+        condition = db.literal_column("expenses_search").op("MATCH")(" ".join(f'"{word}"*' for word in words))
+        rank = -db.func.bm25(db.literal_column("expenses_search"))
+        return condition, rank, (search, join)
+
+    def search(
+        self, user_email: str, query: str,
+        category: str = None,
+        expense_filter_category: str = None,
+        from_date: str = None, to_date: str = None,
+        limit: int = None, after: str = None,
+        fields: str = None
+    ) -> tuple:
+        """One ranked page of the user's expenses matching query, best first.
+
+        Optional category and date filters narrow the matches; without a
+        filter_category or dates every date is searched.
+        """
+        if not user_email:
+            raise self.SearchException("user email is missing")
+        words = self.query_words(query)
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise self.InvalidQuery(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+        try:
+            selected_fields = self.expenses.resolve_fields(fields)
+            user_id = self.expenses.resolve_user_id(user_email)
+            condition, rank, fts = self.match(self.dialect(), words)
+            rank = rank.label("rank")
+
+            columns = tuple(dict.fromkeys(selected_fields + ("createdAt", "id")))
+            statement = db.select(*[self.expenses.projected_column(column) for column in columns], rank)
+            if fts is not None:
+                statement = statement.select_from(ExpenseModel).join(fts[0], fts[1])
+            statement = statement.where(ExpenseModel.user_id == user_id, condition)
+
+            if category:
+                statement = statement.where(ExpenseModel.category_id == category_catalog.resolve(category))
+            if expense_filter_category or from_date or to_date:
+                start_date, end_date = self.expenses.resolve_date_range(
+                    expense_filter_category=expense_filter_category or ("custom" if from_date or to_date else None),
+                    from_date=from_date,
+                    to_date=to_date
+                )
+                statement = statement.where(ExpenseModel.createdAt >= start_date, ExpenseModel.createdAt <= end_date)
+
+            ranked = db.select(statement.subquery())
+            if after:
+                ranked = ranked.where(db.tuple_(
+                    ranked.selected_columns.rank, ranked.selected_columns.createdAt, ranked.selected_columns.id
+                ) < self.decode_cursor(after))
+            ranked = ranked.order_by(
+                ranked.selected_columns.rank.desc(),
+                ranked.selected_columns.createdAt.desc(),
+                ranked.selected_columns.id.desc()
+            ).limit(limit + 1)
+
+            rows = self.db.session.execute(replica_router.for_user(ranked, user_id)).all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]._mapping
+                next_cursor = self.encode_cursor(last["rank"], last["createdAt"], last["id"])
+
+            results = []
+            for row in rows:
+                mapping = row._mapping
+                results.append({field: mapping[field] for field in selected_fields})
+            return self.expenses.name_categories(results), next_cursor
+        except (self.SearchException, ExpenseService.ExpenseException):
+            raise
+        except Exception as e:
+            raise self.SearchException(f"Failed to search expenses: {str(e)}")
@@ -0,0 +1,248 @@
+"""Bank statement parsing for ExpenseImportService.
+
+Readers turn a text stream into numbered records of raw strings without
+holding more than one chunk of the file. normalize_chunk turns records into
+expense rows; it only depends on the standard library and money, so it can
+run in worker processes.
+"""
+from money import to_minor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import csv
+import functools
+import hashlib
+import re
+
+# Raw record fields, in the order the readers emit them.
+RECORD_FIELDS = ("row", "date", "amount", "debit", "credit", "title", "memo", "category", "type")
+
+HEADER_ALIASES = {
+    "date": ("date", "transaction date", "posted date", "posting date", "booking date", "value date", "dtposted"),
+    "amount": ("amount", "transaction amount", "value", "trnamt"),
+    "debit": ("debit", "withdrawal", "withdrawals", "money out", "paid out"),
+    "credit": ("credit", "deposit", "deposits", "money in", "paid in"),
+    "title": ("title", "payee", "merchant", "name", "description", "details", "narrative", "transaction description"),
+    "memo": ("memo", "notes", "note", "reference"),
+    "category": ("category",),
+    "type": ("type", "transaction type", "trntype"),
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y", "%Y%m%d", "%d %b %Y", "%b %d, %Y")
+CREDIT_TYPES = {"credit", "dep", "deposit", "int", "div", "directdep"}
+SIGNS = ("negative", "positive", "any")
+
+# Merchant keywords per category name; names are resolved by category_catalog.
+MERCHANT_CATEGORIES = {
+    "Groceries": ("grocery", "groceries", "supermarket", "market", "whole foods", "trader joe", "aldi", "lidl",
+                  "kroger", "safeway", "costco", "walmart", "tesco", "sainsbury"),
+    "Utilities": ("electric", "energy", "water", "utility", "utilities", "internet", "broadband", "comcast",
+                  "verizon", "at&t", "t-mobile", "vodafone", "gas co"),
+    "Electronics": ("best buy", "apple store", "apple.com", "electronics", "currys", "micro center", "newegg"),
+    "Leisure": ("netflix", "spotify", "cinema", "theatre", "theater", "restaurant", "cafe", "coffee", "starbucks",
+                "bar", "pub", "steam", "hulu", "disney"),
+    "Health": ("pharmacy", "cvs", "walgreens", "clinic", "dental", "dentist", "hospital", "doctor", "gym"),
+    "Clothing": ("h&m", "zara", "uniqlo", "nike", "adidas", "clothing", "apparel", "shoes", "primark"),
+}
+
+NON_WORD = re.compile(r"[^0-9a-z]+")
+OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+OFX_READ_SIZE = 1 << 16
+
+
+class StatementFormatException(Exception):
+    pass
+
+
+def detect_format(filename: str, head: bytes) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ofx", ".qfx")) or b"OFXHEADER" in head[:1024].upper() or b"<OFX>" in head[:4096].upper():
+        return "ofx"
+    return "csv"
+
+
+def header_columns(header: list) -> dict:
+    """Index of each record field in the CSV header; title falls back to description."""
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in names and names.index(alias) not in columns.values():
+                columns[field] = names.index(alias)
+                break
+    if "date" not in columns or "title" not in columns or not ({"amount", "debit", "credit"} & set(columns)):
+        raise StatementFormatException(
+            "the CSV header needs a date, a description and an amount (or debit/credit) column"
+        )
+    return columns
+
+
+def read_csv(text, chunk_size: int):
+    """Yield lists of raw records from a CSV statement with a header row."""
+    first = text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(first, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    header = next(csv.reader([first], dialect))
+    columns = header_columns(header)
+    positions = [columns.get(field) for field in RECORD_FIELDS[1:]]
+
+    chunk = []
+    for number, values in enumerate(csv.reader(text, dialect), start=2):
+        if not values:
+            continue
+        chunk.append((number, *(
+            values[position] if position is not None and position < len(values) else None
+            for position in positions
+        )))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_ofx(text, chunk_size: int):
+    """Yield lists of raw records from the STMTTRN blocks of an OFX/QFX statement."""
+    buffer, number, chunk = "", 0, []
+    while True:
+        data = text.read(OFX_READ_SIZE)
+        buffer += data
+        end = 0
+        for match in OFX_TRANSACTION.finditer(buffer):
+            end = match.end()
+            fields = {name.upper(): value.strip() for name, value in OFX_FIELD.findall(match.group(1))}
+            number += 1
+            chunk.append((
+                number, fields.get("DTPOSTED"), fields.get("TRNAMT"), None, None,
+                fields.get("NAME") or fields.get("PAYEE") or fields.get("MEMO"),
+                fields.get("MEMO"), None, fields.get("TRNTYPE")
+            ))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        buffer = buffer[end:]
+        if not data:
+            break
+    if chunk:
+        yield chunk
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date(value: str, date_format: str = None) -> datetime:
+    # Cached: a statement repeats the same few hundred dates on every line.
+    value = (value or "").strip()
+    if date_format:
+        return datetime.strptime(value, date_format)
+    if len(value) >= 8 and value[:8].isdigit():
+        # OFX dates: YYYYMMDD[HHMMSS[.XXX]][[-5:EST]]
+        return datetime.strptime(value[:8], "%Y%m%d")
+    for candidate in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, candidate)
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognized date {value!r}")
+
+
+def parse_amount(value: str):
+    value = (value or "").strip().replace(",", "").replace(" ", "")
+    if not value:
+        return None
+    negative = value.startswith("(") and value.endswith(")")
+    value = value.strip("()").lstrip("$€£¥")
+    if value.endswith("-"):
+        negative, value = True, value[:-1]
+    amount = Decimal(value)
+    return -amount if negative else amount
+
+
+def signed_amount(record: tuple):
+    _, _, amount, debit, credit, *_ = record
+    amount = parse_amount(amount)
+    if amount is not None:
+        return amount
+    debit, credit = parse_amount(debit), parse_amount(credit)
+    if debit:
+        return -abs(debit)
+    if credit:
+        return abs(credit)
+    return None
+
+
+def normalize_title(title: str) -> str:
+    return NON_WORD.sub(" ", title.lower()).strip()
+
+
+def merchant_category(normalized_title: str) -> str:
+    padded = f" {normalized_title} "
+    for category, keyword in MERCHANT_KEYWORDS:
+        if keyword in padded:
+            return category
+    return "Others"
+
+
+# Keywords normalized like titles and matched as whole words.
+MERCHANT_KEYWORDS = tuple(
+    (category, f" {normalize_title(keyword)} ")
+    for category, keywords in MERCHANT_CATEGORIES.items() for keyword in keywords
+)
+
+
+def content_hash(user_id: str, day: datetime, cents: int, normalized_title: str) -> str:
+    key = f"{user_id}|{day.date().isoformat()}|{cents}|{normalized_title}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def occurrence_hash(digest: str, occurrence: int) -> str:
+    """Hash of the occurrence-th line of a file with the content hash digest.
+
+    The first occurrence keeps the plain content hash, so statements imported
+    before repeats were counted still deduplicate against it.
+    """
+    if occurrence <= 1:
+        return digest
+    return hashlib.blake2b(f"{digest}|{occurrence}".encode(), digest_size=16).hexdigest()
+
+
+def normalize_chunk(records: list, user_id: str, sign: str = "negative", date_format: str = None) -> tuple:
+    """Expense rows and (row, error) rejections for one chunk of raw records.
+
+    Rows are (content_hash, date, amount, title, description, category name);
+    the category is the record's own, or guessed from merchant keywords.
+    Identical lines get the same content hash here; the importer numbers
+    their occurrences across the file with occurrence_hash.
+    """
+    rows, rejected = [], []
+    for record in records:
+        number, date, _, _, _, title, memo, category, kind = record
+        try:
+            title = (title or "").strip()
+            if not title:
+                raise ValueError("description is missing")
+            day = parse_date(date, date_format)
+            try:
+                amount = signed_amount(record)
+            except InvalidOperation:
+                raise ValueError("amount is not a number")
+            if amount is None or amount == 0:
+                raise ValueError("amount is missing")
+            if sign == "negative":
+                if amount > 0 or (kind or "").lower() in CREDIT_TYPES:
+                    raise ValueError("credit, not an expense")
+            elif sign == "positive" and amount < 0:
+                raise ValueError("credit, not an expense")
+            amount = abs(amount)
+            normalized = normalize_title(title)
+            rows.append((
+                content_hash(user_id, day, to_minor(amount), normalized),
+                day,
+                float(amount),
+                title[:255],
+                ((memo or "").strip() or title)[:255],
+                (category or "").strip() or merchant_category(normalized),
+            ))
+        except ValueError as e:
+            rejected.append((number, str(e)))
+    return rows, rejected
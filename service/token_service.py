@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+import jwt
+import uuid
+
+
+class TokenService:
+    """Issues and checks JWTs in the same format as flask_jwt_extended.
+
+    Used by the ASGI app, so tokens from either serving mode work in the other.
+    """
+
+    def __init__(
+        self, secret: str,
+        access_expires: timedelta = timedelta(minutes=15),
+        refresh_expires: timedelta = timedelta(days=30),
+        admin_email: str = None,
+        algorithm: str = "HS256"
+    ):
+        self.secret = secret
+        self.access_expires = access_expires
+        self.refresh_expires = refresh_expires
+        self.admin_email = admin_email
+        self.algorithm = algorithm
+
+    class TokenException(Exception):
+        def __init__(self, error: str, message: str):
+            super().__init__(message)
+            self.error = error
+
+    def create_token(self, identity: str, token_type: str, fresh: bool = False) -> str:
+        now = datetime.now(timezone.utc)
+        claims = {
+            "fresh": fresh,
+            "iat": now,
+            "jti": str(uuid.uuid4()),
+            "type": token_type,
+            "sub": identity,
+            "nbf": now,
+            "exp": now + (self.access_expires if token_type == "access" else self.refresh_expires),
+        }
+        if self.admin_email and identity == self.admin_email:
+            claims["is_admin"] = True
+        return jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def create_access_token(self, identity: str, fresh: bool = False) -> str:
+        return self.create_token(identity, "access", fresh=fresh)
+
+    def create_refresh_token(self, identity: str) -> str:
+        return self.create_token(identity, "refresh")
+
+    def decode_header(self, authorization: str, refresh: bool = False, fresh: bool = False) -> dict:
+        if not authorization or not authorization.startswith("Bearer "):
+            raise self.TokenException("authorization_required", "Request does not contain an access token.")
+        try:
+            payload = jwt.decode(authorization[len("Bearer "):], self.secret, algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            raise self.TokenException("token_expired", "The token has expired.")
+        except jwt.InvalidTokenError:
+            raise self.TokenException("invalid_token", "Signature verification failed.")
+
+        expected = "refresh" if refresh else "access"
+        if payload.get("type") != expected:
+            raise self.TokenException("invalid_token", "Signature verification failed.")
+        if fresh and not payload.get("fresh"):
+            raise self.TokenException("fresh_token_required", "The token is not fresh.")
+        return payload
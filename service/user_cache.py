@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class UserIdCache:
+    """Per-process LRU of email -> user id, entries expire after ttl seconds."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = int(app.config.get("USER_CACHE_SIZE", self.max_entries))
+        self.ttl = float(app.config.get("USER_CACHE_TTL", self.ttl))
+        self.clear()
+
+    def get(self, email: str):
+        with self.lock:
+            entry = self.entries.get(email)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(email)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, email: str, user_id: str):
+        with self.lock:
+            self.entries[email] = (user_id, time.monotonic() + self.ttl)
+            self.entries.move_to_end(email)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, email: str):
+        with self.lock:
+            self.entries.pop(email, None)
+
+    def forget_user(self, user_id: str):
+        """Drop every email cached for user_id, which may since have been renamed."""
+        with self.lock:
+            for email in [email for email, (cached, _) in self.entries.items() if cached == user_id]:
+                del self.entries[email]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_id_cache = UserIdCache()
@@ -0,0 +1,58 @@
+from extension import db
+from models.expense_version_model import ExpenseVersionModel
+from service.replica_router import replica_router
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+
+
+class ExpenseVersionService:
+    """Per-user counter bumped in the same transaction as every expense write.
+
+    The row also records when the user last wrote, which replica_router
+    reads from the primary to keep the user's reads there for a while.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+
+    class VersionException(Exception):
+        pass
+
+    def install(self):
+        """Add the writtenAt column to an existing table; run by `flask init-db`."""
+        inspector = db.inspect(self.db.session.connection())
+        columns = {column["name"] for column in inspector.get_columns(ExpenseVersionModel.__tablename__)}
+        if "writtenAt" not in columns:
+            self.db.session.execute(db.text(
+                f'ALTER TABLE {ExpenseVersionModel.__tablename__} ADD COLUMN "writtenAt" TIMESTAMP'
+            ))
+        self.db.session.commit()
+
+    def upsert(self, user_id: str, changes: dict, version: int):
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            insert = postgresql.insert
+        elif dialect == "sqlite":
+            insert = sqlite.insert
+        else:
+            raise self.VersionException(f"expense versions are not supported on {dialect}")
+
+        table = ExpenseVersionModel.__table__
+        now = datetime.utcnow()
+        statement = insert(table).values(user_id=user_id, version=version, writtenAt=now)
+        self.db.session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={**changes, "writtenAt": now}
+        ))
+
+    def bump(self, user_id: str):
+        self.upsert(user_id, {"version": ExpenseVersionModel.__table__.c.version + 1}, version=1)
+
+    def touch(self, user_id: str):
+        """Record a write that does not change the user's expenses, such as a budget."""
+        self.upsert(user_id, {}, version=0)
+
+    def current(self, user_id: str) -> int:
+        return self.db.session.execute(replica_router.for_user(
+            db.select(ExpenseVersionModel.version).where(ExpenseVersionModel.user_id == user_id), user_id
+        )).scalar() or 0
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config reads the environment when it is first imported.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "test-secret-key-test-secret-key-test-secret")
+os.environ["AUTO_CREATE_TABLES"] = "true"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["IMPORT_WORKERS"] = "0"
+os.environ["JOB_BATCH_PAUSE"] = "0"
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """An app on a SQLite database of its own; environment set with monkeypatch applies to it."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("ANALYTICS_SNAPSHOT_DIR", str(tmp_path / "analytics_snapshot"))
+    from app import create_app
+    from extension import db
+
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email: str, password: str = "password") -> dict:
+    client.post("/api/v1/signup", json={"username": email, "email": email, "password": password})
+    response = client.post("/api/v1/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def user_id(email: str) -> str:
+    from extension import db
+    from models.user_model import UserModel
+
+    return db.session.execute(db.select(UserModel.id).where(UserModel.email == email)).scalar()
+
+
+def store_expenses(email: str, expenses: list) -> list:
+    """Store (title, amount, category, createdAt) tuples for email as the ingestion path does; returns the rows."""
+    from service.expense_service import ExpenseService
+
+    service = ExpenseService()
+    rows = [
+        {**service.prepare_expense(title, amount, category, title, email), "createdAt": created_at, "updatedAt": created_at}
+        for title, amount, category, created_at in expenses
+    ]
+    service.store_expense_rows(rows)
+    return rows
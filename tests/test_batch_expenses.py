@@ -0,0 +1,96 @@
+import threading
+
+from conftest import login, user_id
+
+
+def rollup_cells(owner: str) -> dict:
+    from extension import db
+    from models.expense_rollup_model import ExpenseDailyRollupModel as rollups
+
+    return {
+        (day, category): (total, count) for day, category, total, count in db.session.execute(
+            db.select(rollups.day, rollups.category_id, rollups.total_amount, rollups.count).where(rollups.user_id == owner)
+        )
+    }
+
+
+def test_batch_update_racing_a_category_change_keeps_rollups_exact(app, client, monkeypatch):
+    from extension import db
+    from service.expense_service import ExpenseService
+    from service.rollup_service import RollupService
+
+    headers = login(client, "racer@example.com")
+    owner = user_id("racer@example.com")
+    created = client.post("/api/v1/create-expenses", json={"expenses": [
+        {"title": "milk", "amount": 5, "category": "groceries", "description": "milk"},
+        {"title": "film", "amount": 9, "category": "leisure", "description": "film"},
+    ]}, headers=headers).get_json()["data"]
+    milk = created[0]["data"]["id"]
+
+    def recategorize():
+        with app.app_context():
+            ExpenseService().update_expense(expense_id=milk, user_email="racer@example.com", category="leisure")
+
+    # Another request moves the milk to leisure while the batch is between finding its rows and writing them.
+    racer = threading.Thread(target=recategorize)
+    find_owned_expenses = ExpenseService.find_owned_expenses
+
+    def racing_find(self, user_id, expense_ids):
+        owned = find_owned_expenses(self, user_id, expense_ids)
+        if racer.ident is None:
+            racer.start()
+            racer.join(timeout=0.5)
+        return owned
+
+    monkeypatch.setattr(ExpenseService, "find_owned_expenses", racing_find)
+    response = client.put("/api/v1/update-expenses", json={"expenses": [{"expense_id": milk, "amount": 7}]}, headers=headers)
+    racer.join()
+
+    assert response.get_json()["succeeded"] == 1
+    stored = rollup_cells(owner)
+    RollupService().rebuild(user_id=owner)
+    db.session.remove()
+    assert stored == rollup_cells(owner)
+
+
+def test_batches_report_each_item(client):
+    headers = login(client, "batcher@example.com")
+    other = login(client, "other@example.com")
+    theirs = client.post("/api/v1/create-expenses", json={"expenses": [
+        {"title": "theirs", "amount": 4, "category": "leisure", "description": "theirs"},
+    ]}, headers=other).get_json()["data"][0]["data"]["id"]
+
+    created = client.post("/api/v1/create-expenses", json={"expenses": [
+        {"title": "milk", "amount": 5, "category": "groceries", "description": "milk"},
+        {"title": "no amount", "category": "groceries", "description": "no amount"},
+        {"title": "bus", "amount": 3, "category": "transport", "description": "bus"},
+    ]}, headers=headers).get_json()
+    assert (created["succeeded"], created["failed"]) == (2, 1)
+    assert created["data"][1] == {"status": False, "error": "amount is missing"}
+    milk, bus = created["data"][0]["data"]["id"], created["data"][2]["data"]["id"]
+
+    updated = client.put("/api/v1/update-expenses", json={"expenses": [
+        {"expense_id": milk, "amount": 6},
+        {"expense_id": theirs, "amount": 0.5},
+        {"expense_id": bus, "amount": -1},
+    ]}, headers=headers).get_json()
+    assert [result["status"] for result in updated["data"]] == [True, False, False]
+    assert updated["data"][1]["error"] == "Expense not found for the given ID."
+
+    deleted = client.delete("/api/v1/delete-expenses", json={"expense_ids": [bus, theirs, bus]}, headers=headers).get_json()
+    assert [result["status"] for result in deleted["data"]] == [True, False, True]
+
+    mine = client.get("/api/v1/filter-expense", query_string={"fields": "title,amount"}, headers=headers).get_json()["data"]
+    assert mine == [{"title": "milk", "amount": 6}]
+    theirs = client.get("/api/v1/filter-expense", query_string={"fields": "amount"}, headers=other).get_json()["data"]
+    assert theirs == [{"amount": 4}]
+
+
+def test_a_batch_over_the_limit_is_rejected_whole(client):
+    from service.expense_service import MAX_BATCH_SIZE
+
+    headers = login(client, "batcher@example.com")
+    expense = {"title": "milk", "amount": 5, "category": "groceries", "description": "milk"}
+    response = client.post("/api/v1/create-expenses", json={"expenses": [expense] * (MAX_BATCH_SIZE + 1)}, headers=headers)
+    assert response.get_json() == {"status": False, "error": f"cannot process more than {MAX_BATCH_SIZE} expenses in one batch"}
+    assert client.get("/api/v1/filter-expense", headers=headers).get_json()["count"] == 0
@@ -0,0 +1,79 @@
+from conftest import login
+
+
+def spend(client, headers, amount: float, category: str = "groceries") -> str:
+    response = client.post("/api/v1/create-expense", json={
+        "title": "shop", "amount": amount, "category": category, "description": "shop"
+    }, headers=headers)
+    return response.get_json()["id"]
+
+
+def thresholds(client, headers) -> list:
+    return [alert["threshold"] for alert in client.get("/api/v1/budget-alerts", headers=headers).get_json()["data"]]
+
+
+def test_alerts_fire_once_per_crossing(client):
+    headers = login(client, "budgeter@example.com")
+    assert client.put("/api/v1/set-budget", json={"category": "Groceries", "amount": 100}, headers=headers).status_code == 200
+
+    spend(client, headers, 50)
+    spend(client, headers, 40, category="leisure")
+    assert thresholds(client, headers) == []
+
+    big = spend(client, headers, 35)
+    spend(client, headers, 5)
+    assert thresholds(client, headers) == [80]
+
+    spend(client, headers, 10)
+    last = spend(client, headers, 20)
+    assert thresholds(client, headers) == [80, 100]
+
+    # Falling back under both lines is silent; climbing over them again is a new crossing.
+    client.delete("/api/v1/delete-expense", json={"expense_id": big}, headers=headers)
+    client.put("/api/v1/update-expense", json={"expense_id": last, "amount": 1}, headers=headers)
+    assert thresholds(client, headers) == [80, 100]
+    spend(client, headers, 40)
+    assert thresholds(client, headers) == [80, 100, 80, 100]
+
+    budget = client.get("/api/v1/budgets", headers=headers).get_json()["data"]
+    assert [(item["category"], item["spent"], item["remaining"]) for item in budget] == [("groceries", 106, -6)]
+
+
+def test_one_write_crossing_both_lines_alerts_for_each_and_others_see_none(client):
+    headers = login(client, "budgeter@example.com")
+    other = login(client, "other@example.com")
+    client.put("/api/v1/set-budget", json={"category": "groceries", "amount": 100}, headers=headers)
+
+    spend(client, headers, 150)
+    alerts = client.get("/api/v1/budget-alerts", headers=headers).get_json()["data"]
+    assert [(alert["threshold"], alert["category"], alert["budget"], alert["spent"]) for alert in alerts] == [
+        (80, "groceries", 100, 150), (100, "groceries", 100, 150)
+    ]
+    assert thresholds(client, other) == []
+
+
+def test_a_rolled_back_write_publishes_nothing(app, client, monkeypatch):
+    from service.version_service import ExpenseVersionService
+
+    headers = login(client, "budgeter@example.com")
+    client.put("/api/v1/set-budget", json={"category": "groceries", "amount": 100}, headers=headers)
+
+    bump = ExpenseVersionService.bump
+    failing = [True]
+
+    def failing_bump(self, user_id):
+        if failing.pop():
+            raise RuntimeError("disk full")
+        return bump(self, user_id)
+
+    # The total is moved and the alert queued before the write fails and rolls back.
+    monkeypatch.setattr(ExpenseVersionService, "bump", failing_bump)
+    assert client.post("/api/v1/create-expense", json={
+        "title": "shop", "amount": 90, "category": "groceries", "description": "shop"
+    }, headers=headers).status_code == 500
+    failing.append(False)
+
+    assert thresholds(client, headers) == []
+    spend(client, headers, 10)
+    assert thresholds(client, headers) == []
+    assert client.get("/api/v1/budgets", headers=headers).get_json()["data"][0]["spent"] == 10
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from conftest import login, user_id
+
+
+MAY_2024 = {"filter_category": "custom", "from_date": "2024-05-01T00:00:00", "to_date": "2024-05-31T23:59:59"}
+
+
+def categories_of(client, headers, dates: dict = None) -> list:
+    expenses = client.get("/api/v1/filter-expense", query_string={"fields": "title,category", **(dates or {})}, headers=headers)
+    return sorted((expense["title"], expense["category"]) for expense in expenses.get_json()["data"])
+
+
+def test_names_and_aliases_resolve_to_one_category(app, client):
+    app.config["ADMIN_EMAIL"] = "admin@example.com"
+    admin = login(client, "admin@example.com")
+    headers = login(client, "spender@example.com")
+
+    created = client.post("/api/v1/categories", json={"name": " Food ", "aliases": ["Snacks", "take away"]}, headers=admin)
+    assert created.status_code == 201
+    assert created.get_json()["data"] == {"id": 101, "name": "food", "builtin": False, "aliases": ["food", "snacks", "take away"]}
+    assert client.post("/api/v1/categories", json={"name": "treats", "aliases": ["SNACKS"]}, headers=admin).get_json() == {
+        "status": False, "error": "already used by another category: snacks"
+    }
+    assert client.post("/api/v1/categories", json={"name": "mine"}, headers=headers).status_code == 403
+
+    for title, category in [("chips", "snacks"), ("pizza", "Take  Away"), ("socks", "Clothes"), ("shirt", " CLOTHING"), ("kite", "kites")]:
+        client.post("/api/v1/create-expense", json={
+            "title": title, "amount": 3, "category": category, "description": title
+        }, headers=headers)
+    assert categories_of(client, headers) == [
+        ("chips", "food"), ("kite", "others"), ("pizza", "food"), ("shirt", "clothing"), ("socks", "clothing")
+    ]
+    cli = app.test_cli_runner().invoke(args=["create-category", "Pets", "--alias", "vet"])
+    assert cli.exit_code == 0 and "created category 102 pets (pets, vet)" in cli.output
+    listed = client.get("/api/v1/categories", headers=headers).get_json()["data"]
+    assert [(category["name"], category["builtin"]) for category in listed][-3:] == [("others", True), ("food", False), ("pets", False)]
+
+
+def test_categories_another_process_created_are_picked_up_on_reload(app):
+    from extension import db
+    from models.category_model import CategoryModel, CategoryAliasModel
+    from service.category_catalog import category_catalog, OTHERS
+
+    category_catalog.reload_interval = 3600
+    category_catalog.load()
+    db.session.add(CategoryModel(id=150, name="garden", builtin=False, createdAt=datetime.utcnow()))
+    db.session.flush()
+    db.session.add(CategoryAliasModel(alias="garden", category_id=150))
+    db.session.commit()
+
+    assert category_catalog.resolve("Garden") == OTHERS
+    category_catalog.loaded_at = None
+    assert category_catalog.resolve("Garden") == 150
+    assert category_catalog.name(150) == "garden"
+
+
+def make_legacy_tables(owner: str):
+    """Turn expenses and budgets back into their free-text category shape, with rows spelled every which way."""
+    from extension import db
+
+    day = datetime(2024, 5, 3, 12)
+    expenses = [
+        ("e1", "jeans", 40, "Clothing"), ("e2", "scarf", 10, "clothes"), ("e3", "coat", 50, " CLOTHING "),
+        ("e4", "milk", 2, "Groceries"), ("e5", "kite", 8, "kites"), ("e6", "apples", 3, None),
+    ]
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.execute(db.text("DROP TABLE expenses"))
+        connection.execute(db.text(
+            "CREATE TABLE expenses (id VARCHAR(255) PRIMARY KEY, title VARCHAR(255) NOT NULL, amount FLOAT NOT NULL, "
+            "category VARCHAR(255), description VARCHAR(255), content_hash VARCHAR(32), user_id VARCHAR(255) NOT NULL, "
+            '"createdAt" DATETIME NOT NULL, "updatedAt" DATETIME NOT NULL)'
+        ))
+        connection.execute(db.text(
+            'INSERT INTO expenses (id, title, amount, category, description, user_id, "createdAt", "updatedAt") '
+            "VALUES (:id, :title, :amount, :category, :title, :owner, :day, :day)"
+        ), [
+            {"id": expense_id, "title": title, "amount": amount, "category": category, "owner": owner, "day": day}
+            for expense_id, title, amount, category in expenses
+        ])
+        connection.execute(db.text("DROP TABLE budgets"))
+        connection.execute(db.text(
+            "CREATE TABLE budgets (user_id VARCHAR(255) NOT NULL, category VARCHAR(255) NOT NULL, amount FLOAT NOT NULL, "
+            '"createdAt" DATETIME NOT NULL, "updatedAt" DATETIME NOT NULL, PRIMARY KEY (user_id, category))'
+        ))
+        connection.execute(db.text(
+            'INSERT INTO budgets (user_id, category, amount, "createdAt", "updatedAt") '
+            "VALUES (:owner, :category, :amount, :updated, :updated)"
+        ), [
+            {"owner": owner, "category": "clothing", "amount": 80, "updated": datetime(2024, 1, 1)},
+            {"owner": owner, "category": "Clothes", "amount": 120, "updated": datetime(2024, 2, 1)},
+        ])
+
+
+def test_migrate_categories_backfills_ids_and_carries_budgets_over(app, client):
+    from extension import db
+    from service.category_migration import CategoryMigration
+
+    headers = login(client, "legacy@example.com")
+    make_legacy_tables(user_id("legacy@example.com"))
+
+    result = app.test_cli_runner().invoke(args=["migrate-categories", "--batch-size", "4"])
+    assert result.exit_code == 0, result.output
+    assert "converted 6 expenses and dropped the category text column, carried over 1 budgets" in result.output
+
+    columns = {column["name"] for column in db.inspect(db.engine).get_columns("expenses")}
+    assert "category" not in columns and "category_id" in columns
+    assert categories_of(client, headers, MAY_2024) == [
+        ("apples", "others"), ("coat", "clothing"), ("jeans", "clothing"),
+        ("kite", "others"), ("milk", "groceries"), ("scarf", "clothing")
+    ]
+    budgets = client.get("/api/v1/budgets", query_string={"month": "2024-05"}, headers=headers).get_json()["data"]
+    assert budgets == [
+        {"category": "clothing", "month": "2024-05", "budget": 120, "spent": 100, "remaining": 20, "percent": 83.3}
+    ]
+    summary = client.get("/api/v1/expense-summary", query_string=MAY_2024, headers=headers).get_json()["data"]
+    assert (summary["count"], summary["total"]) == (6, 113)
+
+    again = CategoryMigration().run()
+    assert (again["migrated_rows"], again["dropped_column"], again["budgets"]) == (0, False, 0)
@@ -0,0 +1,43 @@
+from conftest import login
+
+
+def filter_page(client, headers, etag: str = None, **query):
+    if etag:
+        headers = {**headers, "If-None-Match": f'"{etag}"'}
+    return client.get("/api/v1/filter-expense", query_string=query, headers=headers)
+
+
+def test_filter_answers_304_until_one_of_the_users_expenses_changes(client, monkeypatch):
+    from service.response_cache import response_cache
+
+    monkeypatch.setattr(response_cache, "max_entries", 100)
+    headers = login(client, "poller@example.com")
+    other = login(client, "other@example.com")
+    expense = {"title": "milk", "amount": 5, "category": "groceries", "description": "milk"}
+    expense_id = client.post("/api/v1/create-expense", json=expense, headers=headers).get_json()["id"]
+
+    first = filter_page(client, headers)
+    etag = first.get_etag()[0]
+    again = filter_page(client, headers, etag)
+    assert again.status_code == 304 and again.get_data() == b"" and again.get_etag()[0] == etag
+
+    hits = response_cache.hits
+    assert filter_page(client, headers).get_data() == first.get_data()
+    assert response_cache.hits == hits + 1
+    # Another page shape, and another user's writes, have ETags of their own.
+    assert filter_page(client, headers, etag, fields="id").status_code == 200
+    client.post("/api/v1/create-expense", json=expense, headers=other)
+    assert filter_page(client, headers, etag).status_code == 304
+
+    writes = [
+        lambda: client.put("/api/v1/update-expense", json={"expense_id": expense_id, "amount": 6}, headers=headers),
+        lambda: client.post("/api/v1/create-expenses", json={"expenses": [expense]}, headers=headers),
+        lambda: client.delete("/api/v1/delete-expense", json={"expense_id": expense_id}, headers=headers),
+    ]
+    for write in writes:
+        assert write().status_code == 200
+        response = filter_page(client, headers, etag)
+        assert response.status_code == 200 and response.get_etag()[0] != etag
+        assert response.get_data() != first.get_data()
+        etag, first = response.get_etag()[0], response
+    assert [expense["amount"] for expense in first.get_json()["data"]] == [5]
@@ -0,0 +1,40 @@
+from conftest import login, user_id
+
+
+def test_another_users_expense_can_neither_be_updated_nor_deleted(client):
+    from extension import db
+    from models.expense_model import ExpenseModel
+
+    owner = login(client, "owner@example.com")
+    intruder = login(client, "intruder@example.com")
+    expense_id = client.post("/api/v1/create-expense", json={
+        "title": "rent", "amount": 900, "category": "utilities", "description": "rent"
+    }, headers=owner).get_json()["id"]
+
+    response = client.put("/api/v1/update-expense", json={"expense_id": expense_id, "amount": 1}, headers=intruder)
+    assert response.status_code == 404
+    response = client.delete("/api/v1/delete-expense", json={"expense_id": expense_id}, headers=intruder)
+    assert response.status_code == 404
+    response = client.delete("/api/v1/delete-expense", json={"expense_id": "no-such-expense"}, headers=owner)
+    assert response.status_code == 404
+
+    db.session.remove()
+    expense = db.session.get(ExpenseModel, expense_id)
+    assert (expense.user_id, expense.amount) == (user_id("owner@example.com"), 900)
+
+
+def test_update_and_delete_return_the_row_they_changed(client):
+    headers = login(client, "owner@example.com")
+    expense_id = client.post("/api/v1/create-expense", json={
+        "title": "rent", "amount": 900, "category": "utilities", "description": "rent"
+    }, headers=headers).get_json()["id"]
+
+    updated = client.put("/api/v1/update-expense", json={
+        "expense_id": expense_id, "amount": 950, "category": "groceries"
+    }, headers=headers).get_json()
+    assert (updated["id"], updated["title"], updated["amount"], updated["category"]) == (expense_id, "rent", 950, "groceries")
+
+    deleted = client.delete("/api/v1/delete-expense", json={"expense_id": expense_id}, headers=headers).get_json()
+    assert (deleted["id"], deleted["amount"]) == (expense_id, 950)
+    response = client.get("/api/v1/expense-status", query_string={"expense_id": expense_id}, headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,40 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from conftest import login, store_expenses
+
+RANGE = {"filter_category": "custom", "from_date": "2024-03-01", "to_date": "2024-03-31T23:59:59"}
+
+
+def test_exports_the_range_oldest_first_in_both_formats(client):
+    headers = login(client, "exporter@example.com")
+    login(client, "other@example.com")
+    store_expenses("exporter@example.com", [
+        ("rent", 900, "Utilities", datetime(2024, 3, 1)),
+        ("before", 1, "Leisure", datetime(2024, 2, 29, 23, 59)),
+        ("bread", 2.5, "Groceries", datetime(2024, 3, 15, 9)),
+        ("after", 1, "Leisure", datetime(2024, 4, 1)),
+    ])
+    store_expenses("other@example.com", [("not mine", 5, "Leisure", datetime(2024, 3, 10))])
+
+    response = client.get("/api/v1/export-expense", query_string=RANGE, headers=headers)
+    assert response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == "attachment; filename=expenses.ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(line["title"], line["amount"], line["category"]) for line in lines] == [
+        ("rent", 900, "utilities"), ("bread", 2.5, "groceries")
+    ]
+
+    response = client.get("/api/v1/export-expense", query_string={**RANGE, "format": "csv"}, headers=headers)
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["id"] for row in rows] == [line["id"] for line in lines]
+    assert rows[1]["title"] == "bread" and float(rows[1]["amount"]) == 2.5
+
+
+def test_an_unknown_format_is_rejected(client):
+    headers = login(client, "exporter@example.com")
+    response = client.get("/api/v1/export-expense", query_string={"format": "xml"}, headers=headers)
+    assert response.status_code == 400
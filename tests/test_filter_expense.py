@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from conftest import login
+
+
+def seed(email: str, count: int):
+    from service.expense_service import ExpenseService
+
+    now = datetime.utcnow()
+    rows = []
+    for index in range(count):
+        row = ExpenseService().prepare_expense(f"coffee {index}", 3, "Leisure", "coffee", email)
+        created_at = now - timedelta(hours=index)
+        rows.append({**row, "createdAt": created_at, "updatedAt": created_at})
+    ExpenseService().store_expense_rows(rows)
+
+
+def test_pages_follow_the_cursor_newest_first(client):
+    headers = login(client, "pager@example.com")
+    seed("pager@example.com", 5)
+
+    titles, after = [], None
+    while True:
+        body = client.get(
+            "/api/v1/filter-expense", query_string={"limit": 2, "fields": "title", **({"after": after} if after else {})},
+            headers=headers
+        ).get_json()
+        titles += [expense["title"] for expense in body["data"]]
+        after = body["next_cursor"]
+        if after is None:
+            break
+    assert titles == [f"coffee {index}" for index in range(5)]
+
+
+def test_bad_paging_input_is_a_client_error(client):
+    headers = login(client, "pager@example.com")
+    seed("pager@example.com", 1)
+
+    for query in ({"after": "garbage"}, {"after": "bm90IGEgY3Vyc29y"}, {"limit": 0}, {"limit": 5000}, {"fields": "secret"},
+                  {"filter_category": "custom", "from_date": "yesterday", "to_date": "2025-01-01"}):
+        response = client.get("/api/v1/filter-expense", query_string=query, headers=headers)
+        assert response.status_code == 400, query
+        response = client.get("/api/v1/search-expenses", query_string={"q": "coffee", **query}, headers=headers)
+        assert response.status_code == 400, query
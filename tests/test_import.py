@@ -0,0 +1,29 @@
+import io
+
+from conftest import login
+
+STATEMENT = b"""Date,Description,Amount
+2024-03-01,STARBUCKS,-4.50
+2024-03-01,STARBUCKS,-4.50
+2024-03-02,STARBUCKS,-4.50
+"""
+
+
+def import_statement(body: bytes) -> dict:
+    from service.import_service import ExpenseImportService
+
+    return ExpenseImportService().import_file("importer@example.com", io.BytesIO(body), filename="statement.csv")
+
+
+def test_same_day_repeats_are_kept_and_reuploads_deduplicated(client):
+    login(client, "importer@example.com")
+
+    first = import_statement(STATEMENT)
+    assert (first["inserted"], first["duplicates"]) == (3, 0)
+
+    again = import_statement(STATEMENT)
+    assert (again["inserted"], again["duplicates"]) == (0, 3)
+
+    # A later statement overlapping the first by one of the repeated lines.
+    overlap = import_statement(b"Date,Description,Amount\n2024-03-01,STARBUCKS,-4.50\n2024-03-03,STARBUCKS,-4.50\n")
+    assert (overlap["inserted"], overlap["duplicates"]) == (1, 1)
@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from conftest import login
+
+
+@pytest.fixture
+def wal_path(tmp_path):
+    return str(tmp_path / "ingest.wal")
+
+
+def start_writer(app, monkeypatch, wal_path: str, pid: int):
+    """A queue as the worker process pid would open it, without the background writer."""
+    from service.ingestion_queue import IngestionQueue
+
+    writer = IngestionQueue(max_size=100, wal_path=wal_path, flush_interval=0, retries=1)
+    writer.app = app
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "getpid", lambda: pid)
+        writer.wal = writer.open_wal()
+    return writer
+
+
+def prepared(count: int) -> list:
+    from service.expense_service import ExpenseService
+
+    return [
+        ExpenseService().prepare_expense(f"queued {index}", 2.5, "Groceries", "queued", "writer@example.com")
+        for index in range(count)
+    ]
+
+
+def stored_count() -> int:
+    from extension import db
+    from models.expense_model import ExpenseModel
+
+    db.session.remove()
+    return db.session.execute(db.select(db.func.count()).select_from(ExpenseModel)).scalar()
+
+
+def test_wal_replay_with_two_writers(app, client, monkeypatch, wal_path):
+    login(client, "writer@example.com")
+    first = start_writer(app, monkeypatch, wal_path, 1001)
+    for row in prepared(3):
+        first.submit(row)
+
+    # A second worker starts and empties its own queue while the first still holds rows.
+    second = start_writer(app, monkeypatch, wal_path, 1002)
+    rows = prepared(2)
+    for row in rows:
+        second.submit(row)
+    second.flush([second.queue.get_nowait() for _ in rows])
+    assert stored_count() == 2
+    assert os.path.getsize(f"{wal_path}.1001") > 0
+
+    # The first worker dies before flushing; the next one to start stores its rows.
+    first.wal.close()
+    third = start_writer(app, monkeypatch, wal_path, 1003)
+    assert stored_count() == 5
+    assert not os.path.exists(f"{wal_path}.1001")
+    assert os.path.exists(f"{wal_path}.1002")
+
+    for writer in (second, third):
+        writer.shutdown()
+    assert not os.path.exists(f"{wal_path}.1002")
+
+
+def test_failed_rows_stay_in_the_wal(app, client, monkeypatch, wal_path):
+    login(client, "writer@example.com")
+    writer = start_writer(app, monkeypatch, wal_path, 1001)
+    good, bad = prepared(2)
+    bad["title"] = None
+    for row in (good, bad):
+        writer.submit(row)
+    writer.flush([writer.queue.get_nowait(), writer.queue.get_nowait()])
+
+    assert stored_count() == 1
+    assert writer.status(bad["id"], bad["user_id"])[0] == "failed"
+    with open(f"{wal_path}.1001", encoding="utf-8") as wal:
+        records = [json.loads(line) for line in wal]
+    assert [record["row"]["id"] for record in records if record["op"] == "add"] == [bad["id"]]
+    assert not any(bad["id"] in record.get("ids", ()) for record in records)
+
+
+def test_the_queue_needs_fcntl_only_for_a_write_ahead_file(app, monkeypatch, wal_path):
+    import sys
+    from service.ingestion_queue import IngestionQueue
+
+    # A platform without fcntl, such as Windows.
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    queue = IngestionQueue(max_size=100, flush_interval=0)
+    app.config.update(INGEST_QUEUE_SIZE=100, INGEST_WAL_PATH=None)
+    queue.init_app(app)
+    queue.shutdown()
+
+    app.config["INGEST_WAL_PATH"] = wal_path
+    with pytest.raises(RuntimeError, match="INGEST_WAL_PATH needs fcntl"):
+        queue.init_app(app)
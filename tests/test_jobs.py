@@ -0,0 +1,116 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import login, user_id
+
+
+def seed_midnight_expenses(owner: str, count: int, days: int):
+    """Expenses stamped at midnight of a few dates, the way statement imports store them."""
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from money import amount_columns
+    from service.category_catalog import category_catalog
+
+    start = datetime(2024, 1, 1)
+    db.session.execute(db.insert(ExpenseModel), [{
+        "title": f"imported {index}", "amount": 1.0, "description": "", "user_id": owner,
+        "category_id": category_catalog.resolve("groceries"),
+        "createdAt": start + timedelta(days=index % days), "updatedAt": start,
+        **amount_columns(1.0, new=True),
+    } for index in range(count)])
+    db.session.commit()
+
+
+def test_account_deletion_chunks_stay_within_batch_size(client):
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from models.user_model import UserModel
+    from service.account_deletion import AccountDeletion
+
+    login(client, "imported@example.com")
+    owner = user_id("imported@example.com")
+    seed_midnight_expenses(owner, 5000, days=3)
+
+    deletion = AccountDeletion()
+    cursor, chunks, done = None, [], False
+    while not done:
+        rows, cursor, done = deletion.step({"user_id": owner}, cursor, 1000)
+        db.session.commit()
+        chunks.append(rows)
+
+    assert max(chunks) <= 1000
+    assert sum(chunks[:5]) == 5000
+    assert db.session.execute(db.select(db.func.count()).select_from(ExpenseModel)).scalar() == 0
+    assert db.session.get(UserModel, owner) is None
+
+
+def rollup_cells(owner: str) -> set:
+    from extension import db
+    from models.expense_rollup_model import ExpenseDailyRollupModel as rollups
+
+    return set(db.session.execute(
+        db.select(rollups.day, rollups.category_id, rollups.total_amount, rollups.count).where(rollups.user_id == owner)
+    ).all())
+
+
+def test_retention_chunks_stay_within_batch_size(client):
+    from extension import db
+    from models.expense_model import ExpenseModel
+    from models.expense_archive_model import ExpenseArchiveModel
+    from service.expense_retention import ExpenseRetention
+    from service.rollup_service import RollupService
+
+    login(client, "busy@example.com")
+    owner = user_id("busy@example.com")
+    # One busy day of 1667 expenses, then two quieter ones.
+    seed_midnight_expenses(owner, 1667, days=1)
+    seed_midnight_expenses(owner, 600, days=3)
+    RollupService().rebuild(owner)
+
+    retention = ExpenseRetention()
+    params = {"before": datetime(2024, 1, 2).isoformat()}
+    cursor, chunks, done = None, [], False
+    while not done:
+        rows, cursor, done = retention.step(params, cursor, 1000)
+        db.session.commit()
+        chunks.append(rows)
+
+    assert max(chunks) <= 1000
+    assert sum(chunks) == 1667 + 200
+    assert db.session.execute(db.select(db.func.sum(ExpenseArchiveModel.count))).scalar() == 1867
+    assert db.session.execute(db.select(db.func.count()).select_from(ExpenseModel)).scalar() == 400
+    cells = rollup_cells(owner)
+    RollupService().rebuild(owner)
+    assert cells == rollup_cells(owner)
+
+
+@pytest.mark.parametrize("store", ["memory", "database"])
+def test_deleting_an_account_revokes_all_of_its_tokens(app, client, store):
+    from service.job_runner import job_runner
+    from service.revocation_service import token_blocklist
+    from service.user_cache import user_id_cache
+
+    app.config["REVOCATION_STORE"] = store
+    token_blocklist.init_app(app)
+    email = "leaving@example.com"
+    client.post("/api/v1/signup", json={"username": email, "email": email, "password": "password"})
+    sessions = [client.post("/api/v1/login", json={"email": email, "password": "password"}).get_json() for _ in range(2)]
+    owner = user_id(email)
+
+    deleting = {"Authorization": f"Bearer {sessions[0]['access_token']}"}
+    assert client.delete("/api/v1/account", headers=deleting).status_code == 202
+    # Sign up again once the clock has moved on to the next second, the resolution of a token's iat.
+    time.sleep(1.05 - time.time() % 1)
+    headers = login(client, email)
+    user_id_cache.set(email, owner)
+    job_runner.run_pending()
+
+    assert user_id_cache.get(email) is None
+    for session in sessions:
+        old = {"Authorization": f"Bearer {session['access_token']}"}
+        assert client.get("/api/v1/filter-expense", headers=old).get_json()["error"] == "token_revoked"
+        refresh = {"Authorization": f"Bearer {session['refresh_token']}"}
+        assert client.post("/api/v1/refresh-token", headers=refresh).status_code == 401
+    assert client.get("/api/v1/filter-expense", headers=headers).status_code == 200
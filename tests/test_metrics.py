@@ -0,0 +1,29 @@
+from sqlalchemy.engine import make_url
+
+from conftest import login
+
+
+def test_metrics_need_the_metrics_token_or_an_admin(app, client):
+    app.config["ADMIN_EMAIL"] = "admin@example.com"
+    app.config["METRICS_TOKEN"] = "scrape-secret"
+    admin = login(client, "admin@example.com")
+    member = login(client, "member@example.com")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers=member).status_code == 403
+
+    for headers in (admin, {"Authorization": "Bearer scrape-secret"}):
+        response = client.get("/metrics", headers=headers)
+        assert response.status_code == 200
+        assert "expense_api_requests_total" in response.get_data(as_text=True)
+
+
+def test_exported_statements_and_databases_carry_no_secrets():
+    from service.query_metrics import database_label, mask_literals
+
+    assert mask_literals(
+        "SELECT * FROM expenses_2024_01 WHERE title = 'Rent ''May''' AND amount > 12.5 LIMIT %(param_1)s"
+    ) == "SELECT * FROM expenses_2024_01 WHERE title = ? AND amount > ? LIMIT %(param_1)s"
+    assert database_label(make_url("postgresql://app:hunter2@db:5432/expenses?password=hunter2")) \
+        == "postgresql://db:5432/expenses"
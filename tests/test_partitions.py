@@ -0,0 +1,119 @@
+"""Monthly partitioning against a real PostgreSQL server.
+
+Set TEST_POSTGRES_URL to a database the tests may create schemas in, e.g.
+postgresql://postgres@localhost/expenses_test. The partitioning mode is
+read when the models are imported, so the app runs in flask CLI
+subprocesses, each with its own EXPENSE_PARTITIONING.
+"""
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import pytest
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to run the PostgreSQL tests")
+
+
+@pytest.fixture
+def schema_url():
+    """A URL whose connections use a schema of their own, dropped afterwards."""
+    from sqlalchemy import create_engine, text
+
+    schema = f"test_partitions_{uuid.uuid4().hex[:8]}"
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+    separator = "&" if "?" in POSTGRES_URL else "?"
+    yield f"{POSTGRES_URL}{separator}options={quote(f'-csearch_path={schema}')}"
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+    engine.dispose()
+
+
+def run_flask(url: str, partitioning: str, *args) -> subprocess.CompletedProcess:
+    env = {
+        **os.environ, "DATABASE_URL": url, "EXPENSE_PARTITIONING": partitioning, "AUTO_CREATE_TABLES": "false",
+        "PASSWORD_HASH_WORKERS": "0", "JOB_POLL_INTERVAL": "0",
+    }
+    return subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app:create_app", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300
+    )
+
+
+def flask(url: str, partitioning: str, *args) -> str:
+    result = run_flask(url, partitioning, *args)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def seed(url: str, months: int, per_day: int = 3) -> int:
+    """A user with expenses on every day of the last `months` months."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(url)
+    now = datetime.utcnow().replace(microsecond=0)
+    with engine.begin() as connection:
+        user_id = str(uuid.uuid4())
+        connection.execute(text(
+            'INSERT INTO users (id, username, email, password, "createdAt", "updatedAt") '
+            "VALUES (:id, 'pruned', 'pruned@example.com', '-', :now, :now)"
+        ), {"id": user_id, "now": now})
+        category_id = connection.execute(text("SELECT min(id) FROM categories")).scalar()
+        rows = [{
+            "id": str(uuid.uuid4()), "user_id": user_id, "category_id": category_id,
+            "created": now - timedelta(days=day, hours=index),
+        } for day in range(months * 30) for index in range(per_day)]
+        connection.execute(text(
+            'INSERT INTO expenses (id, title, amount, category_id, description, user_id, "createdAt", "updatedAt") '
+            "VALUES (:id, 'seed', 1.5, :category_id, 'seed', :user_id, :created, :created)"
+        ), rows)
+    engine.dispose()
+    return len(rows)
+
+
+def test_convert_a_table_with_rows_and_prune_the_filter_queries(schema_url):
+    from sqlalchemy import create_engine, text
+
+    flask(schema_url, "none", "init-db")
+    seeded = seed(schema_url, months=14)
+
+    output = flask(schema_url, "monthly", "partition-expenses", "--months-ahead", "2")
+    assert f"moved {seeded} expenses into the partitioned table" in output
+
+    engine = create_engine(schema_url)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM expenses")).scalar() == seeded
+        assert connection.execute(text("SELECT count(*) FROM expenses_default")).scalar() == 0
+        partitions = connection.execute(text(
+            "SELECT count(*) FROM pg_inherits i JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE parent.relname = 'expenses' AND pg_table_is_visible(parent.oid)"
+        )).scalar()
+    engine.dispose()
+    # 14 or 15 months of rows, two months ahead and the default partition.
+    assert partitions >= 17
+
+    report = flask(schema_url, "monthly", "check-partition-pruning", "--email", "pruned@example.com")
+    scanned = dict(line.split(": ", 1) for line in report.strip().splitlines())
+    assert set(scanned) == {"past_week", "past_month"}
+    for names in scanned.values():
+        assert 1 <= len(names.split(", ")) <= 2
+        assert "expenses_default" not in names
+
+
+def test_check_pruning_fails_when_a_preset_reads_too_many_partitions(schema_url):
+    flask(schema_url, "none", "init-db")
+    seed(schema_url, months=3)
+    flask(schema_url, "monthly", "partition-expenses")
+
+    result = run_flask(
+        schema_url, "monthly", "check-partition-pruning", "--email", "pruned@example.com", "--max-partitions", "0"
+    )
+    assert result.returncode != 0
+    assert "filter queries are not pruned" in result.stderr
@@ -0,0 +1,51 @@
+import time
+import pytest
+
+from conftest import login
+
+
+def test_a_timed_out_hash_keeps_its_slot_until_it_finishes():
+    from service.password_hasher import PasswordHasher
+
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=0.2)
+    try:
+        with pytest.raises(PasswordHasher.PasswordHasherBusy, match="too long"):
+            hasher.run(time.sleep, 1.0)
+        # The pool is still working on the first call.
+        with pytest.raises(PasswordHasher.PasswordHasherBusy):
+            hasher.run(abs, -1)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                assert hasher.run(abs, -1) == 1
+                break
+            except PasswordHasher.PasswordHasherBusy:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+    finally:
+        hasher.shutdown()
+
+
+def test_needs_rehash_compares_the_stored_parameters(monkeypatch):
+    from werkzeug.security import generate_password_hash
+    from service import password_hasher as module
+
+    stored = generate_password_hash("secret", "pbkdf2:sha256:1000")
+    monkeypatch.setattr(module, "generate_password_hash", None)
+    assert not module.PasswordHasher(method="pbkdf2:sha256:1000").needs_rehash(stored)
+    assert module.PasswordHasher(method="pbkdf2:sha256:2000").needs_rehash(stored)
+    assert module.PasswordHasher(method="scrypt").needs_rehash(stored)
+
+
+def test_a_hash_timing_out_answers_503(client, monkeypatch):
+    from service.password_hasher import password_hasher
+
+    login(client, "slow@example.com")
+    monkeypatch.setattr(password_hasher, "workers", 1)
+    monkeypatch.setattr(password_hasher, "timeout", 0.001)
+    try:
+        response = client.post("/api/v1/login", json={"email": "slow@example.com", "password": "password"})
+        assert response.status_code == 503
+        assert "too long" in response.get_json()["error"]
+    finally:
+        password_hasher.shutdown()
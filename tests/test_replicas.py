@@ -0,0 +1,52 @@
+import shutil
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import login, user_id
+
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setenv("REPLICA_STICKY_SECONDS", "30")
+    yield tmp_path / "replica.db"
+    from extension import db
+
+    # Flask-SQLAlchemy keeps a metadata per bind key; later apps have no replicas.
+    db.metadatas.pop("replica_0", None)
+
+
+def listed(client, headers) -> int:
+    response = client.get("/api/v1/filter-expense?filter=past_week", headers=headers)
+    assert response.status_code == 200
+    return len(response.get_json()["data"])
+
+
+def test_reads_after_a_write_stay_on_the_primary_in_every_worker(replica, app, client, tmp_path):
+    from extension import db
+    from models.expense_version_model import ExpenseVersionModel
+    from service.replica_router import replica_router
+
+    # The replica stops replicating before the user writes.
+    shutil.copy(tmp_path / "test.db", replica)
+    headers = login(client, "reader@example.com")
+    response = client.post("/api/v1/create-expense", headers=headers, json={
+        "title": "lunch", "amount": 12.5, "category": "Leisure", "description": "lunch"
+    })
+    assert response.status_code == 200
+
+    # Another worker, which did not handle the write, serves the next read.
+    replica_router.init_app(app)
+    assert listed(client, headers) == 1
+    assert replica_router.reads["primary"] > 0 and replica_router.reads["replica"] == 0
+
+    # Once the window is over, reads go to the lagging replica.
+    db.session.execute(db.update(ExpenseVersionModel).where(
+        ExpenseVersionModel.user_id == user_id("reader@example.com")
+    ).values(writtenAt=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+    # Requests here share the test's app context; start the next one with a session of its own.
+    db.session.remove()
+    assert listed(client, headers) == 0
+    assert replica_router.reads["replica"] > 0
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+
+def test_memory_store_never_forgets_an_unexpired_revocation():
+    from service.revocation_service import MemoryRevocationStore
+
+    store = MemoryRevocationStore(max_entries=2)
+    later = time.time() + 3600
+    store.revoke("first", later)
+    store.revoke("second", later)
+
+    with pytest.raises(MemoryRevocationStore.RevocationStoreFull):
+        store.revoke("third", later)
+    assert store.is_revoked("first") and store.is_revoked("second")
+    # Revoking a token again does not need room.
+    store.revoke("first", later)
+
+
+def test_memory_store_makes_room_by_dropping_expired_tokens():
+    from service.revocation_service import MemoryRevocationStore
+
+    store = MemoryRevocationStore(max_entries=2)
+    store.revoke("expiring", time.time() + 0.05)
+    store.revoke("valid", time.time() + 3600)
+    time.sleep(0.1)
+
+    store.revoke("new", time.time() + 3600)
+    assert store.is_revoked("valid") and store.is_revoked("new")
+    assert len(store) == 2
+
+
+def test_database_store_cache_size_comes_from_the_environment(app, monkeypatch):
+    from config import app_config
+    from service.revocation_service import TokenBlocklist
+
+    monkeypatch.setenv("REVOCATION_STORE", "database")
+    monkeypatch.setenv("REVOCATION_CACHE_SIZE", "7")
+    app.config.update(app_config())
+    blocklist = TokenBlocklist()
+    blocklist.init_app(app)
+    assert blocklist.store.cache_size == 7
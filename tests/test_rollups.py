@@ -0,0 +1,47 @@
+import threading
+from datetime import datetime
+
+from conftest import login, user_id
+
+
+def test_refresh_racing_an_insert_keeps_the_insert(app, client, monkeypatch):
+    from extension import db
+    from models.expense_rollup_model import ExpenseDailyRollupModel as rollups
+    from service.category_catalog import category_catalog
+    from service.expense_service import ExpenseService
+    from service.rollup_service import RollupService
+
+    login(client, "racer@example.com")
+    owner = user_id("racer@example.com")
+    groceries = category_catalog.resolve("groceries")
+    day = datetime(2024, 5, 1, 12)
+
+    def row(amount: float) -> dict:
+        expense = ExpenseService().prepare_expense("milk", amount, "Groceries", "milk", "racer@example.com")
+        return {**expense, "createdAt": day, "updatedAt": day}
+
+    ExpenseService().store_expense_rows([row(5.0)])
+
+    def insert():
+        with app.app_context():
+            ExpenseService().store_expense_rows([row(7.0)])
+
+    # An insert of another process commits while the refresh is between its read of expenses and its write of the cell.
+    racer = threading.Thread(target=insert)
+    upsert = RollupService.upsert
+
+    def racing_upsert(self, user_id, cells, increment=True):
+        if not increment and not racer.is_alive() and racer.ident is None:
+            racer.start()
+            racer.join(timeout=0.5)
+        return upsert(self, user_id, cells, increment)
+
+    monkeypatch.setattr(RollupService, "upsert", racing_upsert)
+    RollupService().refresh(owner, {(day.date(), groceries)})
+    db.session.commit()
+    racer.join()
+
+    total, count = db.session.execute(db.select(rollups.total_amount, rollups.count).where(
+        rollups.user_id == owner, rollups.day == day.date(), rollups.category_id == groceries
+    )).one()
+    assert (total, count) == (12.0, 2)
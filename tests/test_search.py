@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from conftest import login, store_expenses
+
+
+def search(client, headers, **query):
+    return client.get("/api/v1/search-expenses", query_string=query, headers=headers).get_json()
+
+
+def test_best_matches_come_first(client):
+    headers = login(client, "searcher@example.com")
+    other = login(client, "other@example.com")
+    day = datetime(2024, 6, 1)
+    store_expenses("searcher@example.com", [
+        ("amazon order", 30, "Shopping", day),
+        ("amazon amazon charger", 20, "Electronics", day),
+        ("groceries at the amazon fresh store with a long list of other things bought", 50, "Groceries", day),
+        ("bus ticket", 3, "Transport", day),
+    ])
+    store_expenses("other@example.com", [("amazon amazon amazon", 1, "Shopping", day)])
+
+    titles = [expense["title"] for expense in search(client, headers, q="amazon")["data"]]
+    assert titles[0] == "amazon amazon charger"
+    assert titles[-1].startswith("groceries") and len(titles) == 3
+    assert [expense["title"] for expense in search(client, headers, q="amaz charg")["data"]] == ["amazon amazon charger"]
+    assert [expense["title"] for expense in search(client, headers, q="amazon", category="shopping")["data"]] == ["amazon order"]
+    assert search(client, other, q="charger")["count"] == 0
+
+
+def test_pages_follow_the_ranked_order_without_gaps_or_repeats(client):
+    headers = login(client, "searcher@example.com")
+    day = datetime(2024, 6, 1)
+    # Ties on the rank, ordered by createdAt and id, as well as different ranks.
+    store_expenses("searcher@example.com", [
+        (" ".join(["coffee"] * (1 + index % 3)) + f" number {index}", 3, "Leisure", day + timedelta(minutes=index % 4))
+        for index in range(25)
+    ])
+
+    everything = search(client, headers, q="coffee", limit=100, fields="id")
+    assert everything["count"] == 25 and everything["next_cursor"] is None
+    ids, after = [], None
+    while True:
+        page = search(client, headers, q="coffee", limit=10, fields="id", **({"after": after} if after else {}))
+        ids += [expense["id"] for expense in page["data"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert ids == [expense["id"] for expense in everything["data"]]
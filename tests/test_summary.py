@@ -0,0 +1,63 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import login, store_expenses
+
+RANGE = {"filter_category": "custom", "from_date": "2024-01-10T12:00:00", "to_date": "2024-03-05T06:00:00"}
+
+
+def expected_summary(rows: list, bucket: str) -> tuple:
+    """(total, count, {category: (total, count, min, max)}, {(bucket, category): total}) computed from raw rows."""
+    start, end = datetime.fromisoformat(RANGE["from_date"]), datetime.fromisoformat(RANGE["to_date"])
+    categories, buckets = {}, {}
+    for title, amount, category, created_at in rows:
+        if not start <= created_at <= end:
+            continue
+        day = created_at.date()
+        if bucket == "week":
+            day -= timedelta(days=day.weekday())
+        elif bucket == "month":
+            day = day.replace(day=1)
+        total, count, minimum, maximum = categories.get(category, (0, 0, amount, amount))
+        categories[category] = (total + amount, count + 1, min(minimum, amount), max(maximum, amount))
+        buckets[(day.isoformat(), category)] = buckets.get((day.isoformat(), category), 0) + amount
+    return (
+        sum(cell[0] for cell in categories.values()), sum(cell[1] for cell in categories.values()), categories, buckets
+    )
+
+
+def assert_summary_matches(client, headers, rows: list, bucket: str):
+    summary = client.get("/api/v1/expense-summary", query_string={**RANGE, "bucket": bucket}, headers=headers).get_json()["data"]
+    total, count, categories, buckets = expected_summary(rows, bucket)
+    assert (round(summary["total"], 2), summary["count"]) == (round(total, 2), count)
+    assert {
+        cell["category"]: (round(cell["total"], 2), cell["count"], cell["min"], cell["max"]) for cell in summary["by_category"]
+    } == {category: (round(total, 2), *rest) for category, (total, *rest) in categories.items()}
+    assert {(cell["bucket"], cell["category"]): round(cell["total"], 2) for cell in summary["by_bucket"]} \
+        == {key: round(total, 2) for key, total in buckets.items()}
+
+
+@pytest.mark.parametrize("bucket", ["day", "week", "month"])
+def test_summary_totals_match_the_raw_rows(client, bucket):
+    headers = login(client, "summer@example.com")
+    rng = random.Random(4)
+    rows = [
+        (f"expense {index}", round(rng.uniform(1, 100), 2), rng.choice(["groceries", "leisure", "health"]),
+         datetime(2024, 1, 8) + timedelta(minutes=rng.randint(0, 60 * 24 * 60)))
+        for index in range(400)
+    ]
+    # On the edges of the range, which are partial days.
+    rows += [("edge", 7.0, "groceries", datetime(2024, 1, 10, 11, 59)), ("edge", 8.0, "groceries", datetime(2024, 1, 10, 12)),
+             ("edge", 9.0, "leisure", datetime(2024, 3, 5, 6)), ("edge", 10.0, "leisure", datetime(2024, 3, 5, 6, 1))]
+    stored = store_expenses("summer@example.com", rows)
+    assert_summary_matches(client, headers, rows, bucket)
+
+    # Rollups follow updates and deletes.
+    changed = stored[0]
+    client.put("/api/v1/update-expense", json={"expense_id": changed["id"], "amount": 55, "category": "health"}, headers=headers)
+    rows[0] = (rows[0][0], 55, "health", rows[0][3])
+    client.delete("/api/v1/delete-expense", json={"expense_id": stored[1]["id"]}, headers=headers)
+    del rows[1]
+    assert_summary_matches(client, headers, rows, bucket)